@@ -8,7 +8,7 @@ name varchar(50) not null,
 phone varchar(15) not null,
 email varchar(320) not null,
 address varchar(100) not null,
-password varchar(10) not null,
+password varchar(255) not null,
 primary key(userID)
 );
 
@@ -72,6 +72,44 @@ ALTER TABLE auction_item
 ADD COLUMN winnerID VARCHAR(10) NULL,
 ADD CONSTRAINT fk_winner_cust FOREIGN KEY (winnerID) REFERENCES customer(userID) ON DELETE SET NULL;
 
+-- Running bid summary, maintained by sp_place_bid so price checks never scan the bid table
+ALTER TABLE auction_item
+ADD COLUMN current_price INT NULL, -- highest bid so far, NULL while there are no bids
+ADD COLUMN bid_count INT NOT NULL DEFAULT 0,
+ADD COLUMN leading_custID VARCHAR(10) NULL,
+ADD CONSTRAINT fk_leading_cust FOREIGN KEY (leading_custID) REFERENCES customer(userID) ON DELETE SET NULL;
+
+-- Secondary indexes for the hot access paths (see migrations/007_query_indexes.sql)
+ALTER TABLE bid ADD INDEX idx_bid_cust_time (custID, bid_time, bidID, itemID, amount);
+ALTER TABLE bid ADD INDEX idx_bid_item_amount (itemID, amount DESC, bid_time);
+ALTER TABLE auction_item ADD INDEX idx_item_auction (auctionID, itemID, status, title, bid_count);
+ALTER TABLE auction_item ADD INDEX idx_item_winner_unpaid (winnerID, transactionID);
+ALTER TABLE auction ADD INDEX idx_auction_status_start (status, start_time);
+ALTER TABLE auction ADD INDEX idx_auction_start (start_time);
+
+-- Proxy bids (see migrations/009_proxy_bids.sql).
+-- One maximum per customer and item. idx_proxy_bid_priority is the per-item priority order:
+-- highest maximum first, ties to the earliest one, so the top two are read from the index.
+CREATE TABLE proxy_bid (
+custID varchar(10) not null,
+itemID varchar(10) not null,
+max_amount int not null,
+created_at timestamp(6) not null default current_timestamp(6),
+primary key (itemID, custID),
+index idx_proxy_bid_priority (itemID, max_amount DESC, created_at),
+index idx_proxy_bid_cust (custID, created_at),
+constraint fk_proxy_cust foreign key (custID) references customer(userID) on delete cascade on update cascade,
+constraint fk_proxy_item foreign key (itemID) references auction_item(itemID) on delete cascade on update cascade
+);
+
+-- Applied migrations, maintained by tools/migrate.py. A fresh install already includes all of them.
+create table schema_migrations(
+version varchar(10) primary key,
+applied_at timestamp not null default current_timestamp
+);
+INSERT INTO schema_migrations (version) VALUES ('001'), ('002'), ('003'), ('004'), ('005'), ('006'), ('007'), ('008'), ('009'), ('010');
+
+-- Sample passwords are plain text; the backend replaces each with a salted hash at first login
 INSERT INTO customer VALUES
 ('C001','Alice Johnson','9876543210','alice@example.com','Delhi','pass123'),
 ('C002','Bob Smith','9123456789','bob@example.com','Mumbai','pass234'),
@@ -109,6 +147,22 @@ INSERT INTO bid VALUES
 ('BID004',5500,NOW(),'C005','I004'),
 ('BID005',2500,NOW(),'C001','I005');
 
+-- Backfill the bid summary columns for the sample bids above
+UPDATE auction_item ai
+LEFT JOIN (
+    SELECT itemID, MAX(amount) AS max_amount, COUNT(*) AS n
+    FROM bid
+    GROUP BY itemID
+) s ON s.itemID = ai.itemID
+SET ai.current_price = s.max_amount,
+    ai.bid_count = IFNULL(s.n, 0),
+    ai.leading_custID = (
+        SELECT b.custID FROM bid b
+        WHERE b.itemID = ai.itemID
+        ORDER BY b.amount DESC, b.bid_time ASC
+        LIMIT 1
+    );
+
 INSERT INTO payment (transactionID, amount, paymentMethod, PaymentDate, CustomerId, itemID) VALUES
 ('T001', 42000, 'UPI', '2025-09-06', 'C002', 'I001'),
 ('T002', 12500, 'Credit/Debit Card', '2025-09-07', 'C003', 'I002'),
@@ -206,12 +260,13 @@ DELIMITER ;
 DELIMITER $$
 CREATE PROCEDURE sp_update_auction_status(IN p_auctionID VARCHAR(10))
 BEGIN
-    -- 1. Check if a 'Scheduled' auction should become 'Active'
+    -- 1. Check if a 'Scheduled' auction should become 'Active'. One whose end_time has
+    --    passed too is started here and ended by step 2, so it never stays 'Scheduled'.
     UPDATE auction
     SET status = 'Active'
     WHERE auctionID = p_auctionID
       AND status = 'Scheduled'
-      AND NOW() BETWEEN start_time AND end_time;
+      AND NOW() >= start_time;
 
     -- 2. Check if an 'Active' auction should 'End'
     UPDATE auction
@@ -220,11 +275,12 @@ BEGIN
       AND status = 'Active'
       AND NOW() >= end_time;
 END$$
-DELIMITTER ;
+DELIMITER ;
 
 -- TRIGGER: before_bid_insert
 -- Purpose: Validates all new bids before they are inserted.
--- Checks: 1. Auction is 'Active'. 2. NOW() is within auction time. 3. Bid is high enough.
+-- Checks: 1. Auction is open (Active, or Scheduled and started). 2. NOW() is before end_time. 3. Bid is high enough.
+-- The auction row is only read, never written, so bids on different items don't queue behind each other.
 -- Drop the old trigger so we can replace it
 
 -- Create the new, smarter trigger
@@ -232,50 +288,136 @@ DELIMITER $$
 CREATE TRIGGER before_bid_insert
 BEFORE INSERT ON bid
 FOR EACH ROW
-BEGIN
-    DECLARE v_auctionID VARCHAR(10);
+trigger_body: BEGIN
     DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+    DECLARE v_start_time DATETIME;
+    DECLARE v_end_time DATETIME;
     DECLARE v_start_price INT;
-    DECLARE v_current_max_bid INT;
-
-    -- 1. Get the auctionID for the item being bid on
-    SELECT auctionID INTO v_auctionID
-    FROM auction_item
-    WHERE itemID = NEW.itemID;
+    DECLARE v_current_price INT;
 
-    -- 2. CALL THE PROCEDURE to update the auction's status
-    -- This makes sure the status is correct BEFORE we check it.
-    IF v_auctionID IS NOT NULL THEN
-        CALL sp_update_auction_status(v_auctionID);
+    -- 0. Bids written by the backend's bid engine flusher were already validated in memory
+    IF @trusted_bid_writer = 1 AND SUBSTRING_INDEX(USER(), '@', 1) = 'auction_admin' THEN
+        LEAVE trigger_body;
     END IF;
-    -- 3. Get the (now updated) auction status and item start price
-    SELECT a.status, ai.start_price
-    INTO v_auction_status, v_start_price
+
+    -- 1. Get the auction status and window, item start price and current highest bid
+    SELECT a.status, a.start_time, a.end_time, ai.start_price, ai.current_price
+    INTO v_auction_status, v_start_time, v_end_time, v_start_price, v_current_price
     FROM auction a
     JOIN auction_item ai ON a.auctionID = ai.auctionID
     WHERE ai.itemID = NEW.itemID;
 
-    -- 4. Check if the auction is 'Active'
-    -- If the procedure updated it, this check will now pass.
-    -- If it's still 'Scheduled' or 'Ended', this will fail.
-    IF v_auction_status != 'Active' THEN
+    -- 2. Check the auction is open right now. Same outcome as running sp_update_auction_status first
+    -- (Scheduled -> Active inside the window, Active -> Ended at end_time), but without the UPDATEs.
+    -- Persisting those transitions is left to sp_update_auction_status, which the finalize
+    -- procedures and the lifecycle scheduler call.
+    IF NOT ((v_auction_status = 'Active' OR (v_auction_status = 'Scheduled' AND NOW() >= v_start_time))
+            AND NOW() < v_end_time) THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Bidding is not allowed. The auction is not active.';
     END IF;
-    -- 5. Get the current highest bid for this item
-    SELECT MAX(amount) INTO v_current_max_bid FROM bid WHERE itemID = NEW.itemID;
-    -- 6. Check if the new bid is high enough
-    IF NEW.amount <= IFNULL(v_current_max_bid, v_start_price) THEN
+    -- 3. Check if the new bid is higher than the current highest bid (kept on auction_item by sp_place_bid)
+    IF NEW.amount <= IFNULL(v_current_price, v_start_price) THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
     END IF;
 END$$
-DELIMITTER ;
+DELIMITER ;
+
+
+
+-- PROCEDURE: sp_resolve_proxy_bids
+-- Purpose: Settles the item's proxy bids against its current leader, and bids once for the winner.
+-- The caller holds the item row's lock (sp_place_bid, sp_set_proxy_bid).
+--   * The leader's ceiling is their own maximum, or the price they bid if it is higher or they have none.
+--   * A challenger is anyone else whose maximum beats the price. The best one wins if it beats the
+--     leader's ceiling, at one above the best other ceiling (capped at its own maximum).
+--   * Otherwise the leader keeps the lead, at one above the best challenger (capped at their ceiling).
+--   * A winning maximum that covers the reserve price bids at least the reserve price.
+-- Afterwards no one but the leader has a maximum above the price, so each call places at most one bid.
+DELIMITER $$
+CREATE PROCEDURE sp_resolve_proxy_bids(
+    IN p_itemID VARCHAR(10)
+)
+resolve: BEGIN
+    DECLARE v_current_price INT;
+    DECLARE v_floor INT;
+    DECLARE v_reserve_price INT;
+    DECLARE v_leader VARCHAR(10);
+    DECLARE v_leader_max INT;
+    DECLARE v_top_custID VARCHAR(10);
+    DECLARE v_top_max INT;
+    DECLARE v_second_max INT;
+    DECLARE v_winner VARCHAR(10);
+    DECLARE v_winner_max INT;
+    DECLARE v_price INT;
+
+    SELECT current_price, IFNULL(current_price, start_price), reserve_price, leading_custID
+    INTO v_current_price, v_floor, v_reserve_price, v_leader
+    FROM auction_item
+    WHERE itemID = p_itemID;
+
+    -- The best challenger: highest maximum above the price, earliest first on a tie
+    SET v_top_custID = (
+        SELECT custID FROM proxy_bid
+        WHERE itemID = p_itemID AND max_amount > v_floor AND custID <> IFNULL(v_leader, '')
+        ORDER BY max_amount DESC, created_at, custID
+        LIMIT 1);
+    SET v_leader_max = (
+        SELECT max_amount FROM proxy_bid
+        WHERE itemID = p_itemID AND custID = v_leader);
+
+    IF v_top_custID IS NULL THEN
+        IF v_leader IS NULL OR v_leader_max IS NULL THEN
+            LEAVE resolve;
+        END IF;
+        SET v_winner = v_leader,
+            v_winner_max = GREATEST(v_current_price, v_leader_max),
+            v_price = v_current_price;
+    ELSE
+        SET v_top_max = (
+            SELECT max_amount FROM proxy_bid
+            WHERE itemID = p_itemID AND custID = v_top_custID);
+        -- Without a leader the start price is the ceiling to beat
+        SET v_leader_max = IF(v_leader IS NULL, v_floor, GREATEST(v_current_price, IFNULL(v_leader_max, v_current_price)));
+
+        IF v_top_max > v_leader_max THEN
+            SET v_second_max = (
+                SELECT MAX(max_amount) FROM proxy_bid
+                WHERE itemID = p_itemID AND max_amount > v_floor AND custID NOT IN (v_top_custID, IFNULL(v_leader, '')));
+            SET v_winner = v_top_custID,
+                v_winner_max = v_top_max,
+                v_price = LEAST(v_top_max, GREATEST(v_leader_max, IFNULL(v_second_max, v_leader_max)) + 1);
+        ELSE
+            SET v_winner = v_leader,
+                v_winner_max = v_leader_max,
+                v_price = LEAST(v_leader_max, v_top_max + 1);
+        END IF;
+    END IF;
+
+    SET v_price = GREATEST(v_price, LEAST(v_winner_max, v_reserve_price));
+    IF v_winner <=> v_leader AND v_price = v_current_price THEN
+        LEAVE resolve;
+    END IF;
 
+    -- before_bid_insert checks the auction window for this bid too
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), v_winner, p_itemID, v_price, NOW());
 
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = v_winner,
+        current_price = v_price
+    WHERE itemID = p_itemID;
+END$$
+DELIMITER ;
 
 -- PROCEDURE: sp_place_bid
 -- Purpose: Simplifies the process of placing a bid. Uses UUID() for a unique bidID.
+-- Also keeps current_price / bid_count / leading_custID on auction_item in the same transaction.
+-- Locks only the item row, first, so concurrent bids on an item are serialized and checked in turn.
+-- Proxy bids answer the bid in the same transaction, so the result reports the item's final
+-- price and leader, which may be another customer's.
 DELIMITER $$
 CREATE PROCEDURE sp_place_bid(
     IN p_custID VARCHAR(10),
@@ -283,16 +425,135 @@ CREATE PROCEDURE sp_place_bid(
     IN p_amount INT
 )
 BEGIN
+    DECLARE v_price INT;
+    DECLARE v_previous_leader VARCHAR(10);
+
+    -- Lock the item row before anything else. Whoever holds it has seen the latest price.
+    SELECT IFNULL(current_price, start_price), leading_custID
+    INTO v_price, v_previous_leader
+    FROM auction_item
+    WHERE itemID = p_itemID
+    FOR UPDATE;
+
+    -- start_price is NOT NULL, so no price means no such item
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item not found';
+    END IF;
+
+    IF p_amount <= v_price THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+
+    -- before_bid_insert still checks the auction window
     INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
     VALUES (UUID(), p_custID, p_itemID, p_amount, NOW());
-    
-    SELECT 'Bid placed successfully.' AS message;
+
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = p_custID,
+        current_price = p_amount
+    WHERE itemID = p_itemID;
+
+    CALL sp_resolve_proxy_bids(p_itemID);
+
+    SELECT IF(leading_custID = p_custID, 'Bid placed successfully.',
+              'Bid placed, but another bidder''s maximum bid is higher.') AS message,
+           v_previous_leader AS previous_leader, current_price, leading_custID
+    FROM auction_item
+    WHERE itemID = p_itemID;
+END$$
+DELIMITER ;
+
+-- PROCEDURE: sp_place_bid_autocommit
+-- Purpose: sp_place_bid in its own transaction, so the backend can place a bid in a single
+-- round trip (one CALL, no separate COMMIT).
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid_autocommit(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    CALL sp_place_bid(p_custID, p_itemID, p_amount);
+    COMMIT;
+END$$
+DELIMITER ;
+
+-- PROCEDURE: sp_set_proxy_bid
+-- Purpose: Sets a customer's maximum bid on an item and resolves the proxy bids at once, in its own
+-- transaction. Sending a new maximum replaces the old one. The maximum must beat the current price.
+DELIMITER $$
+CREATE PROCEDURE sp_set_proxy_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_max_amount INT
+)
+BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+    DECLARE v_start_time DATETIME;
+    DECLARE v_end_time DATETIME;
+    DECLARE v_price INT;
+    DECLARE v_previous_leader VARCHAR(10);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    -- Same lock as sp_place_bid: the item row only, not the auction's
+    SELECT a.status, a.start_time, a.end_time, IFNULL(ai.current_price, ai.start_price), ai.leading_custID
+    INTO v_auction_status, v_start_time, v_end_time, v_price, v_previous_leader
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = p_itemID
+    FOR UPDATE OF ai;
+
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item or auction not found';
+    END IF;
+    -- The leader may only raise a maximum without a bid being placed, so check the window here
+    IF NOT ((v_auction_status = 'Active' OR (v_auction_status = 'Scheduled' AND NOW() >= v_start_time))
+            AND NOW() < v_end_time) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Bidding is not allowed. The auction is not active.';
+    END IF;
+    IF p_max_amount <= v_price THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your maximum bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+
+    INSERT INTO proxy_bid (custID, itemID, max_amount)
+    VALUES (p_custID, p_itemID, p_max_amount)
+    ON DUPLICATE KEY UPDATE max_amount = p_max_amount, created_at = CURRENT_TIMESTAMP(6);
+
+    CALL sp_resolve_proxy_bids(p_itemID);
+
+    SELECT IF(leading_custID = p_custID, 'Maximum bid set. You are the highest bidder.',
+              'Maximum bid set, but another bidder''s maximum bid is higher.') AS message,
+           v_previous_leader AS previous_leader, v_price AS previous_price,
+           current_price, leading_custID, p_max_amount AS max_amount
+    FROM auction_item
+    WHERE itemID = p_itemID;
+    COMMIT;
 END$$
 DELIMITER ;
 
 
 -- PROCEDURE: sp_finalize_auction_item
 -- Purpose: Checks winning bid, updates item status, and STORES THE WINNER.
+-- Proxy bids were already placed as real bids, so the leading bid is the winner; the item's
+-- maxima are no longer needed and are dropped.
 DELIMITER $$
 CREATE PROCEDURE sp_finalize_auction_item(
     IN p_itemID VARCHAR(10)
@@ -303,23 +564,19 @@ BEGIN
     DECLARE v_reserve_price INT;
     DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
 
-    -- Get the auction status to make sure it's actually over
-    SELECT a.status, ai.reserve_price
-    INTO v_auction_status, v_reserve_price
+    -- Bids no longer persist auction status changes, so bring this auction's status up to date first
+    CALL sp_update_auction_status((SELECT auctionID FROM auction_item WHERE itemID = p_itemID));
+
+    -- Get the auction status to make sure it's actually over, plus the leading bid kept by sp_place_bid
+    SELECT a.status, ai.reserve_price, ai.current_price, ai.leading_custID
+    INTO v_auction_status, v_reserve_price, v_winning_bid, v_winning_custID
     FROM auction_item ai
     JOIN auction a ON ai.auctionID = a.auctionID
     WHERE ai.itemID = p_itemID;
 
     -- Only proceed if the auction has 'Ended'
     IF v_auction_status = 'Ended' THEN
-        -- Find the highest bid and the bidder
-        SELECT amount, custID
-        INTO v_winning_bid, v_winning_custID
-        FROM bid
-        WHERE itemID = p_itemID
-        ORDER BY amount DESC
-        LIMIT 1;
-
+        DELETE FROM proxy_bid WHERE itemID = p_itemID;
         -- Check if any bids were placed
         IF v_winning_bid IS NOT NULL THEN
             -- Check if the highest bid met the reserve price
@@ -329,7 +586,7 @@ BEGIN
                 SET status = 'Sold',
                     winnerID = v_winning_custID -- Store the winner!
                 WHERE itemID = p_itemID;
-                
+
                 SELECT CONCAT('Item ', p_itemID, ' sold to ', v_winning_custID, ' for ', v_winning_bid) AS Result;
             ELSE
                 SELECT CONCAT('Item ', p_itemID, ' not sold. Reserve price of ', v_reserve_price, ' not met.') AS Result;
@@ -344,6 +601,56 @@ END$$
 DELIMITER ;
 
 
+-- PROCEDURE: sp_finalize_auction
+-- Purpose: Finalizes every item of an auction at once. Items whose leading bid meets the reserve
+-- price are marked 'Sold' to the leading bidder in one set-based UPDATE, then one row per item is
+-- returned as a summary. Runs in the caller's transaction. Drops the items' proxy bids.
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction(
+    IN p_auctionID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    CALL sp_update_auction_status(p_auctionID);
+
+    SELECT status INTO v_auction_status
+    FROM auction
+    WHERE auctionID = p_auctionID;
+
+    IF v_auction_status = 'Ended' THEN
+        UPDATE auction_item
+        SET status = 'Sold',
+            winnerID = leading_custID
+        WHERE auctionID = p_auctionID
+          AND status = 'Listed'
+          AND leading_custID IS NOT NULL
+          AND current_price >= reserve_price;
+
+        DELETE pb FROM proxy_bid pb
+        JOIN auction_item ai ON pb.itemID = ai.itemID
+        WHERE ai.auctionID = p_auctionID;
+
+        SELECT CONCAT('Auction ', p_auctionID, ' finalized.') AS Result;
+
+        SELECT itemID, title, status, winnerID, current_price AS winning_bid,
+               reserve_price, bid_count,
+               CASE
+                   WHEN status = 'Sold' THEN 'sold'
+                   WHEN current_price IS NULL THEN 'no_bids'
+                   WHEN current_price < reserve_price THEN 'reserve_not_met'
+                   ELSE 'not_sold'
+               END AS outcome
+        FROM auction_item
+        WHERE auctionID = p_auctionID
+        ORDER BY itemID;
+    ELSE
+        SELECT CONCAT('Cannot finalize auction. Auction status is: ', IFNULL(v_auction_status, 'not found')) AS Result;
+    END IF;
+END$$
+DELIMITER ;
+
+
 -- FUNCTION: get_current_price
 -- Purpose: Returns the current highest bid for an item, or its start price if no bids exist.
 DELIMITER $$
@@ -353,19 +660,11 @@ CREATE FUNCTION get_current_price(
 RETURNS INT
 READS SQL DATA
 BEGIN
-    DECLARE v_max_bid INT;
-    DECLARE v_start_price INT;
+    DECLARE v_price INT;
 
-    -- Get the highest bid
-    SELECT MAX(amount) INTO v_max_bid FROM bid WHERE itemID = p_itemID;
-
-    -- If no bids, get the start price
-    IF v_max_bid IS NULL THEN
-        SELECT start_price INTO v_start_price FROM auction_item WHERE itemID = p_itemID;
-        RETURN v_start_price;
-    ELSE
-        RETURN v_max_bid;
-    END IF;
+    -- Highest bid kept on the item row by sp_place_bid, or the start price if no bids exist
+    SELECT IFNULL(current_price, start_price) INTO v_price FROM auction_item WHERE itemID = p_itemID;
+    RETURN v_price;
 END$$
 
 DELIMITER ;
@@ -463,12 +762,15 @@ GRANT SELECT ON auction.auction TO 'auction_user_role';
 GRANT SELECT ON auction.category TO 'auction_user_role';
 GRANT SELECT ON auction.customer TO 'auction_user_role';
 GRANT SELECT ON auction.bid TO 'auction_user_role';
+GRANT SELECT ON auction.proxy_bid TO 'auction_user_role';
 GRANT INSERT ON auction.customer TO 'auction_user_role'; 
 GRANT UPDATE (phone, address, password) ON auction.customer TO 'auction_user_role'; 
 GRANT INSERT ON auction.payment TO 'auction_user_role'; 
 GRANT UPDATE (transactionID) ON auction.auction_item TO 'auction_user_role'; 
 GRANT EXECUTE ON FUNCTION auction.get_current_price TO 'auction_user_role';
 GRANT EXECUTE ON PROCEDURE auction.sp_place_bid TO 'auction_user_role';
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid_autocommit TO 'auction_user_role';
+GRANT EXECUTE ON PROCEDURE auction.sp_set_proxy_bid TO 'auction_user_role';
 
 
 
@@ -0,0 +1,361 @@
+"""
+ASGI entry point: the same API as server.py, with the hot paths served by async handlers.
+
+    uvicorn asgi:app --port 5000        (or: python asgi.py)
+
+- GET /items/<id>, POST /bid and the two SSE streams run on the event loop and
+  await an aiomysql pool, so a waiting request holds neither a thread nor a
+  connection. Open SSE streams cost one coroutine each instead of one thread.
+- Every other route is the Flask app itself, run through a WSGI adapter on a
+  small thread pool, so the JSON contracts cannot drift between the two modes.
+- Caches, ETag versions, the event broker and session tokens are shared with the Flask app in
+  this process: a bid accepted on either side reaches every stream.
+
+POST /bid stays on the Flask side when BID_ENGINE=1 (the engine is thread-based).
+Queries on the async pool are plain text; aiomysql has no server-side prepared statements.
+
+Needs: pip install starlette uvicorn aiomysql a2wsgi
+"""
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+import aiomysql
+import mysql.connector
+import pymysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import metrics
+import server
+from auth import FORBIDDEN, LOGIN_REQUIRED, claims_from_header
+from db_connector import USER_CONNECT_ARGS
+from events import (SSE_HEADERS, SSE_MIMETYPE, SSE_PREAMBLE, auction_topic, format_sse, item_topic,
+                    lifecycle_topic, next_wait, sse_step)
+from statements import HOT_QUERIES
+
+ER_SIGNAL_EXCEPTION = 1644  # SIGNAL SQLSTATE '45000' from the bid triggers/procedures
+
+flask_app = server.create_app()
+
+POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '20'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+WSGI_THREADS = int(os.getenv('WSGI_THREADS', '16'))
+SSE_HEARTBEAT = 15.0
+
+db_pool = None
+
+
+class JSONResponse(Response):
+    """Rendered by the Flask app's JSON provider, so bodies match jsonify() byte for byte."""
+    media_type = 'application/json'
+
+    def render(self, content):
+        provider = flask_app.json
+        if provider.compact is False or (provider.compact is None and flask_app.debug):
+            body = provider.dumps(content, indent=2)
+        else:
+            body = provider.dumps(content, separators=(',', ':'))
+        return f"{body}\n".encode()
+
+
+@contextlib.asynccontextmanager
+async def connection():
+    """An autocommit connection from the async pool. Raises asyncio.TimeoutError if none comes free in time."""
+    started = time.perf_counter()
+    conn = await asyncio.wait_for(db_pool.acquire(), POOL_TIMEOUT)
+    metrics.pool_wait.observe(time.perf_counter() - started, 'async_pool')
+    try:
+        yield conn
+    finally:
+        db_pool.release(conn)
+
+
+async def execute(cursor, name, query, params):
+    """cursor.execute(), timed and counted in the same metrics as the Flask side's queries."""
+    started = time.perf_counter()
+    try:
+        await cursor.execute(query, params)
+    except pymysql.MySQLError as e:
+        # pymysql drops the SQLSTATE; SIGNAL is the one the bid path cares about.
+        metrics.query_errors.inc(name, '45000' if e.args and e.args[0] == ER_SIGNAL_EXCEPTION else 'none')
+        raise
+    finally:
+        metrics.query_latency.observe(time.perf_counter() - started, name)
+
+
+async def fetch_all(conn, query, params):
+    name = metrics.query_name(query, sys._getframe(1))
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        await execute(cursor, name, query, params)
+        rows = await cursor.fetchall()
+    metrics.query_rows.inc(name, amount=len(rows))
+    return rows
+
+
+async def fetch_one(conn, query, params):
+    rows = await fetch_all(conn, query, params)
+    return rows[0] if rows else None
+
+
+async def auction_window(itemID):
+    """server.auction_windows.get(), loading a miss over the async pool."""
+    window = server.auction_windows.lookup(itemID)
+    if window is not None:
+        return window
+    async with connection() as conn:
+        row = await fetch_one(conn, HOT_QUERIES['auction_window'], (itemID,))
+    return server.auction_windows.store(itemID, row)
+
+
+async def attach_current_prices(conn, rows, field='current_price'):
+    """server.attach_current_prices(), loading misses over the async pool."""
+    prices, missing = server.price_cache.lookup_many([row['itemID'] for row in rows])
+    if missing:
+        loaded = await fetch_all(conn, f"""
+            SELECT itemID, IFNULL(current_price, start_price) AS current_price
+            FROM auction_item
+            WHERE itemID IN ({', '.join(['%s'] * len(missing))});
+        """, tuple(missing))
+        prices.update(server.price_cache.store_loaded({row['itemID']: row['current_price'] for row in loaded}))
+    for row in rows:
+        row[field] = prices.get(row['itemID'])
+    return rows
+
+
+def database_error(e):
+    if isinstance(e, asyncio.TimeoutError):
+        return JSONResponse({"error": "Could not connect to database"}, 500)
+    return JSONResponse({"error": "Database error", "details": str(e)}, 500)
+
+
+async def get_item_by_id(request):
+    itemID = request.path_params['itemID']
+    etag = server.resource_versions.etag(('items',), f"{request.url.path}?{request.url.query}")
+    if server.resource_versions.not_modified_for(etag, request.headers.get('If-None-Match')):
+        return Response(status_code=304, headers={"ETag": f'W/"{etag}"'})
+    try:
+        async with connection() as conn:
+            item = await fetch_one(conn, HOT_QUERIES['item_by_id'], (itemID,))
+            if not item:
+                return JSONResponse({"error": "Item not found"}, 404)
+            await attach_current_prices(conn, [item])
+        return JSONResponse(item, 200, headers={"ETag": f'W/"{etag}"', "Vary": "Accept"})
+    except (pymysql.MySQLError, asyncio.TimeoutError) as e:
+        return database_error(e)
+
+
+async def call_place_bid(cursor, p_custID, p_itemID, p_amount):
+    """CALL sp_place_bid_autocommit, retried on deadlocks and lock wait timeouts like server.place_bid()."""
+    attempt = 0
+    while True:
+        try:
+            await execute(cursor, 'call.sp_place_bid_autocommit',
+                          "CALL sp_place_bid_autocommit(%s, %s, %s)", (p_custID, p_itemID, p_amount))
+            rows = await cursor.fetchall()
+            while await cursor.nextset():
+                await cursor.fetchall()
+            return rows
+        except pymysql.MySQLError as e:
+            delay = server.lock_retry_delay(e.args[0] if e.args else None, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def place_bid(request):
+    """Same contract as server.place_bid()."""
+    claims = claims_from_header(request.headers.get('Authorization'))
+    if claims is None:
+        return JSONResponse(LOGIN_REQUIRED, 401)
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'itemID' not in data or 'amount' not in data:
+        return JSONResponse({"error": "Missing data"}, 400)
+    if not isinstance(data['amount'], int):
+        return JSONResponse({"error": "Invalid data type. 'amount' must be an integer."}, 400)
+    if data.get('custID') is not None and data['custID'] != claims['sub']:
+        return JSONResponse(FORBIDDEN, 403)
+
+    p_custID, p_itemID, p_amount = claims['sub'], data['itemID'], data['amount']
+    try:
+        window = await auction_window(p_itemID)
+        rejected = server.precheck_bid(window, p_itemID, p_amount)
+        if rejected:
+            return JSONResponse(*rejected)
+
+        async with connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                rows = await call_place_bid(cursor, p_custID, p_itemID, p_amount)
+    except pymysql.MySQLError as e:
+        if e.args and e.args[0] == ER_SIGNAL_EXCEPTION:
+            if e.args[1] == server.ITEM_NOT_FOUND:
+                return JSONResponse({"error": "Item not found"}, 404)
+            return JSONResponse({"error": "Bid rejected", "details": e.args[1]}, 400)
+        return database_error(e)
+    except asyncio.TimeoutError as e:
+        return database_error(e)
+
+    result = server.record_bid_result(p_itemID, window[0], p_custID, rows[0] if rows else None)
+    response = JSONResponse({"message": "Bid placed successfully!", "result": result}, 201)
+    # Same read-your-writes cookie as server.stick_to_primary(), for the reads served by the Flask app.
+    response.set_cookie(server.STICKY_PRIMARY_COOKIE, f"{time.time() + server.STICKY_PRIMARY_SECONDS:.3f}",
+                        max_age=int(server.STICKY_PRIMARY_SECONDS) + 1, httponly=True, samesite='lax')
+    return response
+
+
+def subscribe(topics):
+    """Subscribes to the shared broker and returns (subscription, asyncio.Event set on every delivery)."""
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def on_event():
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:  # loop already closed (shutdown)
+            pass
+
+    return server.live_events.subscribe(topics, on_event=on_event), wake
+
+
+async def sse_events(subscription, wake, snapshot, ends_at, ended_data):
+    """Async twin of events.sse_response(): same events, same order, no thread parked per client."""
+    try:
+        yield SSE_PREAMBLE + format_sse('snapshot', snapshot)
+        while True:
+            timed_out = False
+            if not subscription.events and not subscription.closed:
+                try:
+                    await asyncio.wait_for(wake.wait(), next_wait(ends_at, SSE_HEARTBEAT))
+                except asyncio.TimeoutError:
+                    timed_out = True
+            wake.clear()
+            events, dropped = subscription.wait(0)
+            if not (events or dropped or timed_out or subscription.closed):
+                continue  # woken for an event an earlier pass already sent
+            chunks, done = sse_step(subscription, events, dropped, ends_at, ended_data)
+            yield ''.join(chunks)
+            if done:
+                return
+    finally:
+        subscription.close()
+
+
+def sse_stream(subscription, wake, snapshot, status, start_time, end_time):
+    ends_at, ended_data = server.auction_stream_end(snapshot['auction']['auctionID'], status, start_time, end_time)
+    return StreamingResponse(sse_events(subscription, wake, snapshot, ends_at, ended_data),
+                             media_type=SSE_MIMETYPE, headers=SSE_HEADERS)
+
+
+async def stream_item_events(request):
+    itemID = request.path_params['itemID']
+    try:
+        window = await auction_window(itemID)
+    except (pymysql.MySQLError, asyncio.TimeoutError) as e:
+        return database_error(e)
+    if not window:
+        return JSONResponse({"error": "Item not found"}, 404)
+
+    # Subscribe before reading the snapshot so no bid can fall in between.
+    subscription, wake = subscribe((item_topic(itemID), lifecycle_topic(window[0])))
+    try:
+        async with connection() as conn:
+            row = await fetch_one(conn, server.ITEM_STREAM_QUERY, (itemID,))
+            if row:
+                await attach_current_prices(conn, [row])
+    except (pymysql.MySQLError, asyncio.TimeoutError) as e:
+        subscription.close()
+        return database_error(e)
+    if not row:
+        subscription.close()
+        return JSONResponse({"error": "Item not found"}, 404)
+    return sse_stream(subscription, wake, server.item_stream_snapshot(row),
+                      row['auction_status'], row['start_time'], row['end_time'])
+
+
+async def stream_auction_events(request):
+    auctionID = request.path_params['auctionID']
+    subscription, wake = subscribe((auction_topic(auctionID), lifecycle_topic(auctionID)))
+    try:
+        async with connection() as conn:
+            auction = await fetch_one(
+                conn, "SELECT auctionID, auction_name, status, start_time, end_time FROM auction WHERE auctionID = %s",
+                (auctionID,)
+            )
+            if auction:
+                items = await fetch_all(
+                    conn, "SELECT itemID, title, status, bid_count FROM auction_item WHERE auctionID = %s ORDER BY itemID;",
+                    (auctionID,)
+                )
+                await attach_current_prices(conn, items)
+    except (pymysql.MySQLError, asyncio.TimeoutError) as e:
+        subscription.close()
+        return database_error(e)
+    if not auction:
+        subscription.close()
+        return JSONResponse({"error": "Auction not found"}, 404)
+
+    status, start_time, end_time = auction['status'], auction['start_time'], auction['end_time']
+    snapshot = {"auction": server.format_auction_times([auction])[0], "items": items}
+    return sse_stream(subscription, wake, snapshot, status, start_time, end_time)
+
+
+def timed(rule, handler):
+    """Records an async route in the request metrics under the Flask rule it stands in for."""
+    async def endpoint(request):
+        started = time.perf_counter()
+        response = await handler(request)
+        metrics.http_latency.observe(time.perf_counter() - started, rule, request.method)
+        metrics.http_requests.inc(rule, request.method, str(response.status_code))
+        return response
+    return endpoint
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global db_pool
+    db_pool = await aiomysql.create_pool(
+        host=USER_CONNECT_ARGS['host'], user=USER_CONNECT_ARGS['user'],
+        password=USER_CONNECT_ARGS['password'], db=USER_CONNECT_ARGS['database'],
+        minsize=1, maxsize=POOL_SIZE, autocommit=True,
+    )
+    try:
+        await asyncio.to_thread(server.warm_up)
+    except mysql.connector.Error as e:
+        print(f"Warm-up failed, GET /ready will retry it: {e}")
+    try:
+        yield
+    finally:
+        db_pool.close()
+        await db_pool.wait_closed()
+
+
+routes = [
+    Route('/items/{itemID}', timed('/items/<string:itemID>', get_item_by_id), methods=['GET']),
+    Route('/items/{itemID}/stream', timed('/items/<string:itemID>/stream', stream_item_events), methods=['GET']),
+    Route('/auctions/{auctionID}/stream', timed('/auctions/<string:auctionID>/stream', stream_auction_events),
+          methods=['GET']),
+]
+if not server.bid_engine:
+    routes.append(Route('/bid', timed('/bid', place_bid), methods=['POST']))
+# Everything else (and other methods on the paths above) is the Flask app.
+routes.append(Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)))
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, port=5000)
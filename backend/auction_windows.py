@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def effective_auction_status(status, start_time, end_time, now):
+    """
+    Applies the same transitions as sp_update_auction_status:
+    Scheduled -> Active once NOW() >= start_time, Active -> Ended once NOW() >= end_time.
+    """
+    if status == 'Scheduled' and start_time <= now:
+        status = 'Active'
+    if status == 'Active' and now >= end_time:
+        status = 'Ended'
+    return status
+
+
+class AuctionWindowCache:
+    """
+    In-process cache of item -> auction and auction -> (status, start_time, end_time).
+
+    Lets `POST /bid` reject bids outside an auction's window without touching
+    MySQL. Entries expire after `ttl` seconds; admin actions that change an
+    auction's status call `invalidate_auction` so the next bid re-reads it.
+    Both maps are evicted least-recently-used once `max_items` is reached.
+    """
+
+    def __init__(self, ttl=30.0, max_items=10000):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._item_auction = OrderedDict()  # itemID -> auctionID
+        self._windows = OrderedDict()       # auctionID -> (status, start_time, end_time, loaded_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_items:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, itemID, loader):
+        """
+        Returns (auctionID, status, start_time, end_time) for the item, or None if it has no auction.
+        `loader(itemID)` must return a dict with those keys (or None) straight from MySQL.
+        """
+        window = self.lookup(itemID)
+        if window is not None:
+            return window
+        return self.store(itemID, loader(itemID))
+
+    def lookup(self, itemID):
+        """The cached window, or None on a miss (for callers that load it themselves, e.g. asynchronously)."""
+        now = time.monotonic()
+        with self._lock:
+            auctionID = self._item_auction.get(itemID)
+            window = self._windows.get(auctionID) if auctionID else None
+            if window is not None and now - window[3] < self.ttl:
+                self._item_auction.move_to_end(itemID)
+                self._windows.move_to_end(auctionID)
+                self.hits += 1
+                return (auctionID,) + window[:3]
+            self.misses += 1
+            return None
+
+    def store(self, itemID, row):
+        """Caches a loaded row and returns it as (auctionID, status, start_time, end_time), or None."""
+        if row is None:
+            return None
+        with self._lock:
+            self._remember(self._item_auction, itemID, row['auctionID'])
+            self._remember(self._windows, row['auctionID'],
+                           (row['status'], row['start_time'], row['end_time'], time.monotonic()))
+        return row['auctionID'], row['status'], row['start_time'], row['end_time']
+
+    def invalidate_auction(self, auctionID=None):
+        with self._lock:
+            if auctionID is None:
+                self._windows.clear()
+            else:
+                self._windows.pop(auctionID, None)
+
+    def invalidate_item(self, itemID):
+        """Forgets the window of the auction the item belongs to."""
+        with self._lock:
+            auctionID = self._item_auction.get(itemID)
+            if auctionID:
+                self._windows.pop(auctionID, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._item_auction),
+                "auctions": len(self._windows),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
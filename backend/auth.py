@@ -0,0 +1,140 @@
+"""
+Customer sessions and password hashing.
+
+- POST /login returns a signed session token. Protected endpoints check it with
+  one HMAC: no database round trip and no server-side session table, so any
+  worker process that shares SESSION_SECRET can verify it.
+- Passwords are stored as salted PBKDF2-SHA256 hashes. hashlib releases the
+  GIL while hashing, so other request threads keep running meanwhile.
+- Passwords still stored in plain text (rows created before migration 006)
+  are accepted once and re-hashed at that login.
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from flask import g, jsonify, request
+
+HASH_ALGORITHM = 'pbkdf2_sha256'
+HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '200000'))
+SESSION_TTL = int(os.getenv('SESSION_TTL', str(12 * 3600)))
+
+_secret = os.getenv('SESSION_SECRET')
+if not _secret:
+    print("SESSION_SECRET is not set: using a random key, so sessions end when this process restarts.")
+    _secret = secrets.token_hex(32)
+SESSION_SECRET = _secret.encode()
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
+def hash_password(password):
+    """Returns 'pbkdf2_sha256$iterations$salt$hash' for storing in customer.password."""
+    salt = secrets.token_bytes(16)
+    digest = _pbkdf2(password, salt, HASH_ITERATIONS)
+    return f"{HASH_ALGORITHM}${HASH_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+
+
+def is_password_hash(stored):
+    return isinstance(stored, str) and stored.startswith(HASH_ALGORITHM + '$')
+
+
+# Compared against when the userID does not exist, so a miss takes as long as a wrong password.
+_DUMMY_HASH = f"{HASH_ALGORITHM}${HASH_ITERATIONS}${_b64(b'0' * 16)}${_b64(b'0' * 32)}"
+
+
+def verify_password(password, stored):
+    """
+    Returns (matches, needs_rehash). `stored` may be None (unknown user), a hash
+    from hash_password(), or a legacy plain-text password.
+    """
+    if not is_password_hash(stored):
+        if stored is None:
+            verify_password(password, _DUMMY_HASH)
+            return False, False
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    try:
+        _, iterations, salt, expected = stored.split('$')
+        iterations = int(iterations)
+        salt, expected = _unb64(salt), _unb64(expected)
+    except ValueError:
+        return False, False
+    digest = _pbkdf2(password, salt, iterations)
+    return hmac.compare_digest(digest, expected), iterations != HASH_ITERATIONS
+
+
+def _sign(payload):
+    return _b64(hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(userID, name):
+    claims = {"sub": userID, "name": name, "exp": int(time.time()) + SESSION_TTL}
+    payload = _b64(json.dumps(claims, separators=(',', ':')).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token):
+    """Returns the token's claims, or None if it is malformed, tampered with or expired."""
+    try:
+        payload, signature = token.split('.')
+    except (AttributeError, ValueError):
+        return None
+    # compare_digest only takes ASCII str, so compare bytes: a forged token may contain anything.
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        return None
+    try:
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        return None
+    if claims.get('exp', 0) < time.time():
+        return None
+    return claims
+
+
+LOGIN_REQUIRED = {"error": "Login required",
+                  "details": "Send the token from POST /login as 'Authorization: Bearer <token>'."}
+FORBIDDEN = {"error": "Forbidden", "details": "You can only act as the customer you are logged in as."}
+
+
+def claims_from_header(header):
+    """Verifies an 'Authorization: Bearer <token>' header value. Returns the claims or None."""
+    if not header or not header.startswith('Bearer '):
+        return None
+    return verify_token(header[7:])
+
+
+def require_session(view):
+    """
+    Rejects the request with 401 unless it carries 'Authorization: Bearer <token>'.
+    The logged-in customer's userID is available to the view as g.custID.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        claims = claims_from_header(request.headers.get('Authorization'))
+        if claims is None:
+            return jsonify(LOGIN_REQUIRED), 401
+        g.custID = claims['sub']
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def session_mismatch(custID):
+    """403 response when a request names a customer other than the logged-in one, else None."""
+    if custID is not None and custID != g.custID:
+        return jsonify(FORBIDDEN), 403
+    return None
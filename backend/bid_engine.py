@@ -0,0 +1,545 @@
+"""
+Optional in-memory bidding engine (enable with BID_ENGINE=1).
+
+- Every item's best bid lives in memory in exactly one shard. A shard is a
+  single thread that owns its items, so per-item decisions need no locks.
+  Shard threads never query MySQL: the request thread loads a missing item
+  or auction window and submits again.
+- Accepted bids are appended to a local journal. The journal is fsync'd in
+  groups, and a bid is only acknowledged once its record is durable.
+- A write-behind flusher copies accepted bids into the `bid` table in batches
+  and keeps the auction_item bid summary columns in step.
+- On start-up, unflushed journal records are replayed into MySQL. Item state
+  is then loaded lazily from MySQL, which is authoritative again at that point.
+
+While the engine is on it must be the only writer of bids (run a single
+backend process), otherwise its in-memory best bids go stale.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+import mysql.connector
+
+from db_connector import get_admin_connection, get_user_connection
+from auction_windows import effective_auction_status
+
+MSG_NOT_ACTIVE = 'Bidding is not allowed. The auction is not active.'
+MSG_TOO_LOW = 'Your bid is too low. It must be higher than the current highest bid or the start price.'
+MSG_NOT_FOUND = 'Item or auction not found'
+MSG_NOT_DURABLE = 'The bid could not be confirmed as saved. Check the item before bidding again.'
+
+
+class BidDecision:
+    __slots__ = ('status', 'message', 'bidID', 'amount', 'previous_leader', 'seq', 'auctionID')
+
+    def __init__(self, status, message, bidID=None, amount=None, previous_leader=None, seq=None, auctionID=None):
+        self.status = status
+        self.message = message
+        self.bidID = bidID
+        self.amount = amount
+        self.previous_leader = previous_leader
+        self.seq = seq
+        self.auctionID = auctionID
+
+    @property
+    def accepted(self):
+        return self.status == 'accepted'
+
+
+class ItemBook:
+    """Best bid for one item, owned by a single shard."""
+    __slots__ = ('itemID', 'auctionID', 'start_price', 'current_price', 'leader', 'bid_count')
+
+    def __init__(self, itemID, auctionID, start_price, current_price, leader, bid_count):
+        self.itemID = itemID
+        self.auctionID = auctionID
+        self.start_price = start_price
+        self.current_price = current_price
+        self.leader = leader
+        self.bid_count = bid_count
+
+
+class Journal:
+    """Append-only JSON-lines journal with group commit."""
+
+    def __init__(self, path, fsync_interval=0.002):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._written = threading.Condition(self._lock)
+        self._file = None
+        self._seq = 0
+        self._synced_seq = 0
+        self._pending = []  # accepted bid records not yet flushed to MySQL, in seq order
+        self._stopped = False
+        self._thread = None
+
+    def read_unflushed(self):
+        """Returns bid records written after the last 'flushed' marker of a previous run."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn write at the tail of the file
+                if record.get('type') == 'bid':
+                    records.append(record)
+                elif record.get('type') == 'flushed':
+                    records = [r for r in records if r['seq'] > record['seq']]
+        return records
+
+    def open(self):
+        # Any previous run has been replayed by now, so start a fresh file.
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._thread = threading.Thread(target=self._sync_loop, name='bid-journal-fsync', daemon=True)
+        self._thread.start()
+
+    def append_bid(self, record):
+        """Writes an accepted bid and queues it for write-behind. Returns its sequence number."""
+        with self._lock:
+            self._seq += 1
+            record['seq'] = self._seq
+            record['type'] = 'bid'
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._pending.append(record)
+            self._written.notify()
+            return self._seq
+
+    def wait_durable(self, seq, timeout=5.0):
+        """True once record `seq` is fsync'd; False on timeout or if the journal stopped before that."""
+        with self._synced:
+            self._synced.wait_for(lambda: self._synced_seq >= seq or self._stopped, timeout)
+            return self._synced_seq >= seq
+
+    def peek_pending(self, limit):
+        with self._lock:
+            return self._pending[:limit]
+
+    def mark_flushed(self, records):
+        """Drops flushed records from the pending list and records the watermark."""
+        if not records:
+            return
+        with self._lock:
+            del self._pending[:len(records)]
+            self._file.write(json.dumps({'type': 'flushed', 'seq': records[-1]['seq']}) + '\n')
+            if not self._pending and self._file.tell() > 64 * 1024 * 1024:
+                # Everything is in MySQL, so the history is no longer needed.
+                self._file.seek(0)
+                self._file.truncate()
+
+    def pending_for(self, itemID):
+        """Accepted bids on one item that are not in MySQL yet."""
+        with self._lock:
+            return [r for r in self._pending if r['itemID'] == itemID]
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _sync_loop(self):
+        while True:
+            with self._written:
+                self._written.wait_for(lambda: self._seq > self._synced_seq or self._stopped)
+                if self._stopped:
+                    return
+            # Let concurrent bids pile up so one fsync covers the whole group.
+            time.sleep(self.fsync_interval)
+            with self._lock:
+                target = self._seq
+                self._file.flush()
+                fd = self._file.fileno()
+            os.fsync(fd)
+            with self._synced:
+                self._synced_seq = max(self._synced_seq, target)
+                self._synced.notify_all()
+
+    def close(self):
+        with self._synced:
+            self._stopped = True
+            if self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._synced_seq = self._seq
+            self._synced.notify_all()
+            self._written.notify_all()
+
+
+class _Shard(threading.Thread):
+    def __init__(self, engine, index):
+        super().__init__(name=f'bid-engine-shard-{index}', daemon=True)
+        self.engine = engine
+        self.inbox = queue.Queue()
+        self.books = {}
+
+    def run(self):
+        while True:
+            op, args, reply = self.inbox.get()
+            if op == 'stop':
+                reply.put(None)
+                return
+            try:
+                result = op(self, *args)
+            except Exception as e:
+                result = e
+            if reply is not None:
+                reply.put(result)
+
+    def call(self, op, *args):
+        reply = queue.Queue(maxsize=1)
+        self.inbox.put((op, args, reply))
+        result = reply.get()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def post(self, op, *args):
+        """Queues an op without waiting for it."""
+        self.inbox.put((op, args, None))
+
+
+# Returned by _place, as (what, key), when it needs data that is not in memory yet. The caller reads
+# it from MySQL on its own thread and submits again, so shard threads never wait on a query.
+_LOAD_BOOK = 'load_book'
+_LOAD_WINDOW = 'load_window'
+
+
+def _place(shard, custID, itemID, amount, loaded_book=None):
+    engine = shard.engine
+    book = shard.books.get(itemID)
+    if book is None:
+        if loaded_book is None:
+            return _LOAD_BOOK, itemID
+        book = shard.books[itemID] = loaded_book
+
+    found, window = engine._cached_window(book.auctionID)
+    if not found:
+        return _LOAD_WINDOW, book.auctionID
+    if window is None:
+        return BidDecision('auction_closed', MSG_NOT_ACTIVE)
+    now = datetime.now()
+    if effective_auction_status(*window, now) != 'Active':
+        return BidDecision('auction_closed', MSG_NOT_ACTIVE)
+    if amount <= (book.current_price if book.current_price is not None else book.start_price):
+        return BidDecision('too_low', MSG_TOO_LOW)
+
+    bidID = str(uuid.uuid4())
+    previous_leader = book.leader
+    seq = engine.journal.append_bid({
+        'bidID': bidID, 'custID': custID, 'itemID': itemID, 'amount': amount,
+        'auctionID': book.auctionID, 'bid_time': now.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    book.current_price = amount
+    book.leader = custID
+    book.bid_count += 1
+    return BidDecision('accepted', 'Bid placed successfully.', bidID, amount, previous_leader, seq, book.auctionID)
+
+
+def _evict(shard, itemID):
+    shard.books.pop(itemID, None)
+
+
+class BidEngine:
+    def __init__(self, journal_path, shards=4, flush_interval=0.2, flush_batch=1000, fsync_interval=0.002,
+                 cache_size=10000, window_ttl=30.0, on_bid_dropped=None):
+        self.journal = Journal(journal_path, fsync_interval)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._shards = [_Shard(self, i) for i in range(shards)]
+        # Bounded LRU caches: auctionID -> ((status, start_time, end_time) or None, loaded_at), custID -> None
+        self.cache_size = cache_size
+        self.window_ttl = window_ttl
+        self._windows = OrderedDict()
+        self._customers = OrderedDict()
+        # Called with the itemID when the flusher had to drop one of its accepted bids.
+        self.on_bid_dropped = on_bid_dropped
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='bid-engine-flusher', daemon=True)
+        self.flushed_bids = 0
+        self.flush_errors = 0
+
+    # --- lifecycle ---
+
+    def start(self):
+        leftover = self.journal.read_unflushed()
+        if leftover:
+            print(f"Bid engine: replaying {len(leftover)} unflushed bids from {self.journal.path}")
+            self._flush(self._drop_already_flushed(leftover))
+        self.journal.open()
+        for shard in self._shards:
+            shard.start()
+        self._flusher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._flusher.join()
+        for shard in self._shards:
+            shard.call('stop')
+        self._flush_pending()
+        self.journal.close()
+
+    # --- public API ---
+
+    def submit(self, custID, itemID, amount):
+        """
+        Validates and records a bid. Blocks until an accepted bid is durable in the journal. If it
+        is not durable in time, the decision is 'unavailable': the bid may still reach MySQL.
+        """
+        if not self._customer_exists(custID):
+            return BidDecision('rejected', f'Customer {custID} does not exist.')
+        shard = self._shards[zlib.crc32(itemID.encode()) % len(self._shards)]
+        book = None
+        while True:
+            decision = shard.call(_place, custID, itemID, amount, book)
+            if not isinstance(decision, tuple):
+                break
+            what, key = decision
+            if what == _LOAD_BOOK:
+                book = self._load_book(key)
+                if book is None:
+                    return BidDecision('not_found', MSG_NOT_FOUND)
+            else:
+                self._load_window(key)
+        if decision.accepted and not self.journal.wait_durable(decision.seq):
+            return BidDecision('unavailable', MSG_NOT_DURABLE, decision.bidID, amount, seq=decision.seq,
+                               auctionID=decision.auctionID)
+        return decision
+
+    def invalidate_auction(self, auctionID=None):
+        """Forgets cached auction windows so the next bid re-reads status and times."""
+        with self._lock:
+            if auctionID is None:
+                self._windows.clear()
+            else:
+                self._windows.pop(auctionID, None)
+
+    def stats(self):
+        return {
+            "shards": len(self._shards),
+            "items_in_memory": sum(len(s.books) for s in self._shards),
+            "pending_flush": self.journal.pending_count(),
+            "flushed_bids": self.flushed_bids,
+            "flush_errors": self.flush_errors,
+            "cached_auctions": len(self._windows),
+            "cached_customers": len(self._customers),
+        }
+
+    # --- MySQL reads (called from request threads, never from shard threads) ---
+
+    def _load_book(self, itemID):
+        conn = get_user_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT itemID, auctionID, start_price, current_price, leading_custID, bid_count "
+                "FROM auction_item WHERE itemID = %s", (itemID,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if row is None:
+            return None
+        book = ItemBook(row['itemID'], row['auctionID'], row['start_price'],
+                        row['current_price'], row['leading_custID'], row['bid_count'])
+        # A reloaded item (after _forget_items) may have accepted bids still waiting for the flusher.
+        for record in self.journal.pending_for(itemID):
+            if book.current_price is None or record['amount'] > book.current_price:
+                book.current_price, book.leader = record['amount'], record['custID']
+        return book
+
+    def _cached_window(self, auctionID):
+        """(True, window or None) if the auction's window is known, (False, None) if it must be loaded."""
+        if auctionID is None:
+            return True, None
+        with self._lock:
+            entry = self._windows.get(auctionID)
+            if entry is None or time.monotonic() - entry[1] >= self.window_ttl:
+                return False, None
+            self._windows.move_to_end(auctionID)
+            return True, entry[0]
+
+    def _load_window(self, auctionID):
+        """Reads the auction's window into the cache; None is cached for an auction that does not exist."""
+        if auctionID is None:
+            return
+        conn = get_user_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT status, start_time, end_time FROM auction WHERE auctionID = %s", (auctionID,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        window = (row['status'], row['start_time'], row['end_time']) if row else None
+        with self._lock:
+            self._remember(self._windows, auctionID, (window, time.monotonic()))
+
+    def _remember(self, cache, key, value):
+        """Stores into one of the LRU caches (caller holds self._lock), evicting the oldest entries."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _customer_exists(self, custID):
+        with self._lock:
+            if custID in self._customers:
+                self._customers.move_to_end(custID)
+                return True
+        conn = get_user_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM customer WHERE userID = %s", (custID,))
+            found = cursor.fetchone() is not None
+        finally:
+            cursor.close()
+            conn.close()
+        if found:
+            with self._lock:
+                self._remember(self._customers, custID, None)
+        return found
+
+    # --- write-behind ---
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush_pending()
+
+    def _flush_pending(self):
+        while True:
+            records = self.journal.peek_pending(self.flush_batch)
+            if not records:
+                return
+            try:
+                dropped = self._flush(records)
+            except mysql.connector.Error as e:
+                self.flush_errors += 1
+                print(f"Bid engine flush failed, will retry: {e}")
+                return
+            self.journal.mark_flushed(records)
+            self.flushed_bids += len(records) - len(dropped)
+            self._forget_items({r['itemID'] for r in dropped})
+
+    def _forget_items(self, item_ids):
+        """
+        After bids on these items were dropped by the flusher, their in-memory books no longer match
+        MySQL. Evict them, so the next bid reloads the item (MySQL plus the bids still pending).
+        """
+        for itemID in item_ids:
+            self._shards[zlib.crc32(itemID.encode()) % len(self._shards)].post(_evict, itemID)
+            if self.on_bid_dropped:
+                self.on_bid_dropped(itemID)
+
+    def _drop_already_flushed(self, records):
+        """Used on recovery: a crash between COMMIT and the 'flushed' marker must not double-insert."""
+        conn = get_admin_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = conn.cursor()
+        existing = set()
+        try:
+            for i in range(0, len(records), 1000):
+                chunk = [r['bidID'] for r in records[i:i + 1000]]
+                cursor.execute(
+                    f"SELECT bidID FROM bid WHERE bidID IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk)
+                )
+                existing.update(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.close()
+        return [r for r in records if r['bidID'] not in existing]
+
+    def _flush(self, records):
+        """Writes one batch of accepted bids in a single transaction. Returns the records it had to drop."""
+        dropped = []
+        if not records:
+            return dropped
+        conn = get_admin_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = conn.cursor()
+        try:
+            # These bids were validated by the engine; before_bid_insert skips them for this session.
+            cursor.execute("SET @trusted_bid_writer = 1")
+            rows = [(r['bidID'], r['custID'], r['itemID'], r['amount'], r['bid_time']) for r in records]
+            insert_sql = "INSERT INTO bid (bidID, custID, itemID, amount, bid_time) VALUES (%s, %s, %s, %s, %s)"
+            try:
+                cursor.executemany(insert_sql, rows)
+            except mysql.connector.IntegrityError:
+                # Isolate the offending rows (e.g. a customer deleted since the bid was accepted).
+                conn.rollback()
+                cursor.execute("SET @trusted_bid_writer = 1")
+                kept = []
+                for row, record in zip(rows, records):
+                    try:
+                        cursor.execute(insert_sql, row)
+                        kept.append(record)
+                    except mysql.connector.IntegrityError as e:
+                        print(f"Bid engine dropped bid {row[0]}: {e}")
+                        dropped.append(record)
+                records = kept
+
+            summary = {}
+            for r in records:
+                s = summary.setdefault(r['itemID'], [0, 0, None])
+                s[0] += 1
+                if r['amount'] > s[1]:
+                    s[1], s[2] = r['amount'], r['custID']
+            for itemID, (count, best, leader) in summary.items():
+                cursor.execute("""
+                    UPDATE auction_item
+                    SET bid_count = bid_count + %s,
+                        leading_custID = IF(current_price IS NULL OR %s > current_price, %s, leading_custID),
+                        current_price = IF(current_price IS NULL OR %s > current_price, %s, current_price)
+                    WHERE itemID = %s
+                """, (count, best, leader, best, best, itemID))
+            # Persist the Scheduled -> Active transition the trigger would have made.
+            for auctionID in {r.get('auctionID') for r in records if r.get('auctionID')}:
+                cursor.callproc('sp_update_auction_status', (auctionID,))
+            conn.commit()
+            return dropped
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                cursor.execute("SET @trusted_bid_writer = NULL")
+            except mysql.connector.Error:
+                conn.discard()  # never hand a trusted session back to the pool
+            cursor.close()
+            conn.close()
+
+
+def engine_from_env(on_bid_dropped=None):
+    """Builds and starts the engine when BID_ENGINE=1, otherwise returns None."""
+    if os.getenv('BID_ENGINE', '0') != '1':
+        return None
+    return BidEngine(
+        journal_path=os.getenv('BID_ENGINE_JOURNAL', os.path.join(os.path.dirname(__file__), 'bid_journal.log')),
+        shards=int(os.getenv('BID_ENGINE_SHARDS', '4')),
+        flush_interval=float(os.getenv('BID_ENGINE_FLUSH_INTERVAL', '0.2')),
+        flush_batch=int(os.getenv('BID_ENGINE_FLUSH_BATCH', '1000')),
+        cache_size=int(os.getenv('BID_ENGINE_CACHE_SIZE', '10000')),
+        window_ttl=float(os.getenv('BID_ENGINE_WINDOW_TTL', '30')),
+        on_bid_dropped=on_bid_dropped,
+    ).start()
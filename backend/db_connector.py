@@ -1,12 +1,16 @@
 import mysql.connector
-from mysql.connector import pooling
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
 DB_HOST = 'localhost'
-DB_PASSWORD_ROOT = os.getenv('DB_PASSWORD') 
+DB_PASSWORD_ROOT = os.getenv('DB_PASSWORD')
 DB_NAME = 'auction'
 
 USER_CREDENTIALS = {
@@ -19,54 +23,542 @@ ADMIN_CREDENTIALS = {
     "password": "123"
 }
 
-try:
-    user_pool = mysql.connector.pooling.MySQLConnectionPool(
-        pool_name="auction_user_pool",
-        pool_size=5,
-        pool_reset_session=True,
-        host=DB_HOST,
-        database=DB_NAME,
-        user=USER_CREDENTIALS["user"],
-        password=USER_CREDENTIALS["password"]
+USER_CONNECT_ARGS = dict(host=DB_HOST, database=DB_NAME, **USER_CREDENTIALS)
+ADMIN_CONNECT_ARGS = dict(host=DB_HOST, database=DB_NAME, **ADMIN_CREDENTIALS)
+
+# Read replicas, e.g. "10.0.0.2,10.0.0.3:3307". Empty: every read goes to the primary.
+REPLICA_HOSTS = [h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+
+
+class PoolTimeout(mysql.connector.errors.PoolError):
+    """No connection came free within the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    A checked-out connection. Behaves like the underlying MySQL connection, except
+    that close() hands it back to its pool. Call discard() before close() if the
+    session was left in a state the next user must not inherit.
+    """
+    __slots__ = ('_cnx', '_pool', '_created', '_discard')
+
+    def __init__(self, pool, cnx, created):
+        object.__setattr__(self, '_cnx', cnx)
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_created', created)
+        object.__setattr__(self, '_discard', False)
+
+    def __getattr__(self, name):
+        cnx = object.__getattribute__(self, '_cnx')
+        if cnx is None:
+            raise mysql.connector.errors.OperationalError(msg="Connection was already returned to the pool")
+        return getattr(cnx, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cnx, name, value)
+
+    def cursor(self, *args, **kwargs):
+        """A cursor whose statements are timed and counted for GET /metrics."""
+        return metrics.InstrumentedCursor(self._cnx.cursor(*args, **kwargs))
+
+    @property
+    def statements(self):
+        """Prepared cursors cached for this physical connection, by name (see statements.py)."""
+        return self._pool._statements.setdefault(self._cnx, {})
+
+    def reset_session(self, *args, **kwargs):
+        # The server deallocates prepared statements on reset, so forget the cached ones.
+        self._pool._statements.pop(self._cnx, None)
+        return self._cnx.reset_session(*args, **kwargs)
+
+    def cmd_reset_connection(self):
+        self._pool._statements.pop(self._cnx, None)
+        return self._cnx.cmd_reset_connection()
+
+    def discard(self):
+        object.__setattr__(self, '_discard', True)
+
+    def close(self):
+        cnx = self._cnx
+        if cnx is None:
+            return
+        object.__setattr__(self, '_cnx', None)
+        self._pool._checkin(cnx, self._created, self._discard)
+
+
+class ConnectionPool:
+    """
+    Thread-safe MySQL connection pool.
+
+    - At most `size` connections are open. They are opened on demand, and a
+      checkout waits up to `checkout_timeout` seconds for one to come free.
+    - Checkouts do not ping or reset the session. On return, an open
+      transaction is rolled back and any unread result is drained.
+    - A background thread pings connections that have sat idle for
+      `health_interval` seconds. It closes those that fail, and those older
+      than `max_age` seconds, which are also recycled when they are returned.
+    - stats() reports open / in-use / idle counts, wait times and timeouts.
+    """
+
+    def __init__(self, name, size, connect_args, checkout_timeout=5.0, max_age=1800.0, health_interval=30.0):
+        self.name = name
+        self.size = size
+        self.connect_args = connect_args
+        self.checkout_timeout = checkout_timeout
+        self.max_age = max_age
+        self.health_interval = health_interval
+        self._idle = deque()  # (cnx, created_at, returned_at); most recently returned on the right
+        self._statements = {}  # cnx -> {name: prepared cursor}, dropped when cnx is closed
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_errors = 0
+        self.recycled = 0
+        self.discarded = 0
+        self.health_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        if health_interval:
+            threading.Thread(target=self._health_loop, name=f'{name}-health', daemon=True).start()
+
+    def get_connection(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    cnx, created, _ = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    cnx, created = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(msg=f"No free connection in pool '{self.name}' after {timeout:g}s")
+                self._waiting += 1
+                self._cond.wait(remaining)
+                self._waiting -= 1
+            self._in_use += 1
+
+        if cnx is not None and self.max_age and time.monotonic() - created >= self.max_age:
+            self._close_quietly(cnx)
+            with self._cond:
+                self.recycled += 1
+            cnx = None
+        if cnx is None:
+            try:
+                cnx, created = self._connect(), time.monotonic()
+            except mysql.connector.Error:
+                with self._cond:
+                    self._open -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+        waited = time.monotonic() - started
+        metrics.pool_wait.observe(waited, self.name)
+        with self._cond:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return PooledConnection(self, cnx, created)
+
+    def warm(self, count):
+        """Opens connections until at least `count` are idle (bounded by the pool size)."""
+        while True:
+            with self._cond:
+                if len(self._idle) >= count or self._open >= self.size:
+                    return
+                self._open += 1
+            try:
+                cnx = self._connect()
+            except mysql.connector.Error:
+                with self._cond:
+                    self._open -= 1
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.appendleft((cnx, now, now))
+                self._cond.notify()
+
+    def close(self):
+        """Stops the health checker and closes idle connections. Checked-out ones close when returned."""
+        self._stop.set()
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self.size = 0
+        for cnx, _, _ in idle:
+            self._close_quietly(cnx)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(1000 * self.wait_seconds_total / self.checkouts, 3) if self.checkouts else None,
+                "wait_ms_max": round(1000 * self.wait_seconds_max, 3),
+                "connects": self.connects,
+                "connect_errors": self.connect_errors,
+                "recycled": self.recycled,
+                "discarded": self.discarded,
+                "health_check_failures": self.health_failures,
+            }
+
+    # --- internals ---
+
+    def _connect(self):
+        try:
+            cnx = mysql.connector.connect(**self.connect_args)
+        except mysql.connector.Error:
+            with self._cond:
+                self.connect_errors += 1
+            raise
+        with self._cond:
+            self.connects += 1
+        return cnx
+
+    def _close_quietly(self, cnx):
+        self._statements.pop(cnx, None)
+        try:
+            cnx.close()
+        except mysql.connector.Error:
+            pass
+
+    def _checkin(self, cnx, created, discard):
+        if not discard:
+            try:
+                if cnx.unread_result:
+                    cnx.consume_results()
+                if cnx.in_transaction:
+                    cnx.rollback()
+            except mysql.connector.Error:
+                discard = True
+        recycle = not discard and self.max_age and time.monotonic() - created >= self.max_age
+        if discard or recycle:
+            self._close_quietly(cnx)
+        with self._cond:
+            self._in_use -= 1
+            if discard or recycle or self._open > self.size:
+                self._open -= 1
+                if discard:
+                    self.discarded += 1
+                else:
+                    self.recycled += 1
+            else:
+                self._idle.append((cnx, created, time.monotonic()))
+            self._cond.notify()
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_idle()
+
+    def check_idle(self):
+        """Pings connections idle for at least health_interval and drops dead or expired ones."""
+        now = time.monotonic()
+        with self._cond:
+            stale = [e for e in self._idle if now - e[2] >= self.health_interval or (self.max_age and now - e[1] >= self.max_age)]
+            for entry in stale:
+                self._idle.remove(entry)
+        for entry in stale:
+            cnx, created, _ = entry
+            expired = self.max_age and now - created >= self.max_age
+            alive = False
+            if not expired:
+                try:
+                    cnx.ping(reconnect=False)
+                    alive = True
+                except mysql.connector.Error:
+                    pass
+            if not alive:
+                self._close_quietly(cnx)
+            with self._cond:
+                if alive:
+                    self._idle.appendleft((cnx, created, time.monotonic()))
+                else:
+                    self._open -= 1
+                    if expired:
+                        self.recycled += 1
+                    else:
+                        self.health_failures += 1
+                self._cond.notify()
+
+
+class Replica:
+    """One read replica: its connection pool plus the replication lag last measured on it."""
+
+    def __init__(self, host, port, pool):
+        self.host = host
+        self.port = port
+        self.pool = pool
+        self.lag = None        # seconds behind the primary, None if unknown
+        self.healthy = False   # replication running and lag measured
+        self.error = None
+        self.checked_at = None
+
+
+class ReplicaSet:
+    """
+    Routes reads to replicas that are in sync, falling back to the primary.
+
+    A background thread measures every replica's lag with SHOW REPLICA STATUS
+    every `check_interval` seconds, on a dedicated connection using the monitor
+    account (it needs the REPLICATION CLIENT privilege). A replica is used only
+    while replication is running and its lag is at most `max_lag` seconds.
+    Until the first check has passed, reads go to the primary.
+    """
+
+    def __init__(self, replicas, max_lag=2.0, check_interval=2.0, monitor_credentials=None):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.monitor_credentials = monitor_credentials or ADMIN_CREDENTIALS
+        self._monitors = {}  # Replica -> monitor connection
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.routed = {"replica": 0, "primary_sticky": 0, "primary_fallback": 0}
+        threading.Thread(target=self._monitor_loop, name='replica-lag', daemon=True).start()
+
+    def pick(self):
+        """A replica that is in sync right now, round-robin among them, or None."""
+        with self._lock:
+            usable = [r for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag]
+            if not usable:
+                return None
+            self._next += 1
+            return usable[self._next % len(usable)]
+
+    def count(self, route):
+        with self._lock:
+            self.routed[route] += 1
+
+    def check(self, replica):
+        """Measures one replica's lag and updates its health."""
+        try:
+            cnx = self._monitors.get(replica)
+            if cnx is None:
+                cnx = self._monitors[replica] = mysql.connector.connect(
+                    host=replica.host, port=replica.port, **self.monitor_credentials)
+            cursor = cnx.cursor(dictionary=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except mysql.connector.Error as e:
+                    if e.errno != 1064:  # MySQL before 8.0.22 only knows the old name
+                        raise
+                    cursor.execute("SHOW SLAVE STATUS")
+                row = cursor.fetchone()
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            if row is None:
+                lag, error = None, "not configured as a replica"
+            else:
+                lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+                error = None if lag is not None else "replication is not running"
+        except mysql.connector.Error as e:
+            cnx = self._monitors.pop(replica, None)
+            if cnx is not None:
+                try:
+                    cnx.close()
+                except mysql.connector.Error:
+                    pass
+            lag, error = None, str(e)
+        with self._lock:
+            replica.lag = lag
+            replica.healthy = error is None
+            replica.error = error
+            replica.checked_at = time.time()
+
+    def _monitor_loop(self):
+        while not self._stop.is_set():
+            for replica in self.replicas:
+                self.check(replica)
+            self._stop.wait(self.check_interval)
+
+    def close(self):
+        self._stop.set()
+        for replica in self.replicas:
+            replica.pool.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_lag_seconds": self.max_lag,
+                "routed": dict(self.routed),
+                "replicas": [{
+                    "host": f"{r.host}:{r.port}",
+                    "healthy": r.healthy,
+                    "lag_seconds": r.lag,
+                    "error": r.error,
+                    "pool": r.pool.stats(),
+                } for r in self.replicas],
+            }
+
+
+def _pool_from_env(name, prefix, default_size, connect_args):
+    return ConnectionPool(
+        name,
+        size=int(os.getenv(f'{prefix}_POOL_SIZE', str(default_size))),
+        connect_args=connect_args,
+        checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        max_age=float(os.getenv('DB_POOL_MAX_AGE', '1800')),
+        health_interval=float(os.getenv('DB_POOL_HEALTH_INTERVAL', '30')),
     )
-    print("Database connection pool 'user_pool' created successfully.")
-
-    admin_pool = mysql.connector.pooling.MySQLConnectionPool(
-        pool_name="auction_admin_pool",
-        pool_size=2,
-        pool_reset_session=True,
-        host=DB_HOST,
-        database=DB_NAME,
-        user=ADMIN_CREDENTIALS["user"],
-        password=ADMIN_CREDENTIALS["password"]
+
+
+POOL_SETTINGS = {
+    # kind: (pool name, env prefix for <prefix>_POOL_SIZE, default size, connect args)
+    'user': ("auction_user_pool", 'DB_USER', 5, USER_CONNECT_ARGS),
+    'admin': ("auction_admin_pool", 'DB_ADMIN', 2, ADMIN_CONNECT_ARGS),
+}
+
+_pools = {}  # kind -> ConnectionPool, plus 'replicas' -> ReplicaSet
+_pools_pid = None
+_pools_lock = threading.Lock()
+# Pools inherited from the parent process across a fork. Their sockets belong to the parent,
+# so the child must neither use nor close them; keeping a reference stops GC from doing either.
+_inherited_pools = []
+
+
+def _replicas_from_env():
+    replicas = []
+    for i, entry in enumerate(REPLICA_HOSTS):
+        host, _, port = entry.partition(':')
+        port = int(port or 3306)
+        args = dict(host=host, port=port, database=DB_NAME, **USER_CREDENTIALS)
+        replicas.append(Replica(host, port, _pool_from_env(f"auction_replica_pool_{i}", 'DB_REPLICA', 5, args)))
+    return ReplicaSet(
+        replicas,
+        max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', '2')),
+        check_interval=float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '2')),
+        monitor_credentials=dict(user=os.getenv('DB_REPLICA_MONITOR_USER', ADMIN_CREDENTIALS['user']),
+                                 password=os.getenv('DB_REPLICA_MONITOR_PASSWORD', ADMIN_CREDENTIALS['password'])),
     )
-    print("Database connection pool 'admin_pool' created successfully.")
 
-except mysql.connector.Error as e:
-    print(f"Error creating connection pools: {e}")
-    exit(1)
 
+def get_pool(kind):
+    """
+    This process's 'user' or 'admin' pool, or its 'replicas' ReplicaSet (None
+    without DB_REPLICA_HOSTS). Pools are created on first use and open
+    connections on demand, so importing this module never touches MySQL, and every
+    forked worker builds its own pools instead of sharing the parent's sockets.
+    """
+    global _pools_pid
+    pid = os.getpid()
+    with _pools_lock:
+        if _pools_pid != pid:
+            _inherited_pools.extend(_pools.values())
+            _pools.clear()
+            _pools_pid = pid
+        pool = _pools.get(kind)
+        if pool is None:
+            if kind == 'replicas':
+                pool = _pools[kind] = _replicas_from_env() if REPLICA_HOSTS else None
+            else:
+                name, prefix, default_size, connect_args = POOL_SETTINGS[kind]
+                pool = _pools[kind] = _pool_from_env(name, prefix, default_size, connect_args)
+        return pool
+
+
+def warm_pools(user=1, admin=1):
+    """Opens connections ahead of traffic. Raises mysql.connector.Error if MySQL cannot be reached."""
+    get_pool('user').warm(user)
+    get_pool('admin').warm(admin)
 
-def get_user_connection():
-    """Gets a connection from the limited 'auction_user' pool."""
+
+def get_user_connection(timeout=None):
+    """Gets a connection from the limited 'auction_user' pool, or None if none came free in time."""
     try:
-        conn = user_pool.get_connection()
-        if conn.is_connected():
-            return conn
-        else:
-            return None
+        return get_pool('user').get_connection(timeout)
     except mysql.connector.Error as e:
         print(f"Error getting USER connection: {e}")
         return None
 
-def get_admin_connection():
-    """Gets a connection from the powerful 'auction_admin' pool."""
+def get_admin_connection(timeout=None):
+    """Gets a connection from the powerful 'auction_admin' pool, or None if none came free in time."""
     try:
-        conn = admin_pool.get_connection()
-        if conn.is_connected():
-            return conn
-        else:
-            return None
+        return get_pool('admin').get_connection(timeout)
     except mysql.connector.Error as e:
         print(f"Error getting ADMIN connection: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def get_read_connection(timeout=None, prefer_primary=False):
+    """
+    Connection for read-only work: from a replica that is in sync, else from the
+    'auction_user' pool on the primary. `prefer_primary` skips the replicas, for a
+    client that must see its own recent write. Returns None like get_user_connection.
+    """
+    replicas = get_pool('replicas')
+    if replicas is None:
+        return get_user_connection(timeout)
+    if prefer_primary:
+        replicas.count('primary_sticky')
+        return get_user_connection(timeout)
+    replica = replicas.pick()
+    if replica is not None:
+        try:
+            conn = replica.pool.get_connection(timeout)
+            replicas.count('replica')
+            return conn
+        except mysql.connector.Error as e:
+            print(f"Error getting REPLICA connection from {replica.host}:{replica.port}: {e}")
+    replicas.count('primary_fallback')
+    return get_user_connection(timeout)
+
+def pool_stats():
+    stats = {kind: get_pool(kind).stats() for kind in POOL_SETTINGS}
+    replicas = get_pool('replicas')
+    if replicas is not None:
+        stats["replicas"] = replicas.stats()
+    return stats
+
+def _open_pools():
+    """The ConnectionPools this process has created so far, replica pools included."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    found = []
+    for pool in pools:
+        if isinstance(pool, ReplicaSet):
+            found.extend(replica.pool for replica in pool.replicas)
+        elif pool is not None:
+            found.append(pool)
+    return found
+
+def _pool_gauges():
+    values = {}
+    for pool in _open_pools():
+        stats = pool.stats()
+        for state in ('in_use', 'idle', 'waiting'):
+            values[(pool.name, state)] = stats[state]
+    return values
+
+def _pool_counters():
+    values = {}
+    for pool in _open_pools():
+        stats = pool.stats()
+        for event in ('checkouts', 'timeouts', 'connects', 'connect_errors', 'recycled', 'discarded'):
+            values[(pool.name, event)] = stats[event]
+    return values
+
+metrics.register(metrics.Collected('db_pool_connections', 'Pool connections by state.', ('pool', 'state'), _pool_gauges))
+metrics.register(metrics.Collected('db_pool_events_total', 'Pool checkouts, timeouts, connects and recycles.',
+                                   ('pool', 'event'), _pool_counters, kind='counter'))
+
+def connect_admin():
+    """Opens a dedicated (non-pooled) admin connection for long-lived background work."""
+    return mysql.connector.connect(**ADMIN_CONNECT_ARGS)
@@ -0,0 +1,200 @@
+"""
+In-process publish/subscribe for live auction events, served as Server-Sent Events.
+
+`POST /bid` (and the batch/engine paths) publish `new_high_bid` and `outbid`,
+admin actions and the lifecycle scheduler publish `auction_ended`. Publishing is
+a dict lookup plus an append to each subscriber's bounded queue, so there is no
+thread per subscriber on the publishing side and a slow client can never block
+a bid. A subscriber that falls `max_queue` events behind loses the oldest ones
+and is sent a `resync` event so it can re-read the current state.
+
+Events only reach subscribers connected to the same backend process.
+Under WSGI (server.py) every open stream still parks one request thread in
+Subscription.wait; only asgi.py serves streams without a thread per client.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from flask import Response
+
+SSE_MIMETYPE = 'text/event-stream'
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_PREAMBLE = 'retry: 3000\n'
+
+
+def item_topic(itemID):
+    return f"item:{itemID}"
+
+
+def auction_topic(auctionID):
+    """Bid events for every item of the auction."""
+    return f"auction:{auctionID}"
+
+
+def lifecycle_topic(auctionID):
+    """Status changes of the auction itself (seen by item and auction streams alike)."""
+    return f"lifecycle:{auctionID}"
+
+
+class Subscription:
+    __slots__ = ('broker', 'topics', 'events', 'dropped', 'closed', 'on_event', '_cond')
+
+    def __init__(self, broker, topics, max_queue, on_event=None):
+        self.broker = broker
+        self.topics = topics
+        self.events = deque(maxlen=max_queue)  # (id, event, data)
+        self.dropped = 0
+        self.closed = False
+        self.on_event = on_event  # extra wake-up hook, e.g. to set an asyncio.Event from any thread
+        self._cond = threading.Condition(threading.Lock())
+
+    def _deliver(self, event):
+        with self._cond:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._cond.notify()
+        if self.on_event:
+            self.on_event()
+
+    def wait(self, timeout):
+        """
+        Returns (events, dropped) queued since the last call, waiting up to `timeout`
+        seconds for the first one. Both are empty/0 on timeout.
+        """
+        with self._cond:
+            if not self.events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+            dropped, self.dropped = self.dropped, 0
+            return events, dropped
+
+    def close(self):
+        self.broker._unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+        if self.on_event:
+            self.on_event()
+
+
+class EventBroker:
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._topics = {}  # topic -> set of Subscription
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topics, on_event=None):
+        subscription = Subscription(self, tuple(topics), self.max_queue, on_event)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def publish(self, topics, event, data):
+        """Queues `event` for everyone subscribed to any of `topics` (each subscriber gets it once)."""
+        with self._lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self._topics.get(topic, ()))
+            if not targets:
+                return 0
+            message = (next(self._ids), event, data)
+            self.published += 1
+            self.delivered += len(targets)
+        for subscription in targets:
+            subscription._deliver(message)
+        return len(targets)
+
+    def stats(self):
+        with self._lock:
+            subscriptions = set()
+            for subscribers in self._topics.values():
+                subscriptions.update(subscribers)
+            return {
+                "subscribers": len(subscriptions),
+                "topics": len(self._topics),
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_step(subscription, events, dropped, ends_at=None, ended_data=None):
+    """
+    Turns one wait() result into SSE text. Returns (chunks, done): `done` once
+    `auction_ended` was sent (or the subscription closed), and a keepalive or
+    the synthetic `auction_ended` when nothing arrived.
+    """
+    chunks = []
+    if dropped:
+        chunks.append(format_sse('resync', {"dropped": dropped}))
+    for event_id, event, data in events:
+        chunks.append(format_sse(event, data, event_id))
+        if event == 'auction_ended':
+            return chunks, True
+    if subscription.closed:
+        return chunks, True
+    if not events:
+        if ends_at is not None and time.time() >= ends_at:
+            chunks.append(format_sse('auction_ended', ended_data or {}))
+            return chunks, True
+        chunks.append(': keepalive\n\n')
+    return chunks, False
+
+
+def next_wait(ends_at, heartbeat):
+    """Seconds to wait for the next event: the heartbeat, or less if the auction closes sooner."""
+    if ends_at is None:
+        return heartbeat
+    return max(0.0, min(heartbeat, ends_at - time.time()))
+
+
+def sse_response(subscription, snapshot, ends_at=None, ended_data=None, heartbeat=15.0):
+    """
+    Streams `subscription` as text/event-stream.
+
+    - The first event is `snapshot` (the state when the client connected).
+    - `: keepalive` comments go out every `heartbeat` seconds so proxies keep the connection open.
+    - If `ends_at` (a time.time() timestamp) passes before any `auction_ended` event
+      arrives, the stream emits one itself carrying `ended_data`.
+    - The stream closes after `auction_ended`.
+    No database connection is held while the client is connected.
+    """
+    def generate():
+        yield SSE_PREAMBLE + format_sse('snapshot', snapshot)
+        while True:
+            events, dropped = subscription.wait(next_wait(ends_at, heartbeat))
+            chunks, done = sse_step(subscription, events, dropped, ends_at, ended_data)
+            yield ''.join(chunks)
+            if done:
+                return
+
+    response = Response(generate(), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+    # Unsubscribe when the server closes the response, even if the body was never iterated (HEAD).
+    response.call_on_close(subscription.close)
+    return response
@@ -0,0 +1,51 @@
+"""
+JSON encoding through orjson, when it is installed (`pip install orjson`).
+
+FastJSONProvider replaces Flask's DefaultJSONProvider and keeps its output: sorted keys,
+compact separators, dates as HTTP dates, Decimal and UUID as strings, dataclasses as
+objects. The encoding runs in C and jsonify() writes the bytes straight into the
+response, without the intermediate str. Two differences: non-ASCII text is sent as
+UTF-8 instead of \\u escapes, and NDJSON lines have no spaces after separators.
+Indented output (debug mode) still goes through the standard library.
+
+JSON_PROVIDER=default keeps Flask's provider. So does a missing orjson.
+"""
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    @property
+    def _option(self):
+        # Dates go through self.default, so they are formatted like Flask's provider does.
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        return option | orjson.OPT_SORT_KEYS if self.sort_keys else option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent'):
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=self._option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def json_provider_from_env(app):
+    if orjson is None or os.getenv('JSON_PROVIDER', 'orjson') == 'default':
+        return DefaultJSONProvider(app)
+    return FastJSONProvider(app)
@@ -0,0 +1,44 @@
+"""
+Pre-fork runner for the Flask backend:
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+- WEB_CONCURRENCY worker processes (default: one per CPU), each with GUNICORN_THREADS
+  request threads (default 8). Workers are forked before the app is imported, so each
+  one builds its own app, connection pools and caches.
+- Each worker's user pool (and each replica pool) defaults to one connection per
+  request thread (DB_USER_POOL_SIZE / DB_REPLICA_POOL_SIZE override it). MySQL then sees up to
+  WEB_CONCURRENCY x (DB_USER_POOL_SIZE + DB_ADMIN_POOL_SIZE) connections: keep that
+  under max_connections.
+- A worker warms its pools and caches (server.warm_up) before it accepts requests.
+  GET /ready reports the result and the worker's cold-start timings.
+
+For many long-lived SSE clients, use the ASGI entry point (asgi.py) instead: here each
+open stream holds a request thread.
+"""
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+preload_app = False
+
+os.environ.setdefault('DB_USER_POOL_SIZE', str(threads))
+os.environ.setdefault('DB_REPLICA_POOL_SIZE', str(threads))
+
+if os.getenv('BID_ENGINE') == '1' and workers != 1:
+    raise RuntimeError("BID_ENGINE=1 keeps bids in one process's memory: run it with WEB_CONCURRENCY=1")
+
+
+def post_worker_init(worker):
+    import mysql.connector
+    import server
+    try:
+        server.warm_up()
+        worker.log.info("Worker %s ready after %s ms (warm-up %s ms)",
+                        worker.pid, server.startup["ready_ms"], server.startup["warm_ms"])
+    except mysql.connector.Error as e:
+        # Serve anyway; GET /ready keeps answering 503 and retries the warm-up.
+        worker.log.warning("Worker %s warm-up failed: %s", worker.pid, e)
@@ -0,0 +1,256 @@
+"""
+Request, query and connection-pool metrics in the Prometheus text format (GET /metrics).
+
+- Every Flask route: a latency histogram and a request counter labelled by route
+  rule, method and status. For streamed responses (NDJSON, SSE) the latency is the
+  time until the response starts.
+- Every cursor.execute / executemany / callproc on a pooled connection (see
+  db_connector.PooledConnection.cursor): a latency histogram, rows fetched, and errors
+  by SQLSTATE (45000 is a SIGNAL from a trigger or procedure, e.g. a rejected bid).
+- Pool checkout waits as a histogram, plus the pool counters at scrape time.
+
+Queries are labelled by name: the names registered with name_queries() (the prepared
+hot queries), `call.<procedure>` for procedures, else `<calling function>.<verb>`
+such as `get_all_items.select`. So label values stay few, whatever the parameters.
+
+Recording is a lock, a bisect and two additions, cheap enough to leave on. The
+numbers are per process: behind a pre-fork server, each scrape sees one worker.
+"""
+import bisect
+import sys
+import threading
+import time
+
+from flask import request
+
+import mysql.connector
+
+import profiling
+
+# Seconds. Query buckets start lower than request buckets: most lookups are sub-millisecond.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Collected:
+    """Values read at scrape time: `collect()` returns {label values: value}."""
+
+    def __init__(self, name, help, labels, collect, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+                  for key, value in sorted(self.collect().items())]
+        return lines
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+http_requests = register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status.', ('endpoint', 'method', 'status')))
+http_latency = register(Histogram(
+    'http_request_duration_seconds', 'Time to build the HTTP response.', ('endpoint', 'method')))
+query_latency = register(Histogram(
+    'db_query_duration_seconds', 'Time for cursor.execute/executemany/callproc to return.', ('query',), QUERY_BUCKETS))
+query_rows = register(Counter('db_query_rows_total', 'Rows fetched from query results.', ('query',)))
+query_errors = register(Counter(
+    'db_query_errors_total', 'Failed statements by SQLSTATE ("none" for client-side errors).', ('query', 'sqlstate')))
+pool_wait = register(Histogram(
+    'db_pool_wait_seconds', 'Time to check a connection out of a pool (including connecting).', ('pool',), QUERY_BUCKETS))
+
+
+def render():
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+# --- queries ---
+
+_query_names = {}
+# Helpers that run queries on behalf of their caller (streaming.stream_query, asgi.fetch_one):
+# the caller names the query.
+_PASS_THROUGH = {'stream_query', 'fetch_one'}
+
+
+def name_queries(names):
+    """Registers {sql text: query name} for statements that are run verbatim."""
+    _query_names.update({sql: name for sql, name in names.items()})
+
+
+def query_name(operation, frame):
+    name = _query_names.get(operation)
+    if name is not None:
+        return name
+    if isinstance(operation, bytes):
+        operation = operation.decode(errors='replace')
+    words = operation.split(None, 2)
+    verb = words[0].lower() if words else ''
+    if verb == 'call' and len(words) > 1:
+        return 'call.' + words[1].split('(', 1)[0]
+    while frame.f_back is not None and frame.f_code.co_name in _PASS_THROUGH:
+        frame = frame.f_back
+    return f"{frame.f_code.co_name}.{verb}"
+
+
+def _record_error(query, error):
+    query_errors.inc(query, getattr(error, 'sqlstate', None) or 'none')
+
+
+class InstrumentedCursor:
+    """Wraps a MySQL cursor: times its statements and counts fetched rows and errors."""
+    __slots__ = ('_cursor', '_query')
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._query = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _timed(self, query, run, *args, **kwargs):
+        self._query = query
+        started = time.perf_counter()
+        try:
+            return run(*args, **kwargs)
+        except mysql.connector.Error as e:
+            _record_error(query, e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            query_latency.observe(elapsed, query)
+            profiling.statement_done(query, elapsed)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        query = query_name(operation, sys._getframe(1))
+        return self._timed(query, self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        query = query_name(operation, sys._getframe(1))
+        return self._timed(query, self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def callproc(self, procname, args=()):
+        return self._timed('call.' + procname, self._cursor.callproc, procname, args)
+
+    def _fetched(self, rows):
+        if self._query is not None:
+            query_rows.inc(self._query, amount=rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._fetched(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._fetched(len(rows))
+        return rows
+
+
+# --- routes ---
+
+def instrument_app(app):
+    """Times every request of `app`. Register before other after_request hooks so it runs last."""
+    @app.before_request
+    def start_timer():
+        request.environ['metrics.started'] = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        started = request.environ.get('metrics.started')
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            http_latency.observe(time.perf_counter() - started, endpoint, request.method)
+            http_requests.inc(endpoint, request.method, str(response.status_code))
+        return response
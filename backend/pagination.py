@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed `limit`, `after` or filter parameter."""
+
+
+def parse_limit(args, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    raw = args.get('limit')
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("'limit' must be an integer")
+    if limit < 1:
+        raise PaginationError("'limit' must be a positive integer")
+    if maximum is not None and limit > maximum:
+        raise PaginationError(f"'limit' must be between 1 and {maximum}")
+    return limit
+
+
+def parse_int_arg(args, name):
+    raw = args.get(name)
+    if raw is None or raw == '':
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise PaginationError(f"'{name}' must be an integer")
+
+
+def encode_cursor(values):
+    """Encodes the sort key of the last row as an opaque, URL-safe token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, kinds):
+    """
+    Decodes an `after` token back into its key values.
+    `kinds` lists the type of each key column: 'str', 'int' or 'datetime'.
+    Returns None when no token was given.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError
+        decoded = []
+        for value, kind in zip(values, kinds):
+            if kind == 'datetime':
+                decoded.append(datetime.fromisoformat(value))
+            elif kind == 'int':
+                decoded.append(int(value))
+            else:
+                decoded.append(str(value))
+        return decoded
+    except (ValueError, TypeError):
+        raise PaginationError("'after' is not a valid cursor")
+
+
+def make_page(rows, limit, key):
+    """
+    Trims a `LIMIT limit + 1` result to one page.
+    `key(row)` returns the sort key used to build `next_cursor`.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return {"data": rows, "next_cursor": encode_cursor(key(rows[-1]))}
+    return {"data": rows, "next_cursor": None}
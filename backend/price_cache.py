@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PriceCache:
+    """
+    Bounded in-process cache of current item prices, keyed by itemID.
+
+    - Entries are evicted least-recently-used once `max_items` is reached.
+    - `POST /bid` writes new prices through on commit (see `put`).
+    - Misses are loaded together through a single loader call, so a listing
+      costs at most one extra query instead of one function call per row.
+    - Entries older than `ttl` seconds are reloaded, which bounds how stale a
+      price can be when another worker process accepted the bid.
+    """
+
+    def __init__(self, max_items=10000, ttl=5.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries = OrderedDict()  # itemID -> (price, loaded_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _fresh(self, entry, now):
+        return self.ttl is None or now - entry[1] < self.ttl
+
+    def _store(self, itemID, price, now):
+        self._entries[itemID] = (price, now)
+        self._entries.move_to_end(itemID)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, item_ids, loader):
+        """
+        Returns {itemID: price} for every id in `item_ids`.
+        `loader(missing_ids)` must return {itemID: price} for the ids it knows.
+        """
+        found, missing = self.lookup_many(item_ids)
+        if missing:
+            found.update(self.store_loaded(loader(missing)))
+        return found
+
+    def lookup_many(self, item_ids):
+        """Returns ({itemID: price} for fresh entries, [ids to load]) without calling a loader."""
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for itemID in item_ids:
+                entry = self._entries.get(itemID)
+                if entry is not None and self._fresh(entry, now):
+                    self._entries.move_to_end(itemID)
+                    found[itemID] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(itemID)
+                    self.misses += 1
+        return found, list(dict.fromkeys(missing))
+
+    def store_loaded(self, loaded):
+        """Caches {itemID: price} read from MySQL and returns the prices to use."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for itemID, price in loaded.items():
+                current = self._entries.get(itemID)
+                # A bid written through while we were loading wins.
+                if current is not None and current[0] is not None and price is not None and current[0] > price:
+                    price = current[0]
+                self._store(itemID, price, now)
+                found[itemID] = price
+        return found
+
+    def get(self, itemID, loader):
+        return self.get_many([itemID], loader).get(itemID)
+
+    def peek(self, itemID):
+        """
+        Returns the cached price without loading or counting a lookup, or None.
+        Prices never go down, so even an expired entry is a safe lower bound.
+        """
+        with self._lock:
+            entry = self._entries.get(itemID)
+            return entry[0] if entry is not None else None
+
+    def put(self, itemID, price):
+        """Write-through after a committed bid. Prices only ever go up."""
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.get(itemID)
+            if current is not None and current[0] is not None and current[0] > price:
+                price = current[0]
+            self._store(itemID, price, now)
+
+    def invalidate(self, itemID=None):
+        with self._lock:
+            if itemID is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(itemID, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
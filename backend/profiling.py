@@ -0,0 +1,250 @@
+"""
+On-demand request profiling, for finding out where a slow request spends its time.
+
+Off unless PROFILING_TOKEN is set. A request is profiled when it carries
+`X-Profile: <token>` (or `?profile=<token>`), and, in sampled mode, every Nth
+request (PROFILE_SAMPLE_EVERY, or POST /profiles/sampling at runtime).
+
+A profiled request runs under cProfile. Its breakdown comes back in a Server-Timing
+header: Python CPU time of the request thread, DB wall time summed over its
+statements (timed by metrics.InstrumentedCursor), and total wall time. Each profile
+is also added to an aggregate:
+- GET /profiles: per-endpoint averages, DB time per statement and the functions
+  with the most own time.
+- GET /profiles/pstats: the aggregated profile as a pstats file, for snakeviz,
+  flameprof or gprof2dot.
+- GET /profiles/<id>/pstats: one recent request's profile (id from X-Profile-Id).
+
+Profiles are kept per process. Async routes in asgi.py are not profiled.
+Only one request per process is profiled at a time: since Python 3.12, cProfile is
+a single process-wide sys.monitoring tool, so a second one cannot be enabled. A
+request picked while another is being profiled runs unprofiled and is counted as
+`skipped`.
+"""
+import cProfile
+import functools
+import hmac
+import itertools
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import jsonify, request
+
+HEADER = 'X-Profile'
+QUERY_FLAG = 'profile'
+
+_local = threading.local()
+
+
+def statement_done(query, seconds):
+    """Called for every timed statement: adds it to the profile running on this thread, if any."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.statements.append((query, seconds))
+
+
+def label_request():
+    """before_request hook: names the running profile after the matched route, not the raw path."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None and request.url_rule is not None:
+        profile.endpoint = f"{request.method} {request.url_rule.rule}"
+
+
+class RequestProfile:
+    def __init__(self, endpoint, reason):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.reason = reason  # 'requested' or 'sampled'
+        self.statements = []  # (query name, seconds)
+        self.profiler = cProfile.Profile()
+        self.stats = None
+        self.running = False
+        self._cpu_started = self._wall_started = 0.0
+        self.cpu_seconds = self.wall_seconds = 0.0
+
+    def start(self):
+        _local.profile = self
+        self.running = True
+        self._cpu_started = time.thread_time()
+        self._wall_started = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.profiler.disable()
+        self.running = False
+        self.wall_seconds = time.perf_counter() - self._wall_started
+        self.cpu_seconds = time.thread_time() - self._cpu_started
+        _local.profile = None
+        self.stats = pstats.Stats(self.profiler)
+
+    @property
+    def db_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def server_timing(self):
+        return (f'cpu;dur={1000 * self.cpu_seconds:.2f};desc="Python CPU", '
+                f'db;dur={1000 * self.db_seconds:.2f};desc="DB wall, {len(self.statements)} statements", '
+                f'total;dur={1000 * self.wall_seconds:.2f}')
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "reason": self.reason,
+            "wall_ms": round(1000 * self.wall_seconds, 3),
+            "cpu_ms": round(1000 * self.cpu_seconds, 3),
+            "db_ms": round(1000 * self.db_seconds, 3),
+            "statements": [{"query": query, "ms": round(1000 * seconds, 3)} for query, seconds in self.statements],
+        }
+
+
+class Profiler:
+    def __init__(self, token=None, sample_every=0, keep=20):
+        self.token = token
+        self.sample_every = sample_every
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # held while a request is being profiled
+        self._recent = deque(maxlen=keep)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+            self._endpoints = {}   # endpoint -> [requests, wall, cpu, db, statements]
+            self._statements = {}  # query name -> [count, seconds]
+            self.requested = 0
+            self.sampled = 0
+            self.skipped = 0
+            self._recent.clear()
+
+    def authorized(self, value):
+        return bool(self.token) and bool(value) and hmac.compare_digest(value.encode(), self.token.encode())
+
+    def reason(self, environ):
+        """'requested', 'sampled' or None for a WSGI request."""
+        if not self.token or environ.get('PATH_INFO', '').startswith('/profiles'):
+            return None
+        flag = environ.get('HTTP_X_PROFILE')
+        if flag is None and f'{QUERY_FLAG}=' in environ.get('QUERY_STRING', ''):
+            flag = next((value for key, _, value in (pair.partition('=') for pair in environ['QUERY_STRING'].split('&'))
+                         if key == QUERY_FLAG), None)
+        if flag is not None and self.authorized(flag):
+            return 'requested'
+        every = self.sample_every
+        if every and next(self._counter) % every == 0:
+            return 'sampled'
+        return None
+
+    def wrap(self, wsgi_app):
+        """WSGI middleware that profiles the requests picked by reason()."""
+        @functools.wraps(wsgi_app)
+        def profiled_app(environ, start_response):
+            reason = self.reason(environ)
+            if reason is None:
+                return wsgi_app(environ, start_response)
+            if not self._active.acquire(blocking=False):
+                with self._lock:
+                    self.skipped += 1
+                return wsgi_app(environ, start_response)
+            profile = RequestProfile(f"{environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')}", reason)
+
+            def start_profiled_response(status, headers, exc_info=None):
+                # The response is built by now; streamed bodies are not part of the profile.
+                profile.stop()
+                headers = list(headers) + [('Server-Timing', profile.server_timing()), ('X-Profile-Id', profile.id)]
+                return start_response(status, headers, exc_info)
+
+            try:
+                profile.start()
+                try:
+                    return wsgi_app(environ, start_profiled_response)
+                finally:
+                    profile.stop()
+                    self.record(profile)
+            finally:
+                self._active.release()
+        return profiled_app
+
+    def record(self, profile):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats()
+            self._stats.add(profile.stats)
+            totals = self._endpoints.setdefault(profile.endpoint, [0, 0.0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += profile.wall_seconds
+            totals[2] += profile.cpu_seconds
+            totals[3] += profile.db_seconds
+            totals[4] += len(profile.statements)
+            for query, seconds in profile.statements:
+                entry = self._statements.setdefault(query, [0, 0.0])
+                entry[0] += 1
+                entry[1] += seconds
+            if profile.reason == 'requested':
+                self.requested += 1
+            else:
+                self.sampled += 1
+            self._recent.append(profile)
+
+    def summary(self, top=25):
+        with self._lock:
+            functions = []
+            if self._stats is not None:
+                ranked = sorted(self._stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+                functions = [{
+                    "function": pstats.func_std_string(func),
+                    "calls": calls,
+                    "own_ms": round(1000 * own, 3),
+                    "cumulative_ms": round(1000 * cumulative, 3),
+                } for func, (_, calls, own, cumulative, _) in ranked]
+            return {
+                "enabled": bool(self.token),
+                "sample_every": self.sample_every,
+                "requested": self.requested,
+                "sampled": self.sampled,
+                "skipped": self.skipped,
+                "endpoints": {endpoint: {
+                    "requests": n,
+                    "wall_ms_avg": round(1000 * wall / n, 3),
+                    "cpu_ms_avg": round(1000 * cpu / n, 3),
+                    "db_ms_avg": round(1000 * db / n, 3),
+                    "statements_avg": round(statements / n, 2),
+                } for endpoint, (n, wall, cpu, db, statements) in self._endpoints.items()},
+                "statements": {query: {"count": count, "total_ms": round(1000 * seconds, 3),
+                                       "avg_ms": round(1000 * seconds / count, 3)}
+                               for query, (count, seconds) in self._statements.items()},
+                "top_functions": functions,
+                "recent": [profile.summary() for profile in self._recent],
+            }
+
+    def pstats_bytes(self, profile_id=None):
+        """The aggregate (or one recent profile) in the file format pstats.Stats.dump_stats() writes, or None."""
+        with self._lock:
+            if profile_id is None:
+                stats = self._stats
+            else:
+                stats = next((p.stats for p in self._recent if p.id == profile_id), None)
+            return marshal.dumps(stats.stats) if stats is not None else None
+
+    def require_token(self, view):
+        """Admin endpoints: 404 while profiling is off, 403 without the X-Profile token."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.token:
+                return jsonify({"error": "Profiling is disabled", "details": "Set PROFILING_TOKEN to enable it."}), 404
+            if not self.authorized(request.headers.get(HEADER)):
+                return jsonify({"error": "Forbidden", "details": f"Send the profiling token as '{HEADER}: <token>'."}), 403
+            return view(*args, **kwargs)
+        return wrapper
+
+
+def profiler_from_env():
+    return Profiler(token=os.getenv('PROFILING_TOKEN'), sample_every=int(os.getenv('PROFILE_SAMPLE_EVERY', '0')))
@@ -0,0 +1,235 @@
+"""
+Background auction lifecycle scheduler (enable with AUCTION_SCHEDULER=1).
+
+Keeps a min-heap of upcoming start_time / end_time events loaded from `auction`
+and fires each one when it is due by calling sp_update_auction_status, the same
+procedure bids used to call. With AUCTION_AUTO_FINALIZE=1, an auction that has
+just ended is also settled with sp_finalize_auction.
+
+Only one process runs the schedule: the scheduler takes the MySQL named lock
+'auction_scheduler' on its own connection. Other worker processes wait and take
+over if the holder dies, because the lock goes with its connection. An auction
+created through another worker reaches the leader through MySQL: besides the
+full reload every `reload_interval`, the leader checks every `poll_interval`
+for Scheduled auctions starting before its next reload (an index range read).
+
+on_transition runs only in the leader process, so the other workers' caches of
+auction windows, prices and ETags stay stale until their own TTLs run out.
+Bids are safe meanwhile: the end_time precheck and before_bid_insert still
+reject bids after the end.
+"""
+import heapq
+import itertools
+import os
+import threading
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from db_connector import connect_admin
+
+LOCK_NAME = 'auction_scheduler'
+MAX_RETRIES = 5
+
+
+class AuctionScheduler:
+    def __init__(self, auto_finalize=False, reload_interval=30.0, poll_interval=1.0, on_transition=None):
+        self.auto_finalize = auto_finalize
+        self.reload_interval = reload_interval
+        self.poll_interval = poll_interval
+        self.on_transition = on_transition  # callback(auctionID, new_status)
+        self._heap = []  # (when, seq, auctionID, kind, attempt)
+        self._queued = set()  # (auctionID, kind, when) already on the heap
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._conn = None
+        self.is_leader = False
+        self.fired = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name='auction-scheduler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join()
+
+    def notify(self, auctionID, start_time, end_time):
+        """
+        Schedules a new or changed auction. Events that turn out stale are harmless no-ops.
+        Only the leader keeps a schedule; elsewhere the leader's next poll finds the auction.
+        """
+        with self._cond:
+            if not self.is_leader:
+                return
+            self._push(start_time, auctionID, 'start')
+            self._push(end_time, auctionID, 'end')
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            upcoming = self._heap[0] if self._heap else None
+            return {
+                "leader": self.is_leader,
+                "queued_events": len(self._heap),
+                "next_event": {"auctionID": upcoming[2], "kind": upcoming[3], "at": upcoming[0].isoformat()} if upcoming else None,
+                "fired": self.fired,
+                "errors": self.errors,
+            }
+
+    # --- internals (scheduler thread only, unless noted) ---
+
+    def _push(self, when, auctionID, kind, attempt=0):
+        """Caller holds self._cond."""
+        key = (auctionID, kind, when)
+        if when is None or key in self._queued:
+            return
+        self._queued.add(key)
+        heapq.heappush(self._heap, (when, next(self._seq), auctionID, kind, attempt))
+
+    def _run(self):
+        while not self._stopped():
+            try:
+                if not self.is_leader:
+                    self._try_lead()
+                if self.is_leader:
+                    self._load()
+                    self._dispatch_until(datetime.now() + timedelta(seconds=self.reload_interval))
+                    continue
+            except mysql.connector.Error as e:
+                self.errors += 1
+                print(f"Auction scheduler error: {e}")
+                self._drop_connection()
+            with self._cond:
+                self._cond.wait(self.reload_interval)
+
+    def _stopped(self):
+        with self._cond:
+            return self._stop
+
+    def _try_lead(self):
+        if self._conn is None:
+            self._conn = connect_admin()
+            self._conn.autocommit = True
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+            self.is_leader = cursor.fetchone()[0] == 1
+        finally:
+            cursor.close()
+
+    def _drop_connection(self):
+        self.is_leader = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except mysql.connector.Error:
+                pass
+        self._conn = None
+
+    def _load(self, starting_before=None):
+        """
+        (Re)reads every auction that still has a transition ahead of it, or with `starting_before`
+        only the Scheduled auctions that start by then (auctions created by other workers).
+        """
+        cursor = self._conn.cursor(dictionary=True)
+        try:
+            if starting_before is None:
+                cursor.execute(
+                    "SELECT auctionID, status, start_time, end_time FROM auction WHERE status IN ('Scheduled', 'Active')"
+                )
+            else:
+                cursor.execute(
+                    "SELECT auctionID, status, start_time, end_time FROM auction "
+                    "WHERE status = 'Scheduled' AND start_time <= %s", (starting_before,)
+                )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        now = datetime.now()
+        with self._cond:
+            for row in rows:
+                # Past its end_time, one sp_update_auction_status call starts and ends it: the end event does both.
+                if row['status'] == 'Scheduled' and row['end_time'] > now:
+                    self._push(row['start_time'], row['auctionID'], 'start')
+                self._push(row['end_time'], row['auctionID'], 'end')
+
+    def _dispatch_until(self, reload_at):
+        poll_at = datetime.now() + timedelta(seconds=self.poll_interval)
+        while True:
+            event = None
+            with self._cond:
+                while not self._stop:
+                    now = datetime.now()
+                    if self._heap and self._heap[0][0] <= now:
+                        when, _, auctionID, kind, attempt = heapq.heappop(self._heap)
+                        self._queued.discard((auctionID, kind, when))
+                        event = (auctionID, kind, attempt)
+                        break
+                    if now >= reload_at:
+                        return
+                    if now >= poll_at:
+                        break
+                    wake_at = min(self._heap[0][0], reload_at, poll_at) if self._heap else min(reload_at, poll_at)
+                    self._cond.wait((wake_at - now).total_seconds())
+                else:
+                    return
+            if event:
+                self._fire(*event)
+            else:
+                self._load(starting_before=reload_at)
+                poll_at = datetime.now() + timedelta(seconds=self.poll_interval)
+
+    def _fire(self, auctionID, kind, attempt):
+        cursor = self._conn.cursor(dictionary=True)
+        try:
+            # The status change and the finalization commit together, or not at all.
+            self._conn.start_transaction()
+            cursor.callproc('sp_update_auction_status', (auctionID,))
+            cursor.execute("SELECT status, start_time, end_time FROM auction WHERE auctionID = %s", (auctionID,))
+            row = cursor.fetchone()
+            expected = 'Active' if kind == 'start' else 'Ended'
+            transitioned = row is not None and (row['status'] == expected or (kind == 'start' and row['status'] == 'Ended'))
+            finalized = transitioned and row['status'] == 'Ended' and self.auto_finalize
+            if finalized:
+                cursor.callproc('sp_finalize_auction', (auctionID,))
+                for res in cursor.stored_results():
+                    res.fetchall()
+            self._conn.commit()
+        except mysql.connector.Error:
+            self._conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        if transitioned:
+            self.fired += 1
+            if self.on_transition:
+                self.on_transition(auctionID, row['status'])
+                if finalized:
+                    self.on_transition(auctionID, 'Finalized')
+        elif row is not None and row['status'] in ('Scheduled', 'Active') and attempt < MAX_RETRIES:
+            # MySQL's clock hasn't reached the boundary yet (clock skew or 1s NOW() resolution).
+            if row['status'] == 'Scheduled' and row['end_time'] <= datetime.now():
+                # Still Scheduled after its end: sp_update_auction_status predates migration 010
+                # and will never move it, so retrying only repeats the same transaction.
+                return
+            with self._cond:
+                self._push(datetime.now() + timedelta(seconds=1), auctionID, kind, attempt + 1)
+
+
+def scheduler_from_env(on_transition=None):
+    """Builds and starts the scheduler when AUCTION_SCHEDULER=1, otherwise returns None."""
+    if os.getenv('AUCTION_SCHEDULER', '0') != '1':
+        return None
+    return AuctionScheduler(
+        auto_finalize=os.getenv('AUCTION_AUTO_FINALIZE', '0') == '1',
+        reload_interval=float(os.getenv('AUCTION_SCHEDULER_RELOAD', '30')),
+        poll_interval=float(os.getenv('AUCTION_SCHEDULER_POLL', '1')),
+        on_transition=on_transition,
+    ).start()
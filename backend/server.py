@@ -1,12 +1,149 @@
-from flask import Flask, jsonify, request
+import time
+IMPORT_STARTED = time.monotonic()
+
+from flask import Blueprint, Flask, Response, after_this_request, g, jsonify, request
 from flask_cors import CORS
 import mysql.connector
-from db_connector import get_user_connection, get_admin_connection
+from db_connector import get_user_connection, get_admin_connection, get_read_connection, pool_stats, warm_pools
+from price_cache import PriceCache
+from pagination import PaginationError, parse_limit, parse_int_arg, decode_cursor, make_page
+from streaming import wants_ndjson, stream_query
+from bid_engine import engine_from_env
+from auction_windows import AuctionWindowCache, effective_auction_status
+from scheduler import scheduler_from_env
+from statements import run_hot_query_one
+from auth import hash_password, verify_password, issue_token, require_session, session_mismatch, SESSION_TTL
+from events import EventBroker, item_topic, auction_topic, lifecycle_topic, sse_response
+from http_cache import ResourceVersions, gzip_responses
+from fast_json import json_provider_from_env
+from rows import RowType, format_datetime_columns
+import metrics
+from profiling import label_request, profiler_from_env
+import os
+import random
+import threading
 import uuid
 from datetime import datetime
 
-app = Flask(__name__)
-CORS(app)
+# All routes live on this blueprint; create_app() builds the Flask app around it.
+api = Blueprint('api', __name__)
+
+price_cache = PriceCache(
+    max_items=int(os.getenv('PRICE_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('PRICE_CACHE_TTL', '5'))
+)
+
+auction_windows = AuctionWindowCache(
+    ttl=float(os.getenv('AUCTION_WINDOW_TTL', '30')),
+    max_items=int(os.getenv('AUCTION_WINDOW_CACHE_SIZE', '10000'))
+)
+
+# In-memory bidding engine, only when BID_ENGINE=1 (see bid_engine.py). Started by create_app().
+bid_engine = None
+
+# Versions behind the ETags of the read endpoints (see http_cache.py)
+resource_versions = ResourceVersions(('items', 'auctions'), ttl=float(os.getenv('ETAG_TTL', '5')))
+
+# Compact row classes for the list endpoints (see rows.py)
+ITEM_ROWS = RowType('ItemRow', extra=('current_price',))
+AUCTION_ROWS = RowType('AuctionRow')
+BID_ROWS = RowType('BidRow')
+
+AUCTION_TIME_FORMAT = "%a, %d %b %Y %H:%M:%S IST"
+
+# Live bid / auction events for the SSE endpoints (see events.py)
+live_events = EventBroker(max_queue=int(os.getenv('EVENT_QUEUE_SIZE', '256')))
+
+def on_auction_transition(auctionID, status):
+    """
+    Called by the lifecycle scheduler after it moves an auction to a new status. Runs only in
+    the process that holds the scheduler lock; other workers' caches catch up on their TTLs.
+    """
+    auction_windows.invalidate_auction(auctionID)
+    if bid_engine: bid_engine.invalidate_auction(auctionID)
+    resource_versions.bump('items', 'auctions')
+    if status == 'Ended':
+        publish_auction_ended(auctionID, status)
+
+def on_engine_bid_dropped(itemID):
+    """ Called by the bid engine's flusher when MySQL refused one of the item's accepted bids. """
+    price_cache.invalidate(itemID)
+    resource_versions.bump('items')
+
+# Admin-only request profiling, only when PROFILING_TOKEN is set (see profiling.py).
+profiler = profiler_from_env()
+
+# Auction lifecycle scheduler, only when AUCTION_SCHEDULER=1 (see scheduler.py). Started by create_app().
+auction_scheduler = None
+
+# Cold-start timings of this process, in ms since the module started importing (see GET /ready)
+startup = {"pid": os.getpid()}
+_warm_lock = threading.Lock()
+
+def create_app():
+    """
+    Builds the Flask app. Opens no database connection itself: pools connect on first
+    use, so a pre-fork server can import this module in the parent and call
+    create_app() in each worker. Background threads (bid engine, scheduler) start
+    here, once per process.
+    """
+    global bid_engine, auction_scheduler
+    app = Flask(__name__)
+    app.json = json_provider_from_env(app)
+    CORS(app)
+    app.register_blueprint(api)
+    # First, so that its after_request hook runs last and the timing includes compression.
+    metrics.instrument_app(app)
+    app.before_request(label_request)
+    app.wsgi_app = profiler.wrap(app.wsgi_app)
+    app.after_request(gzip_responses(min_size=int(os.getenv('GZIP_MIN_SIZE', '1024')),
+                                     level=int(os.getenv('GZIP_LEVEL', '5'))))
+    if bid_engine is None:
+        bid_engine = engine_from_env(on_bid_dropped=on_engine_bid_dropped)
+    if auction_scheduler is None:
+        auction_scheduler = scheduler_from_env(on_transition=on_auction_transition)
+    startup.setdefault("app_created_ms", elapsed_ms())
+    return app
+
+def elapsed_ms():
+    return round(1000 * (time.monotonic() - IMPORT_STARTED), 1)
+
+def warm_up():
+    """
+    Gets this worker ready for traffic: opens DB_POOL_WARM connections per pool and
+    loads the auction windows and prices of running auctions into the caches.
+    Runs once per process; raises mysql.connector.Error if MySQL is unreachable.
+    """
+    with _warm_lock:
+        if "ready_ms" in startup:
+            return
+        started = time.monotonic()
+        warm = int(os.getenv('DB_POOL_WARM', '2'))
+        warm_pools(user=warm, admin=1)
+        conn = get_user_connection()
+        if conn is None:
+            raise mysql.connector.Error(msg="Could not connect to database")
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT ai.itemID, a.auctionID, a.status, a.start_time, a.end_time,
+                       IFNULL(ai.current_price, ai.start_price) AS current_price
+                FROM auction_item ai
+                JOIN auction a ON ai.auctionID = a.auctionID
+                WHERE a.status IN ('Scheduled', 'Active')
+                LIMIT %s;
+            """, (price_cache.max_items,))
+            rows = cursor.fetchall()
+        finally:
+            if cursor: cursor.close()
+            conn.close()
+        for row in rows:
+            auction_windows.store(row['itemID'], row)
+        price_cache.store_loaded({row['itemID']: row['current_price'] for row in rows})
+        startup["warmed_items"] = len(rows)
+        startup["warm_ms"] = round(1000 * (time.monotonic() - started), 1)
+        startup["ready_ms"] = elapsed_ms()
 
 # Helper function
 def get_proc_result(cursor):
@@ -17,79 +154,313 @@ def get_proc_result(cursor):
         print(f"Error fetching stored proc result: {e}")
         return None
 
+def call_proc_once(cursor, name, args):
+    """
+    Runs `CALL name(args)` as a single statement and returns the first row of its first result set.
+    Unlike cursor.callproc(), this does not send extra SET/SELECT statements for the arguments.
+    """
+    cursor.execute(f"CALL {name}({', '.join(['%s'] * len(args))})", tuple(args))
+    row = None
+    if cursor.with_rows:
+        rows = cursor.fetchall()
+        row = rows[0] if rows else None
+    while cursor.nextset():
+        if cursor.with_rows:
+            cursor.fetchall()
+    return row
+
+# Deadlock / lock wait timeout. sp_place_bid_autocommit rolls the whole bid back on either, so it can be sent again.
+LOCK_CONFLICT_ERRNOS = (1213, 1205)
+BID_RETRIES = int(os.getenv('BID_RETRIES', '3'))
+BID_RETRY_BASE_DELAY = float(os.getenv('BID_RETRY_BASE_DELAY', '0.01'))
+
+bid_lock_retries = metrics.register(metrics.Counter(
+    'bid_lock_retries_total', 'Bids sent again after a deadlock (1213) or lock wait timeout (1205).', ('errno',)))
+
+def lock_retry_delay(errno, attempt):
+    """
+    Seconds to wait before sending a bid again after it failed with `errno` on try `attempt`
+    (0-based), or None to give up. Only deadlocks and lock wait timeouts are retried, up to
+    BID_RETRIES times, after a random pause of up to BID_RETRY_BASE_DELAY * 2**attempt (full
+    jitter), so the bids that collided do not collide again in step.
+    """
+    if errno not in LOCK_CONFLICT_ERRNOS or attempt >= BID_RETRIES:
+        return None
+    bid_lock_retries.inc(str(errno))
+    return random.uniform(0, BID_RETRY_BASE_DELAY * 2 ** attempt)
+
+def retry_lock_conflicts(call):
+    """ Runs call(), retrying it on deadlocks and lock wait timeouts (see lock_retry_delay). """
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except mysql.connector.Error as e:
+            delay = lock_retry_delay(e.errno, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+# Read-your-writes: after a customer's own write, their reads skip the replicas for this long.
+STICKY_PRIMARY_COOKIE = 'read_primary_until'
+STICKY_PRIMARY_SECONDS = float(os.getenv('DB_STICKY_PRIMARY_SECONDS', '5'))
+
+def read_connection(timeout=None):
+    """ Connection for read-only handlers: a replica that is in sync, or the primary if this client wrote recently. """
+    try:
+        sticky = float(request.cookies.get(STICKY_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        sticky = False
+    return get_read_connection(timeout, prefer_primary=sticky)
+
+def stick_to_primary():
+    """
+    Called after a customer's own write: sets a cookie that sends this client's reads to
+    the primary for STICKY_PRIMARY_SECONDS, so they see the write even if replicas lag.
+    A cookie (not process memory) so it holds whichever worker serves the next read.
+    """
+    until = time.time() + STICKY_PRIMARY_SECONDS
+
+    @after_this_request
+    def set_cookie(response):
+        response.set_cookie(STICKY_PRIMARY_COOKIE, f"{until:.3f}", max_age=int(STICKY_PRIMARY_SECONDS) + 1,
+                            httponly=True, samesite='Lax')
+        return response
+
+def load_auction_window(itemID):
+    """ Cache loader for auction_windows: the item's auction and its bidding window. """
+    conn = get_user_connection()
+    if conn is None:
+        raise mysql.connector.Error(msg="Could not connect to database")
+    try:
+        return run_hot_query_one(conn, 'auction_window', (itemID,))
+    finally:
+        conn.close()
+
+def load_current_prices(cursor, item_ids):
+    """ Loads current prices for many items in one query instead of get_current_price() per row.
+    Works with a dictionary or a plain cursor. """
+    if not item_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(item_ids))
+    cursor.execute(f"""
+        SELECT itemID, IFNULL(current_price, start_price) AS current_price
+        FROM auction_item
+        WHERE itemID IN ({placeholders});
+    """, tuple(item_ids))
+    rows = cursor.fetchall()
+    if rows and isinstance(rows[0], dict):
+        return {row['itemID']: row['current_price'] for row in rows}
+    return dict(rows)
+
+def publish_bid(itemID, auctionID, custID, amount, previous_leader=None, bidder=None):
+    """
+    Pushes new_high_bid (and outbid, if someone else was leading) to the item's and auction's streams,
+    and bumps the items version so cached item listings are re-sent.
+    `bidder` is the customer who bid, when a proxy bid for `custID` has already topped them.
+    """
+    resource_versions.bump('items')
+    topics = (item_topic(itemID), auction_topic(auctionID))
+    data = {"itemID": itemID, "auctionID": auctionID, "custID": custID, "amount": amount}
+    live_events.publish(topics, 'new_high_bid', data)
+    for loser in dict.fromkeys((previous_leader, bidder)):
+        if loser and loser != custID:
+            live_events.publish(topics, 'outbid', {**data, "custID": loser, "outbid_by": custID})
+
+def record_bid_result(itemID, auctionID, custID, result):
+    """
+    Caches the new price and publishes it after sp_place_bid or sp_set_proxy_bid committed for `custID`.
+    Proxy bids may have answered in the same transaction, so the price and leader come from the
+    result row. Returns the row for the response, without previous_leader and previous_price.
+    """
+    result = dict(result or {})
+    previous_leader = result.pop('previous_leader', None)
+    previous_price = result.pop('previous_price', None)
+    price, leader = result.get('current_price'), result.get('leading_custID')
+    if price is None or (price == previous_price and leader == previous_leader):
+        return result  # a maximum was set without a bid being placed
+    price_cache.put(itemID, price)
+    publish_bid(itemID, auctionID, leader, price, previous_leader, bidder=custID)
+    return result
+
+def publish_auction_ended(auctionID, status, items=None):
+    data = {"auctionID": auctionID, "status": status}
+    if items is not None:
+        data["items"] = items
+    live_events.publish((lifecycle_topic(auctionID),), 'auction_ended', data)
+
+def format_auction_times(rows):
+    return format_datetime_columns(rows, ('start_time', 'end_time'), AUCTION_TIME_FORMAT)
+
+def attach_current_prices(cursor, rows, field='current_price'):
+    """ Fills `field` on every row from the price cache, loading misses in one query. """
+    prices = price_cache.get_many(
+        [row['itemID'] for row in rows],
+        lambda missing: load_current_prices(cursor, missing)
+    )
+    for row in rows:
+        row[field] = prices.get(row['itemID'])
+    return rows
+
 # CUSTOMER-FACING ENDPOINTS 
 
-@app.route('/')
+@api.route('/')
 def home():
     return "Auction Backend Server is running!"
 
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
-    """ (NEW) Logs in a customer. """
+    """
+    Logs in a customer and returns a session token.
+    Send it as `Authorization: Bearer <token>` to /bid, /bids/batch, /payments,
+    PUT /customers/<id> and /customers/<id>/winnings.
+    """
     data = request.get_json()
     if not data or 'userID' not in data or 'password' not in data:
         return jsonify({"error": "Missing userID or password"}), 400
 
     conn = None
-    cursor = None
     try:
         conn = get_user_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if the user exists and the password is correct
-        cursor.execute(
-            "SELECT userID, name FROM customer WHERE userID = %s AND password = %s",
-            (data['userID'], data['password'])
-        )
-        customer = cursor.fetchone()
-        
-        if customer:
-            # Can return a JWT token instead of confirming success
-            return jsonify({"message": "Login successful", "customer": customer}), 200
-        else:
-            return jsonify({"error": "Invalid userID or password"}), 401 
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        customer = run_hot_query_one(conn, 'login', (data['userID'],))
+        # Hash the password without holding on to the pooled connection
+        conn.close()
+        conn = None
+
+        matches, needs_rehash = verify_password(str(data['password']), customer['password'] if customer else None)
+        if not matches:
+            return jsonify({"error": "Invalid userID or password"}), 401
+
+        if needs_rehash:
+            # Plain-text password from before migration 006 (or old iteration count): store a fresh hash
+            new_hash = hash_password(str(data['password']))
+            conn = get_user_connection()
+            if conn is not None:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE customer SET password = %s WHERE userID = %s", (new_hash, customer['userID']))
+                conn.commit()
+                cursor.close()
+
+        customer = {"userID": customer['userID'], "name": customer['name']}
+        return jsonify({"message": "Login successful", "customer": customer,
+                        "token": issue_token(customer['userID'], customer['name']),
+                        "expires_in": SESSION_TTL}), 200
 
     except mysql.connector.Error as e:
         print(f"Error: {e}")
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
-        if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/items', methods=['GET'])
+@api.route('/items', methods=['GET'])
+@resource_versions.conditional('items', 'auctions')
 def get_all_items():
+    """
+    Lists items for sale, one page at a time (ordered by itemID).
+    Query params: limit, after, category, auctionID, auction_status, min_price, max_price
+    With `Accept: application/x-ndjson` every matching item is streamed instead (limit optional).
+    """
+    stream = wants_ndjson()
+    try:
+        limit = parse_limit(request.args, default=None, maximum=None) if stream else parse_limit(request.args)
+        after = decode_cursor(request.args.get('after'), ('str',))
+        min_price = parse_int_arg(request.args, 'min_price')
+        max_price = parse_int_arg(request.args, 'max_price')
+    except PaginationError as e:
+        return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+
+    where = ["ai.status = 'Listed'"]
+    params = []
+    if after:
+        where.append("ai.itemID > %s")
+        params.append(after[0])
+    if request.args.get('category'):
+        where.append("ai.categoryID = %s")
+        params.append(request.args['category'])
+    if request.args.get('auctionID'):
+        where.append("ai.auctionID = %s")
+        params.append(request.args['auctionID'])
+    if request.args.get('auction_status'):
+        where.append("ai.auctionID IN (SELECT a.auctionID FROM auction a WHERE a.status = %s)")
+        params.append(request.args['auction_status'])
+    if min_price is not None:
+        where.append("IFNULL(ai.current_price, ai.start_price) >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        where.append("IFNULL(ai.current_price, ai.start_price) <= %s")
+        params.append(max_price)
+
+    if stream:
+        # The streaming connection is busy reading rows, so prices come straight off the item row.
+        query = f"""
+        SELECT ai.itemID, ai.title, ai.description, ai.start_price, ai.reserve_price, 
+               ai.categoryID, ai.auctionID, IFNULL(ai.current_price, ai.start_price) AS current_price
+        FROM auction_item ai
+        WHERE {' AND '.join(where)}
+        ORDER BY ai.itemID
+        {"LIMIT %s" if limit else ""};
+        """
+        return stream_query(read_connection, query, (*params, limit) if limit else tuple(params))
+
     conn = None
     cursor = None
     try:
-        conn = get_user_connection() 
+        conn = read_connection() 
         if conn is None:
             return jsonify({"error": "Could not connect to database"}), 500
         
-        cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT itemID, title, description, start_price, reserve_price, 
-               categoryID, auctionID, get_current_price(itemID) AS current_price
-        FROM auction_item WHERE status = 'Listed';
+        cursor = conn.cursor()
+        query = f"""
+        SELECT ai.itemID, ai.title, ai.description, ai.start_price, ai.reserve_price, 
+               ai.categoryID, ai.auctionID
+        FROM auction_item ai
+        WHERE {' AND '.join(where)}
+        ORDER BY ai.itemID
+        LIMIT %s;
         """
-        cursor.execute(query)
-        items = cursor.fetchall()
-        return jsonify(items), 200
+        cursor.execute(query, (*params, limit + 1))
+        page = make_page(ITEM_ROWS.fetchall(cursor), limit, lambda row: (row.itemID,))
+        attach_current_prices(cursor, page['data'])
+        return jsonify(page), 200
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/bid', methods=['POST'])
+@api.route('/bid', methods=['POST'])
+@require_session
 def place_bid():
+    """ Places a bid as the logged-in customer. `custID` may be omitted; if sent it must match the session. """
     data = request.get_json()
-    if not data or 'custID' not in data or 'itemID' not in data or 'amount' not in data:
+    if not data or 'itemID' not in data or 'amount' not in data:
         return jsonify({"error": "Missing data"}), 400
 
     if not isinstance(data['amount'], int):
         return jsonify({"error": "Invalid data type. 'amount' must be an integer."}), 400
 
-    p_custID, p_itemID, p_amount = data['custID'], data['itemID'], data['amount']
+    forbidden = session_mismatch(data.get('custID'))
+    if forbidden:
+        return forbidden
+
+    p_custID, p_itemID, p_amount = g.custID, data['itemID'], data['amount']
+    if bid_engine:
+        return place_bid_with_engine(p_custID, p_itemID, p_amount)
+
+    # Reject what we can from in-process caches; an accepted bid is one CALL to MySQL.
+    try:
+        window = auction_windows.get(p_itemID, load_auction_window)
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    rejected = precheck_bid(window, p_itemID, p_amount)
+    if rejected:
+        body, status_code = rejected
+        return jsonify(body), status_code
+    auctionID = window[0]
+
     conn = None
     cursor = None
     try:
@@ -98,62 +469,307 @@ def place_bid():
             return jsonify({"error": "Could not connect to database"}), 500
 
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT a.auctionID, a.end_time, a.status
-            FROM auction_item ai
-            JOIN auction a ON ai.auctionID = a.auctionID
-            WHERE ai.itemID = %s
-        """, (p_itemID,))
-        auction = cursor.fetchone()
-        if not auction:
-            return jsonify({"error": "Item or auction not found"}), 404
+        result = retry_lock_conflicts(
+            lambda: call_proc_once(cursor, 'sp_place_bid_autocommit', (p_custID, p_itemID, p_amount)))
+        result = record_bid_result(p_itemID, auctionID, p_custID, result)
+        stick_to_primary()
+        return jsonify({"message": "Bid placed successfully!", "result": result}), 201
+    except mysql.connector.Error as e:
+        if e.sqlstate == '45000':
+            if e.msg == ITEM_NOT_FOUND:
+                return jsonify({"error": "Item not found"}), 404
+            return jsonify({"error": "Bid rejected", "details": e.msg}), 400
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
 
-        now = datetime.now()
-        if auction['end_time'] and auction['end_time'] < now:
-            if auction['status'] != 'Ended':
-                # Best-effort: call a stored procedure (define it with SQL SECURITY DEFINER)
+def precheck_bid(window, itemID, amount):
+    """
+    Rejects a bid from the cached auction window and price alone.
+    Returns (body, status_code) for a rejected bid, or None if it has to go to MySQL.
+    """
+    if not window:
+        return {"error": "Item or auction not found"}, 404
+    auctionID, status, start_time, end_time = window
+    now = datetime.now()
+    if status == 'Ended' or (end_time and end_time <= now):
+        return {"error": "Auction has ended. Bid rejected."}, 400
+    if effective_auction_status(status, start_time, end_time, now) != 'Active':
+        return {"error": "Bid rejected", "details": "Bidding is not allowed. The auction is not active."}, 400
+
+    # Prices never go down, so a cached price is a safe floor even if another worker has moved on.
+    floor = price_cache.peek(itemID)
+    if floor is not None and amount <= floor:
+        return {"error": "Bid rejected",
+                "details": "Your bid is too low. It must be higher than the current highest bid or the start price."}, 400
+    return None
+
+def place_bid_with_engine(p_custID, p_itemID, p_amount):
+    """ /bid when the in-memory engine is on: no MySQL round trip unless the item is not loaded yet. """
+    try:
+        decision = bid_engine.submit(p_custID, p_itemID, p_amount)
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    if decision.accepted:
+        price_cache.put(p_itemID, p_amount)
+        publish_bid(p_itemID, decision.auctionID, p_custID, p_amount, decision.previous_leader)
+        stick_to_primary()
+        return jsonify({"message": "Bid placed successfully!",
+                        "result": {"message": decision.message, "bidID": decision.bidID}}), 201
+    if decision.status == 'not_found':
+        return jsonify({"error": decision.message}), 404
+    if decision.status == 'unavailable':
+        return jsonify({"error": "Bid not confirmed", "details": decision.message}), 503
+    return jsonify({"error": "Bid rejected", "details": decision.message}), 400
+
+MAX_BATCH_BIDS = 5000
+
+ITEM_NOT_FOUND = 'Item not found'  # SIGNAL message of sp_place_bid for an unknown itemID
+
+def classify_bid_rejection(message):
+    """ Maps a sp_place_bid / before_bid_insert SIGNAL message to a batch result status. """
+    if message == ITEM_NOT_FOUND:
+        return 'not_found'
+    if 'too low' in message:
+        return 'too_low'
+    if 'not active' in message:
+        return 'auction_closed'
+    return 'rejected'
+
+@api.route('/bids/batch', methods=['POST'])
+@require_session
+def place_bids_batch():
+    """
+    Places many bids in one request: {"bids": [{"itemID", "amount"}, ...]}, all as the logged-in customer.
+    - Bids are grouped by itemID and applied in the order they were sent.
+    - Each item group runs in its own transaction on a single pooled connection.
+    - Returns one result per bid, in request order, with status
+      accepted / too_low / auction_closed / not_found / invalid / forbidden / rejected / unavailable / error.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('bids'), list):
+        return jsonify({"error": "Missing data. Expected {\"bids\": [...]}"}), 400
+    bids = data['bids']
+    if len(bids) > MAX_BATCH_BIDS:
+        return jsonify({"error": f"Too many bids. At most {MAX_BATCH_BIDS} per batch."}), 400
+
+    results = [None] * len(bids)
+    groups = {}
+    for index, bid in enumerate(bids):
+        if not isinstance(bid, dict) or not all(k in bid for k in ('itemID', 'amount')):
+            results[index] = {"status": "invalid", "details": "Missing itemID or amount"}
+        elif not isinstance(bid['amount'], int):
+            results[index] = {"status": "invalid", "details": "'amount' must be an integer"}
+        elif bid.setdefault('custID', g.custID) != g.custID:
+            results[index] = {"status": "forbidden", "details": "You can only bid as the customer you are logged in as."}
+        else:
+            groups.setdefault(bid['itemID'], []).append(index)
+
+    if bid_engine:
+        for itemID, indexes in groups.items():
+            for i in indexes:
                 try:
-                    cursor.callproc('sp_mark_auction_ended', (auction['auctionID'],))
-                    conn.commit()
-                except mysql.connector.Error:
-                    pass  # Ignore if procedure missing or insufficient privilege
-            return jsonify({"error": "Auction has ended. Bid rejected."}), 400
+                    decision = bid_engine.submit(bids[i]['custID'], itemID, bids[i]['amount'])
+                except mysql.connector.Error as e:
+                    results[i] = {"status": "error", "details": str(e)}
+                    continue
+                results[i] = {"status": decision.status}
+                if decision.accepted:
+                    price_cache.put(itemID, decision.amount)
+                    publish_bid(itemID, decision.auctionID, bids[i]['custID'], decision.amount, decision.previous_leader)
+                else:
+                    results[i]["details"] = decision.message
+        return batch_response(bids, results)
 
-        if auction['status'] == 'Ended':
-            return jsonify({"error": "Auction already ended. Bid rejected."}), 400
+    conn = None
+    cursor = None
+    try:
+        conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor(dictionary=True)
 
-        cursor.callproc('sp_place_bid', (p_custID, p_itemID, p_amount))
-        conn.commit()
-        result = get_proc_result(cursor)
-        return jsonify({"message": "Bid placed successfully!", "result": result}), 201
+        for itemID, indexes in groups.items():
+            # With autocommit off, everything for one item group is a single transaction.
+            accepted = []  # (custID, result row), published once the group commits
+            try:
+                auction = run_hot_query_one(conn, 'auction_window', (itemID,))
+                if not auction:
+                    for i in indexes:
+                        results[i] = {"status": "not_found", "details": "Item or auction not found"}
+                elif auction['status'] == 'Ended' or (auction['end_time'] and auction['end_time'] < datetime.now()):
+                    for i in indexes:
+                        results[i] = {"status": "auction_closed", "details": "Auction has ended. Bid rejected."}
+                else:
+                    for i in indexes:
+                        bid = bids[i]
+                        try:
+                            cursor.callproc('sp_place_bid', (bid['custID'], itemID, bid['amount']))
+                            row = get_proc_result(cursor)
+                            results[i] = {"status": "accepted"}
+                            accepted.append((bid['custID'], row))
+                        except mysql.connector.Error as e:
+                            if e.errno in (1205, 1213):
+                                raise  # Lock wait timeout / deadlock rolled back the whole group
+                            if e.sqlstate == '45000':
+                                results[i] = {"status": classify_bid_rejection(e.msg), "details": e.msg}
+                            else:
+                                results[i] = {"status": "error", "details": str(e)}
+                conn.commit()
+            except mysql.connector.Error as e:
+                conn.rollback()
+                accepted = []
+                for i in indexes:
+                    results[i] = {"status": "error", "details": str(e)}
+            for custID, row in accepted:
+                record_bid_result(itemID, auction['auctionID'], custID, row)
     except mysql.connector.Error as e:
         if conn: conn.rollback()
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+    return batch_response(bids, results)
+
+def batch_response(bids, results):
+    summary = {}
+    for index, result in enumerate(results):
+        bid = bids[index] if isinstance(bids[index], dict) else {}
+        result.update({"index": index, "itemID": bid.get('itemID'), "custID": bid.get('custID'), "amount": bid.get('amount')})
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    if summary.get('accepted'):
+        stick_to_primary()
+    return jsonify({"results": results, "summary": summary}), 200
+
+@api.route('/proxy_bids', methods=['POST'])
+@require_session
+def set_proxy_bid():
+    """
+    Sets the logged-in customer's hidden maximum bid on an item: {"itemID", "max_amount"}.
+    From then on the server bids for them whenever they are outbid, just enough to lead, up to that
+    maximum (sp_resolve_proxy_bids). Sending it again replaces the maximum. Returns the item's price
+    and leader once the competing maxima are settled.
+    """
+    data = request.get_json()
+    if not data or 'itemID' not in data or 'max_amount' not in data:
+        return jsonify({"error": "Missing data"}), 400
+    if not isinstance(data['max_amount'], int):
+        return jsonify({"error": "Invalid data type. 'max_amount' must be an integer."}), 400
+    if bid_engine:
+        # The engine decides bids in memory, without sp_place_bid, so it would never see the maxima.
+        return jsonify({"error": "Proxy bidding is not available while the bid engine is on."}), 409
+
+    p_custID, p_itemID, p_max_amount = g.custID, data['itemID'], data['max_amount']
+    try:
+        window = auction_windows.get(p_itemID, load_auction_window)
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    rejected = precheck_bid(window, p_itemID, p_max_amount)
+    if rejected:
+        body, status_code = rejected
+        return jsonify(body), status_code
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+
+        cursor = conn.cursor(dictionary=True)
+        result = retry_lock_conflicts(
+            lambda: call_proc_once(cursor, 'sp_set_proxy_bid', (p_custID, p_itemID, p_max_amount)))
+        result = record_bid_result(p_itemID, window[0], p_custID, result)
+        stick_to_primary()
+        return jsonify({"message": "Maximum bid set!", "result": result}), 201
+    except mysql.connector.Error as e:
         if e.sqlstate == '45000':
             return jsonify({"error": "Bid rejected", "details": e.msg}), 400
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
-        
 
+@api.route('/customers/<string:custID>/proxy_bids', methods=['GET'])
+@require_session
+def get_proxy_bids(custID):
+    """ The logged-in customer's maximum bids on items that are not finalized yet, newest first. """
+    forbidden = session_mismatch(custID)
+    if forbidden:
+        return forbidden
 
-@app.route('/customers', methods=['GET'])
-def get_customers():
     conn = None
     cursor = None
     try:
+        # Maxima are private and usually read right after being set, so always from the primary.
         conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT userID, name, email, phone FROM customer;")
-        customers = cursor.fetchall()
-        return jsonify(customers), 200
+        cursor.execute("""
+            SELECT pb.itemID, ai.title, pb.max_amount, IFNULL(ai.current_price, ai.start_price) AS current_price,
+                   ai.leading_custID <=> pb.custID AS leading, pb.created_at
+            FROM proxy_bid pb JOIN auction_item ai ON pb.itemID = ai.itemID
+            WHERE pb.custID = %s
+            ORDER BY pb.created_at DESC;
+        """, (custID,))
+        rows = cursor.fetchall()
+        for row in rows:
+            row['leading'] = bool(row['leading'])
+        return jsonify(rows), 200
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/customers', methods=['POST'])
+
+@api.route('/customers', methods=['GET'])
+def get_customers():
+    """
+    Lists customers, one page at a time (ordered by userID). Query params: limit, after
+    With `Accept: application/x-ndjson` every customer is streamed instead (limit optional).
+    """
+    stream = wants_ndjson()
+    try:
+        limit = parse_limit(request.args, default=None, maximum=None) if stream else parse_limit(request.args)
+        after = decode_cursor(request.args.get('after'), ('str',))
+    except PaginationError as e:
+        return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+
+    if stream:
+        query = f"""
+        SELECT userID, name, email, phone FROM customer
+        {"WHERE userID > %s" if after else ""}
+        ORDER BY userID {"LIMIT %s" if limit else ""};
+        """
+        params = tuple(v for v in (after[0] if after else None, limit) if v is not None)
+        return stream_query(read_connection, query, params)
+
+    conn = None
+    cursor = None
+    try:
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor(dictionary=True)
+        if after:
+            cursor.execute(
+                "SELECT userID, name, email, phone FROM customer WHERE userID > %s ORDER BY userID LIMIT %s;",
+                (after[0], limit + 1)
+            )
+        else:
+            cursor.execute("SELECT userID, name, email, phone FROM customer ORDER BY userID LIMIT %s;", (limit + 1,))
+        page = make_page(cursor.fetchall(), limit, lambda row: (row['userID'],))
+        return jsonify(page), 200
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+@api.route('/customers', methods=['POST'])
 def create_customer():
     data = request.get_json()
     required = ['userID', 'name', 'phone', 'email', 'address', 'password']
@@ -163,11 +779,14 @@ def create_customer():
     # Basic normalization
     data['userID'] = data['userID'].strip()
     data['email'] = data['email'].strip().lower()
+    password_hash = hash_password(str(data['password']))
 
     conn = None
     cursor = None
     try:
         conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -183,7 +802,7 @@ def create_customer():
         """
         cursor.execute(insert_sql, (
             data['userID'], data['name'], data['phone'],
-            data['email'], data['address'], data['password']
+            data['email'], data['address'], password_hash
         ))
         conn.commit()
         return jsonify({"message": "Customer created successfully"}), 201
@@ -193,32 +812,21 @@ def create_customer():
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/items/<string:itemID>', methods=['GET'])
+@api.route('/items/<string:itemID>', methods=['GET'])
+@resource_versions.conditional('items')
 def get_item_by_id(itemID):
     """ (MODIFIED) Gets details for a single item, including current price and winner's name. """
     conn = None
     cursor = None
     try:
-        conn = get_user_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT 
-            ai.itemID, ai.title, ai.description, ai.start_price, 
-            ai.status, ai.reserve_price, ai.categoryID, ai.auctionID, 
-            ai.winnerID,
-            c.name AS winnerName, 
-            get_current_price(ai.itemID) AS current_price
-        FROM 
-            auction_item ai
-        LEFT JOIN 
-            customer c ON ai.winnerID = c.userID
-        WHERE 
-            ai.itemID = %s;
-        """
-        cursor.execute(query, (itemID,))
-        item = cursor.fetchone()
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        item = run_hot_query_one(conn, 'item_by_id', (itemID,))
         
         if item:
+            cursor = conn.cursor(dictionary=True)
+            attach_current_prices(cursor, [item])
             return jsonify(item), 200
         else:
             return jsonify({"error": "Item not found"}), 404
@@ -230,44 +838,190 @@ def get_item_by_id(itemID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/customers/<string:custID>/bids', methods=['GET'])
+@api.route('/customers/<string:custID>/bids', methods=['GET'])
 def get_bids_by_customer(custID):
+    """
+    Bid history for a customer, newest first. Query params: limit, after, itemID
+    With `Accept: application/x-ndjson` the whole history is streamed instead (limit optional).
+    """
+    stream = wants_ndjson()
+    try:
+        limit = parse_limit(request.args, default=None, maximum=None) if stream else parse_limit(request.args)
+        after = decode_cursor(request.args.get('after'), ('datetime', 'str'))
+    except PaginationError as e:
+        return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+
+    where = ["b.custID = %s"]
+    params = [custID]
+    if after:
+        where.append("(b.bid_time < %s OR (b.bid_time = %s AND b.bidID < %s))")
+        params.extend([after[0], after[0], after[1]])
+    if request.args.get('itemID'):
+        where.append("b.itemID = %s")
+        params.append(request.args['itemID'])
+
+    query = f"""
+    SELECT b.bidID, b.itemID, ai.title, b.amount, b.bid_time
+    FROM bid b JOIN auction_item ai ON b.itemID = ai.itemID
+    WHERE {' AND '.join(where)}
+    ORDER BY b.bid_time DESC, b.bidID DESC
+    {"LIMIT %s" if limit else ""};
+    """
+    if stream:
+        return stream_query(read_connection, query, (*params, limit) if limit else tuple(params))
+
+    conn = None
+    cursor = None
+    try:
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor()
+        cursor.execute(query, (*params, limit + 1))
+        page = make_page(BID_ROWS.fetchall(cursor), limit, lambda row: (row.bid_time, row.bidID))
+        return jsonify(page), 200
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+@api.route('/auctions/<string:auctionID>/items', methods=['GET'])
+@resource_versions.conditional('items')
+def get_items_by_auction(auctionID):
+    if wants_ndjson():
+        query = "SELECT itemID, title, status, IFNULL(current_price, start_price) AS current_price FROM auction_item WHERE auctionID = %s;"
+        return stream_query(read_connection, query, (auctionID,))
+
+    conn = None
+    cursor = None
+    try:
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor()
+        query = "SELECT itemID, title, status FROM auction_item WHERE auctionID = %s;"
+        cursor.execute(query, (auctionID,))
+        return jsonify(attach_current_prices(cursor, ITEM_ROWS.fetchall(cursor))), 200
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+ITEM_STREAM_QUERY = """
+    SELECT ai.itemID, ai.title, ai.status, ai.bid_count,
+           a.auctionID, a.auction_name, a.status AS auction_status, a.start_time, a.end_time
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = %s
+"""
+
+def item_stream_snapshot(row):
+    """ Snapshot event for an item stream from an ITEM_STREAM_QUERY row (with current_price attached). """
+    auction = format_auction_times([{
+        "auctionID": row['auctionID'], "auction_name": row['auction_name'], "status": row['auction_status'],
+        "start_time": row['start_time'], "end_time": row['end_time'],
+    }])[0]
+    return {
+        "item": {k: row[k] for k in ('itemID', 'title', 'status', 'current_price', 'bid_count')},
+        "auction": auction,
+    }
+
+def auction_stream_end(auctionID, status, start_time, end_time):
+    """ (ends_at, ended_data): when the auction closes on its own (end_time, or now if it already has). """
+    status = effective_auction_status(status, start_time, end_time, datetime.now())
+    if status in ('Scheduled', 'Active') and isinstance(end_time, datetime):
+        ends_at, ended_status = end_time.timestamp(), 'Ended'
+    else:
+        ends_at, ended_status = time.time(), status
+    return ends_at, {"auctionID": auctionID, "status": ended_status}
+
+def auction_event_stream(subscription, snapshot, status, start_time, end_time):
+    ends_at, ended_data = auction_stream_end(snapshot['auction']['auctionID'], status, start_time, end_time)
+    return sse_response(subscription, snapshot, ends_at=ends_at, ended_data=ended_data)
+
+@api.route('/items/<string:itemID>/stream', methods=['GET'])
+def stream_item_events(itemID):
+    """
+    Server-Sent Events for one item, instead of polling GET /items/<id>.
+    Sends `snapshot` first, then `new_high_bid` / `outbid` as bids land, and `auction_ended` last.
+    """
+    try:
+        window = auction_windows.get(itemID, load_auction_window)
+    except mysql.connector.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    if not window:
+        return jsonify({"error": "Item not found"}), 404
+
+    # Subscribe before reading the snapshot so no bid can fall in between.
+    subscription = live_events.subscribe((item_topic(itemID), lifecycle_topic(window[0])))
     conn = None
     cursor = None
     try:
         conn = get_user_connection()
+        if conn is None:
+            subscription.close()
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT b.bidID, b.itemID, ai.title, b.amount, b.bid_time
-        FROM bid b JOIN auction_item ai ON b.itemID = ai.itemID
-        WHERE b.custID = %s ORDER BY b.bid_time DESC;
-        """
-        cursor.execute(query, (custID,))
-        return jsonify(cursor.fetchall()), 200
+        cursor.execute(ITEM_STREAM_QUERY, (itemID,))
+        row = cursor.fetchone()
+        if not row:
+            subscription.close()
+            return jsonify({"error": "Item not found"}), 404
+        attach_current_prices(cursor, [row])
     except mysql.connector.Error as e:
+        subscription.close()
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/auctions/<string:auctionID>/items', methods=['GET'])
-def get_items_by_auction(auctionID):
+    start_time, end_time = row['start_time'], row['end_time']
+    return auction_event_stream(subscription, item_stream_snapshot(row), row['auction_status'], start_time, end_time)
+
+@api.route('/auctions/<string:auctionID>/stream', methods=['GET'])
+def stream_auction_events(auctionID):
+    """
+    Server-Sent Events for every item of an auction, instead of polling GET /auctions/<id>/items.
+    Sends `snapshot` first, then `new_high_bid` / `outbid` as bids land, and `auction_ended` last.
+    """
+    subscription = live_events.subscribe((auction_topic(auctionID), lifecycle_topic(auctionID)))
     conn = None
     cursor = None
     try:
         conn = get_user_connection()
+        if conn is None:
+            subscription.close()
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
-        query = "SELECT itemID, title, status, get_current_price(itemID) AS current_price FROM auction_item WHERE auctionID = %s;"
-        cursor.execute(query, (auctionID,))
-        return jsonify(cursor.fetchall()), 200
+        cursor.execute(
+            "SELECT auctionID, auction_name, status, start_time, end_time FROM auction WHERE auctionID = %s",
+            (auctionID,)
+        )
+        auction = cursor.fetchone()
+        if not auction:
+            subscription.close()
+            return jsonify({"error": "Auction not found"}), 404
+        cursor.execute("SELECT itemID, title, status, bid_count FROM auction_item WHERE auctionID = %s ORDER BY itemID;", (auctionID,))
+        items = attach_current_prices(cursor, cursor.fetchall())
     except mysql.connector.Error as e:
+        subscription.close()
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/customers/<string:custID>', methods=['PUT'])
+    status, start_time, end_time = auction['status'], auction['start_time'], auction['end_time']
+    snapshot = {"auction": format_auction_times([auction])[0], "items": items}
+    return auction_event_stream(subscription, snapshot, status, start_time, end_time)
+
+@api.route('/customers/<string:custID>', methods=['PUT'])
+@require_session
 def update_customer(custID):
+    forbidden = session_mismatch(custID)
+    if forbidden:
+        return forbidden
     data = request.get_json()
     if not data or ('phone' not in data and 'address' not in data):
         return jsonify({"error": "No data to update"}), 400
@@ -276,12 +1030,15 @@ def update_customer(custID):
     cursor = None
     try:
         conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor()
         if 'phone' in data:
             cursor.execute("UPDATE customer SET phone = %s WHERE userID = %s", (data['phone'], custID))
         if 'address' in data:
             cursor.execute("UPDATE customer SET address = %s WHERE userID = %s", (data['address'], custID))
         conn.commit()
+        stick_to_primary()
         return jsonify({"message": "Customer updated"}), 200
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
@@ -289,22 +1046,35 @@ def update_customer(custID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/customers/<string:custID>/winnings', methods=['GET'])
+@api.route('/customers/<string:custID>/winnings', methods=['GET'])
+@require_session
 def get_unpaid_winnings(custID):
     """
     Fetches all items a user has won but not yet paid for.
     This is what a "cart" or "checkout" page would use.
     """
+    forbidden = session_mismatch(custID)
+    if forbidden:
+        return forbidden
+    if wants_ndjson():
+        query = """
+        SELECT itemID, title, IFNULL(current_price, start_price) AS winning_amount
+        FROM auction_item
+        WHERE winnerID = %s AND transactionID IS NULL;
+        """
+        return stream_query(get_user_connection, query, (custID,))
+
     conn = None
     cursor = None
     try:
         conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
         query = """
         SELECT 
             itemID, 
-            title, 
-            get_current_price(itemID) AS winning_amount
+            title
         FROM 
             auction_item
         WHERE 
@@ -316,7 +1086,7 @@ def get_unpaid_winnings(custID):
             );
         """
         cursor.execute(query, (custID,))
-        items = cursor.fetchall()
+        items = attach_current_prices(cursor, cursor.fetchall(), field='winning_amount')
         return jsonify(items), 200
 
     except mysql.connector.Error as e:
@@ -326,18 +1096,22 @@ def get_unpaid_winnings(custID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/payments', methods=['POST'])
+@api.route('/payments', methods=['POST'])
+@require_session
 def create_payment():
     """
-    Creates a payment.
-    - User only sends CustomerId, itemID, and paymentMethod.
+    Creates a payment for the logged-in customer.
+    - User only sends itemID and paymentMethod (CustomerId is optional and must match the session).
     - The server auto-detects the winning amount.
     - The server VERIFIES the customer is the actual winner.
     """
     data = request.get_json()
-    required_fields = ['paymentMethod', 'CustomerId', 'itemID']
+    required_fields = ['paymentMethod', 'itemID']
     if not data or not all(field in data for field in required_fields):
         return jsonify({"error": f"Missing data. Required: {', '.join(required_fields)}"}), 400
+    forbidden = session_mismatch(data.get('CustomerId'))
+    if forbidden:
+        return forbidden
 
     conn = None
     cursor = None
@@ -345,20 +1119,18 @@ def create_payment():
     new_transactionID = f"T-{uuid.uuid4().hex[:8]}" 
     payment_date = datetime.now().strftime('%Y-%m-%d')
     
-    p_custID = data['CustomerId']
+    p_custID = g.custID
     p_itemID = data['itemID']
     p_method = data['paymentMethod']
     
     try:
         conn = get_user_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
         conn.start_transaction()
 
-        cursor.execute(
-            "SELECT winnerID, status, get_current_price(itemID) AS amount FROM auction_item WHERE itemID = %s",
-            (p_itemID,)
-        )
-        item_info = cursor.fetchone()
+        item_info = run_hot_query_one(conn, 'payment_winner', (p_itemID,))
 
         if not item_info:
             return jsonify({"error": "Item not found"}), 404
@@ -388,6 +1160,8 @@ def create_payment():
         cursor.execute(query_update_item, (new_transactionID, p_itemID))
         
         conn.commit()
+        resource_versions.bump('items')
+        stick_to_primary()
         
         return jsonify({
             "message": f"Payment of ${v_amount} successful!",
@@ -407,7 +1181,7 @@ def create_payment():
 
 # ADMIN-ONLY ENDPOINTS
 
-@app.route('/auctions', methods=['POST'])
+@api.route('/auctions', methods=['POST'])
 def create_auction():
     data = request.get_json()
     required = ['auctionID', 'auction_name', 'start_time', 'end_time', 'userID']
@@ -418,11 +1192,21 @@ def create_auction():
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor()
         query = "INSERT INTO auction (auctionID, auction_name, start_time, end_time, status, userID) VALUES (%s, %s, %s, %s, 'Scheduled', %s)"
         cursor.execute(query, (data['auctionID'], data['auction_name'], data['start_time'],
                                data['end_time'], data['userID']))
         conn.commit()
+        resource_versions.bump('auctions')
+        if auction_scheduler:
+            try:
+                auction_scheduler.notify(data['auctionID'],
+                                         datetime.fromisoformat(str(data['start_time'])),
+                                         datetime.fromisoformat(str(data['end_time'])))
+            except ValueError:
+                pass  # MySQL accepted a format we can't parse; the next reload picks it up
         return jsonify({"message": "Auction created"}), 201
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
@@ -430,33 +1214,55 @@ def create_auction():
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/auctions', methods=['GET'])
+@api.route('/auctions', methods=['GET'])
+@resource_versions.conditional('auctions')
 def list_auctions():
     """
-    Returns a list of all auctions with details.
+    Returns a page of auctions with details, ordered by start_time.
     Fields: auctionID, auction_name, start_time, end_time, status, userID
+    Query params: limit, after, status
+    With `Accept: application/x-ndjson` every matching auction is streamed instead (limit optional).
     """
+    stream = wants_ndjson()
+    try:
+        limit = parse_limit(request.args, default=None, maximum=None) if stream else parse_limit(request.args)
+        after = decode_cursor(request.args.get('after'), ('datetime', 'str'))
+    except PaginationError as e:
+        return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+
+    where = []
+    params = []
+    if after:
+        where.append("(start_time > %s OR (start_time = %s AND auctionID > %s))")
+        params.extend([after[0], after[0], after[1]])
+    if request.args.get('status'):
+        where.append("status = %s")
+        params.append(request.args['status'])
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    query = f"SELECT auctionID, auction_name, start_time, end_time, status, userID FROM auction {where_sql} ORDER BY start_time, auctionID {'LIMIT %s' if limit else ''};"
+
+    if stream:
+        return stream_query(read_connection, query, (*params, limit) if limit else tuple(params),
+                            transform=format_auction_times)
+
     conn = None
     cursor = None
     try:
-        conn = get_user_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = "SELECT auctionID, auction_name, start_time, end_time, status, userID FROM auction ORDER BY start_time;"
-        cursor.execute(query)
-        auctions = cursor.fetchall()
-        for a in auctions:
-            if isinstance(a['start_time'], datetime):
-                a['start_time'] = a['start_time'].strftime("%a, %d %b %Y %H:%M:%S IST")
-            if isinstance(a['end_time'], datetime):
-                a['end_time'] = a['end_time'].strftime("%a, %d %b %Y %H:%M:%S IST")
-        return jsonify(auctions), 200
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor()
+        cursor.execute(query, (*params, limit + 1))
+        page = make_page(AUCTION_ROWS.fetchall(cursor), limit, lambda row: (row.start_time, row.auctionID))
+        format_auction_times(page['data'])
+        return jsonify(page), 200
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
     finally:
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/items', methods=['POST'])
+@api.route('/items', methods=['POST'])
 def create_item():
     data = request.get_json()
     required = ['itemID', 'title', 'start_price', 'reserve_price', 'categoryID', 'auctionID']
@@ -467,11 +1273,14 @@ def create_item():
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor()
         query = "INSERT INTO auction_item (itemID, description, title, start_price, status, reserve_price, categoryID, auctionID) VALUES (%s, %s, %s, %s, 'Listed', %s, %s, %s)"
         cursor.execute(query, (data['itemID'], data.get('description'), data['title'], data['start_price'],
                                data['reserve_price'], data['categoryID'], data['auctionID']))
         conn.commit()
+        resource_versions.bump('items')
         return jsonify({"message": "Item created"}), 201
     except mysql.connector.Error as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
@@ -479,12 +1288,14 @@ def create_item():
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/customers/<string:custID>', methods=['DELETE'])
+@api.route('/customers/<string:custID>', methods=['DELETE'])
 def delete_customer(custID):
     conn = None
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor()
         cursor.execute("DELETE FROM customer WHERE userID = %s", (custID,))
         conn.commit()
@@ -497,15 +1308,20 @@ def delete_customer(custID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/auctions/start-scheduled', methods=['POST'])
+@api.route('/auctions/start-scheduled', methods=['POST'])
 def start_scheduled_auctions():
     conn = None
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
         cursor.callproc('sp_start_auction')
         conn.commit()
+        auction_windows.invalidate_auction()
+        if bid_engine: bid_engine.invalidate_auction()
+        resource_versions.bump('items', 'auctions')
         result = get_proc_result(cursor)
         return jsonify({"message": "Checked scheduled auctions", "result": result}), 200
     except mysql.connector.Error as e:
@@ -516,15 +1332,21 @@ def start_scheduled_auctions():
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/auctions/<string:auctionID>/cancel', methods=['PUT'])
+@api.route('/auctions/<string:auctionID>/cancel', methods=['PUT'])
 def cancel_auction(auctionID):
     conn = None
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
         cursor.callproc('sp_cancel_auction', (auctionID,))
         conn.commit()
+        auction_windows.invalidate_auction(auctionID)
+        if bid_engine: bid_engine.invalidate_auction(auctionID)
+        resource_versions.bump('items', 'auctions')
+        publish_auction_ended(auctionID, 'Cancelled')
         result = get_proc_result(cursor)
         return jsonify({"message": f"Canceled auction {auctionID}", "result": result}), 200
     except mysql.connector.Error as e:
@@ -535,15 +1357,19 @@ def cancel_auction(auctionID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/items/<string:itemID>/finalize', methods=['POST'])
+@api.route('/items/<string:itemID>/finalize', methods=['POST'])
 def finalize_item(itemID):
     conn = None
     cursor = None
     try:
         conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
         cursor.callproc('sp_finalize_auction_item', (itemID,))
         conn.commit()
+        auction_windows.invalidate_item(itemID)
+        resource_versions.bump('items')
         result = get_proc_result(cursor)
         return jsonify({"message": f"Finalized item {itemID}", "result": result}), 200
     except mysql.connector.Error as e:
@@ -554,7 +1380,48 @@ def finalize_item(itemID):
         if cursor: cursor.close()
         if conn: conn.close()
 
-@app.route('/stats/user_counts', methods=['GET'])
+@api.route('/auctions/<string:auctionID>/finalize', methods=['POST'])
+def finalize_auction(auctionID):
+    """
+    Finalizes every item of an ended auction in one transaction (sp_finalize_auction).
+    Returns the procedure's message plus one summary row per item.
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_admin_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
+        cursor = conn.cursor(dictionary=True)
+        cursor.callproc('sp_finalize_auction', (auctionID,))
+        result_sets = [res.fetchall() for res in cursor.stored_results()]
+        conn.commit()
+        auction_windows.invalidate_auction(auctionID)
+        if bid_engine: bid_engine.invalidate_auction(auctionID)
+        resource_versions.bump('items', 'auctions')
+
+        result = result_sets[0][0] if result_sets and result_sets[0] else None
+        items = result_sets[1] if len(result_sets) > 1 else []
+        summary = {}
+        for item in items:
+            summary[item['outcome']] = summary.get(item['outcome'], 0) + 1
+        if items:
+            publish_auction_ended(auctionID, 'Ended', [
+                {"itemID": item['itemID'], "outcome": item['outcome'], "winnerID": item['winnerID'],
+                 "winning_bid": item['winning_bid']} for item in items
+            ])
+        return jsonify({"message": f"Finalized auction {auctionID}", "result": result,
+                        "items": items, "summary": summary}), 200
+    except mysql.connector.Error as e:
+        if conn: conn.rollback()
+        if e.errno == 1370: 
+             return jsonify({"error": "Permission denied", "details": e.msg}), 403
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+@api.route('/stats/user_counts', methods=['GET'])
 def user_counts():
     """
     Returns counts grouped by role:
@@ -562,19 +1429,24 @@ def user_counts():
       - 'admins'    => distinct users referenced as auctioneers in auction.userID
     Uses GROUP BY and COUNT in a derived table.
     """
+    query = """
+    SELECT role, COUNT(*) AS count FROM (
+        SELECT userID, 'customers' AS role FROM customer
+        UNION ALL
+        SELECT DISTINCT userID, 'admins' AS role FROM auction
+    ) t
+    GROUP BY role;
+    """
+    if wants_ndjson():
+        return stream_query(read_connection, query)
+
     conn = None
     cursor = None
     try:
-        conn = get_user_connection()
+        conn = read_connection()
+        if conn is None:
+            return jsonify({"error": "Could not connect to database"}), 500
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT role, COUNT(*) AS count FROM (
-            SELECT userID, 'customers' AS role FROM customer
-            UNION ALL
-            SELECT DISTINCT userID, 'admins' AS role FROM auction
-        ) t
-        GROUP BY role;
-        """
         cursor.execute(query)
         rows = cursor.fetchall()
         return jsonify(rows), 200
@@ -584,5 +1456,99 @@ def user_counts():
         if cursor: cursor.close()
         if conn: conn.close()
 
+@api.route('/stats/bid_engine', methods=['GET'])
+def bid_engine_stats():
+    if not bid_engine:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **bid_engine.stats()}), 200
+
+@api.route('/stats/auction_windows', methods=['GET'])
+def auction_window_stats():
+    return jsonify(auction_windows.stats()), 200
+
+@api.route('/stats/scheduler', methods=['GET'])
+def scheduler_stats():
+    if not auction_scheduler:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **auction_scheduler.stats()}), 200
+
+@api.route('/stats/pools', methods=['GET'])
+def connection_pool_stats():
+    """ Open / in-use / idle connections, checkout wait times and timeouts per pool. """
+    return jsonify(pool_stats()), 200
+
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """ Request, query and connection pool metrics of this process, in the Prometheus text format. """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/profiles', methods=['GET'])
+@profiler.require_token
+def profile_summary():
+    """ Aggregated profiles of the requested and sampled requests: per endpoint, per statement, top functions. """
+    return jsonify(profiler.summary()), 200
+
+@api.route('/profiles', methods=['DELETE'])
+@profiler.require_token
+def clear_profiles():
+    profiler.reset()
+    return jsonify({"message": "Profiles cleared"}), 200
+
+@api.route('/profiles/sampling', methods=['POST'])
+@profiler.require_token
+def set_profile_sampling():
+    """ Body: {"every": N} profiles one request in N from now on; 0 turns sampling off. """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('every'), int) or data['every'] < 0:
+        return jsonify({"error": "Invalid data", "details": "'every' must be a non-negative integer."}), 400
+    profiler.sample_every = data['every']
+    return jsonify({"sample_every": profiler.sample_every}), 200
+
+@api.route('/profiles/pstats', methods=['GET'])
+@api.route('/profiles/<string:profile_id>/pstats', methods=['GET'])
+@profiler.require_token
+def download_profile(profile_id=None):
+    """ The aggregated profile, or one recent request's, as a pstats file (snakeviz, flameprof, gprof2dot). """
+    data = profiler.pstats_bytes(profile_id)
+    if data is None:
+        return jsonify({"error": "Profile not found"}), 404
+    filename = f"{profile_id or 'aggregate'}.pstats"
+    return Response(data, mimetype='application/octet-stream',
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@api.route('/stats/events', methods=['GET'])
+def event_stats():
+    """ Live SSE subscribers and events published by this process. """
+    return jsonify(live_events.stats()), 200
+
+@api.route('/stats/etags', methods=['GET'])
+def etag_stats():
+    """ Returns the resource versions behind the ETags and how many polls were answered 304. """
+    return jsonify(resource_versions.stats()), 200
+
+@api.route('/stats/price_cache', methods=['GET'])
+def price_cache_stats():
+    """ Returns hit/miss counters for the in-process current-price cache. """
+    return jsonify(price_cache.stats()), 200
+
+@api.route('/ready', methods=['GET'])
+def readiness():
+    """
+    Readiness probe for load balancers and pre-fork runners. The first call warms the
+    pools and caches (see warm_up); after that it only checks that a connection can be
+    checked out. 503 until the worker can serve traffic.
+    """
+    try:
+        warm_up()
+    except mysql.connector.Error as e:
+        return jsonify({"status": "starting", "details": str(e), "startup": startup}), 503
+    conn = get_user_connection(timeout=1)
+    if conn is None:
+        return jsonify({"status": "unavailable", "details": "No free database connection", "startup": startup}), 503
+    conn.close()
+    return jsonify({"status": "ready", "startup": startup}), 200
+
+startup["import_ms"] = elapsed_ms()
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=os.getenv('FLASK_DEBUG') == '1', port=5000, threaded=True)
\ No newline at end of file
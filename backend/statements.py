@@ -0,0 +1,86 @@
+"""
+Server-side prepared statements for the hottest queries.
+
+Each pooled connection keeps one prepared cursor per query in HOT_QUERIES.
+MySQL parses and plans the statement once per connection; after that every
+request only sends the parameters over the binary protocol. Reusing the
+cursor also skips the connection ping that cursor() does on each call.
+
+The cache belongs to the physical connection (see db_connector.PooledConnection.statements).
+It is dropped when the pool closes or recycles that connection, and on a
+session reset. Set PREPARED_STATEMENTS=0 to fall back to plain text queries,
+for example to compare the two with benchmarks/prepared_statements.py.
+"""
+import os
+
+import mysql.connector
+
+import metrics
+
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+HOT_QUERIES = {
+    # POST /login
+    'login': "SELECT userID, name, password FROM customer WHERE userID = %s",
+    # POST /bid (auction window cache misses) and POST /bids/batch
+    'auction_window': """
+        SELECT a.auctionID, a.status, a.start_time, a.end_time
+        FROM auction_item ai
+        JOIN auction a ON ai.auctionID = a.auctionID
+        WHERE ai.itemID = %s
+    """,
+    # GET /items/<id>
+    'item_by_id': """
+        SELECT
+            ai.itemID, ai.title, ai.description, ai.start_price,
+            ai.status, ai.reserve_price, ai.categoryID, ai.auctionID,
+            ai.winnerID,
+            c.name AS winnerName
+        FROM
+            auction_item ai
+        LEFT JOIN
+            customer c ON ai.winnerID = c.userID
+        WHERE
+            ai.itemID = %s
+    """,
+    # POST /payments
+    'payment_winner': "SELECT winnerID, status, get_current_price(itemID) AS amount FROM auction_item WHERE itemID = %s",
+}
+
+ENABLED = os.getenv('PREPARED_STATEMENTS', '1') == '1'
+
+metrics.name_queries({query: name for name, query in HOT_QUERIES.items()})
+
+
+def run_hot_query(conn, name, params):
+    """
+    Runs HOT_QUERIES[name] with `params` and returns every row as a dict.
+    Rows are always read to the end, so the cached cursor is free for the next caller.
+    """
+    query = HOT_QUERIES[name]
+    cache = getattr(conn, 'statements', None) if ENABLED else None
+    if cache is None:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    for attempt in (1, 2):
+        cursor = cache.get(name)
+        if cursor is None:
+            cursor = cache[name] = conn.cursor(prepared=True, dictionary=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            if e.errno != ER_UNKNOWN_STMT_HANDLER or attempt == 2:
+                raise
+            # The server no longer knows the statement (session reset behind our back): prepare it again.
+            cache.pop(name, None)
+
+
+def run_hot_query_one(conn, name, params):
+    rows = run_hot_query(conn, name, params)
+    return rows[0] if rows else None
@@ -0,0 +1,65 @@
+from flask import Response, current_app, jsonify, request, stream_with_context
+import mysql.connector
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CHUNK_SIZE = 500
+
+
+def wants_ndjson():
+    """True when the client asked for `Accept: application/x-ndjson` over plain JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_query(get_connection, query, params=(), transform=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams a query result as NDJSON, one JSON object per line.
+
+    Rows are pulled `chunk_size` at a time from an unbuffered cursor, so memory
+    stays flat no matter how many rows match. `transform(rows)` may rewrite each
+    chunk before it is serialized. The connection is owned by the stream and is
+    returned to the pool when the stream finishes, or closed if the client disconnects
+    before the end.
+    """
+    conn = get_connection()
+    if conn is None:
+        return jsonify({"error": "Could not connect to database"}), 500
+
+    try:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
+    except mysql.connector.Error as e:
+        conn.close()
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    exhausted = []
+
+    def generate():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    exhausted.append(True)
+                    return
+                if transform:
+                    rows = transform(rows)
+                yield ''.join(current_app.json.dumps(row) + '\n' for row in rows)
+        except mysql.connector.Error as e:
+            print(f"Error while streaming rows: {e}")
+
+    def release():
+        if exhausted:
+            try:
+                cursor.close()
+            except mysql.connector.Error as e:
+                print(f"Error closing streaming cursor: {e}")
+        else:
+            # Client went away mid-stream, never read the body (HEAD), or the read failed.
+            # Reading off the rest of a large result would hold the worker for nothing.
+            conn.discard()
+        conn.close()
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    # Runs when the server closes the response, even if generate() never started.
+    response.call_on_close(release)
+    return response
@@ -0,0 +1,7 @@
+"""
+WSGI entry point for production servers, e.g. the pre-fork runner in gunicorn.conf.py:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from server import create_app
+
+app = create_app()
@@ -0,0 +1,98 @@
+"""
+Compares the Flask (WSGI) backend with the ASGI entry point under the same load:
+GET /items/<id> and POST /bid from many clients, optionally while many SSE streams stay open.
+
+Start the backend one way, run the benchmark, then restart it the other way and run it again:
+    cd backend && python server.py                      # or: uvicorn asgi:app --port 5000
+    python benchmarks/asgi_vs_wsgi.py --clients 200 --sse-clients 1000 --label wsgi
+    python benchmarks/asgi_vs_wsgi.py --clients 200 --sse-clients 1000 --label asgi
+
+`sse` in the output reports how many of the --sse-clients streams were opened (got their
+snapshot event) and how many events they received during the run.
+"""
+import argparse
+import json
+import threading
+import time
+
+import requests
+
+from fixtures import create_live_auction, login_sessions, run_mixed_load, summarize
+
+
+def hold_stream(url, stop, counters, lock):
+    """Keeps one SSE stream open until `stop` is set, counting the events it receives."""
+    try:
+        with requests.get(url, stream=True, timeout=(10, 30)) as response:
+            if response.status_code != 200:
+                with lock:
+                    counters["failed"] += 1
+                return
+            opened = False
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith('event: '):
+                    with lock:
+                        if not opened:
+                            opened = True
+                            counters["opened"] += 1
+                        else:
+                            counters["events"] += 1
+                if stop.is_set():
+                    return
+    except requests.RequestException:
+        with lock:
+            counters["failed"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--bid-ratio", type=float, default=0.3, help="share of requests that are POST /bid")
+    parser.add_argument("--sse-clients", type=int, default=0, help="SSE streams held open during the run")
+    parser.add_argument("--label", default="run")
+    args = parser.parse_args()
+
+    _, item_ids = create_live_auction(args.base_url, args.items)
+    headers = login_sessions(args.base_url)
+    lock = threading.Lock()
+
+    stop = threading.Event()
+    sse = {"opened": 0, "failed": 0, "events": 0}
+    holders = [
+        threading.Thread(target=hold_stream, daemon=True,
+                         args=(f"{args.base_url}/items/{item_ids[n % len(item_ids)]}/stream", stop, sse, lock))
+        for n in range(args.sse_clients)
+    ]
+    for thread in holders:
+        thread.start()
+    if holders:
+        # Let the streams connect before the timed part starts.
+        wait_until = time.monotonic() + 30
+        while time.monotonic() < wait_until and sse["opened"] + sse["failed"] < len(holders):
+            time.sleep(0.1)
+
+    results = run_mixed_load(args.base_url, item_ids, headers, args.clients, args.seconds, args.bid_ratio)
+    stop.set()
+
+    all_latencies = [v for latencies, _ in results.values() for v in latencies]
+    all_statuses = {}
+    for _, statuses in results.values():
+        for code, count in statuses.items():
+            all_statuses[code] = all_statuses.get(code, 0) + count
+    output = {
+        "label": args.label,
+        "clients": args.clients,
+        "items": args.items,
+        "total": summarize(all_latencies, all_statuses, args.seconds),
+        "endpoints": {key: summarize(latencies, statuses, args.seconds) for key, (latencies, statuses) in results.items()},
+    }
+    if holders:
+        output["sse"] = {"requested": len(holders), **sse}
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Checks that concurrent bids are accepted one at a time per item, and measures POST /bid
+throughput on one hot item versus bids spread over many items. Prints JSON results.
+
+    python benchmarks/bid_contention.py --bidders 100 --seconds 20 --label after
+
+Each bidder is a new customer that loops: read the item (GET /items/<id>), then bid its
+price plus a random step of 1-3. Many bidders read the same price at once, so most rounds
+race equal or crossing bids for the same row. Scenarios:
+  hot     every bidder on one item
+  spread  the same bidders over the --spread-items items of one auction
+
+Afterwards the bids stored in MySQL are compared with what the API answered, per item:
+  * every 201 has its stored bid, and every stored bid got a 201 (a 5xx or a lost
+    connection may have gone either way, and is only reported);
+  * no two accepted bids have the same amount;
+  * the accepted bids fit real time: a bid sent after another one was acknowledged is
+    higher than it;
+  * current_price, bid_count and leading_custID are those of the highest accepted bid.
+A violation is printed and the script exits with 1. Lock retries are read from
+bid_lock_retries_total on GET /metrics (one worker's count behind a pre-fork server).
+Reads the bid table as auction_admin (--mysql-* options).
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+import requests
+
+from fixtures import create_bidders, create_live_auction, percentile
+
+
+def lock_retries(base_url):
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=10).text
+    except requests.RequestException:
+        return None
+    return sum(float(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+               if line.startswith('bid_lock_retries_total'))
+
+
+def run_bidders(args, bidders, item_ids):
+    """Returns [(custID, itemID, amount, status, sent, answered)] for every POST /bid."""
+    deadline = time.monotonic() + args.seconds
+    lock = threading.Lock()
+    attempts = []
+
+    def bidder(n):
+        custID, headers = bidders[n]
+        rng = random.Random(n)
+        session = requests.Session()
+        session.headers.update(headers)
+        local = []
+        i = 0
+        while time.monotonic() < deadline:
+            itemID = item_ids[(n + i) % len(item_ids)]
+            i += 1
+            try:
+                price = session.get(f"{args.base_url}/items/{itemID}", timeout=30).json()['current_price']
+            except (requests.RequestException, ValueError, KeyError):
+                continue
+            amount = price + rng.randint(1, 3)
+            sent = time.monotonic()
+            try:
+                status = session.post(f"{args.base_url}/bid", json={"itemID": itemID, "amount": amount},
+                                      timeout=30).status_code
+            except requests.RequestException:
+                status = "connection_error"
+            local.append((custID, itemID, amount, status, sent, time.monotonic()))
+        with lock:
+            attempts.extend(local)
+
+    with ThreadPoolExecutor(max_workers=len(bidders)) as pool:
+        list(pool.map(bidder, range(len(bidders))))
+    return attempts
+
+
+def check_item(cursor, itemID, attempts):
+    """Violations of the bid invariants on one item, as readable lines."""
+    problems = []
+    accepted = [a for a in attempts if a[1] == itemID and a[3] == 201]
+    unknown = sum(1 for a in attempts if a[1] == itemID and not (isinstance(a[3], int) and a[3] < 500))
+
+    cursor.execute("SELECT custID, amount FROM bid WHERE itemID = %s", (itemID,))
+    stored = Counter(cursor.fetchall())
+    acknowledged = Counter((custID, amount) for custID, _, amount, *_ in accepted)
+    missing = list((acknowledged - stored).elements())
+    extra = (stored - acknowledged).total()
+    if missing:
+        problems.append(f"{itemID}: {len(missing)} acknowledged bids are not stored, e.g. {missing[:3]}")
+    if extra > unknown:
+        problems.append(f"{itemID}: {extra} stored bids were not acknowledged ({unknown} requests had no clear answer)")
+
+    amounts = [amount for _, amount in acknowledged.elements()]
+    if len(set(amounts)) != len(amounts):
+        problems.append(f"{itemID}: {len(amounts) - len(set(amounts))} accepted bids repeat an accepted amount")
+
+    # Going down the amounts, the earliest acknowledgment of any higher bid must not precede this bid's send.
+    earliest_higher_answer = float('inf')
+    for custID, _, amount, _, sent, answered in sorted(accepted, key=lambda a: -a[2]):
+        if earliest_higher_answer < sent:
+            problems.append(f"{itemID}: {custID}'s bid of {amount} was accepted after a higher bid was acknowledged")
+            break
+        earliest_higher_answer = min(earliest_higher_answer, answered)
+
+    cursor.execute("SELECT current_price, bid_count, leading_custID FROM auction_item WHERE itemID = %s", (itemID,))
+    current_price, bid_count, leader = cursor.fetchone()
+    if accepted:
+        best = max(accepted, key=lambda a: a[2])
+        if (current_price, leader) != (best[2], best[0]) and not unknown:
+            problems.append(f"{itemID}: item shows {current_price} by {leader}, highest accepted bid is {best[2]} by {best[0]}")
+    if bid_count != stored.total():
+        problems.append(f"{itemID}: bid_count is {bid_count}, {stored.total()} bids are stored")
+    return problems
+
+
+def summarize(attempts, seconds, retries):
+    latencies = sorted(answered - sent for *_, sent, answered in attempts)
+    statuses = {}
+    for attempt in attempts:
+        statuses[str(attempt[3])] = statuses.get(str(attempt[3]), 0) + 1
+    accepted = statuses.get('201', 0)
+    return {
+        "bids": len(attempts),
+        "bids_per_second": round(len(attempts) / seconds, 1),
+        "accepted_per_second": round(accepted / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "statuses": statuses,
+        "lock_retries": retries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--bidders", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--spread-items", type=int, default=50)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--mysql-host", default="localhost")
+    parser.add_argument("--mysql-user", default="auction_admin")
+    parser.add_argument("--mysql-password", default="123")
+    args = parser.parse_args()
+
+    bidders = list(create_bidders(args.base_url, args.bidders).items())
+    conn = mysql.connector.connect(host=args.mysql_host, user=args.mysql_user, password=args.mysql_password,
+                                   database='auction', autocommit=True)
+    results = {"label": args.label, "bidders": args.bidders, "scenarios": {}}
+    problems = []
+    try:
+        cursor = conn.cursor()
+        for name, n_items in (("hot", 1), ("spread", args.spread_items)):
+            _, item_ids = create_live_auction(args.base_url, n_items)
+            retries_before = lock_retries(args.base_url)
+            started = time.monotonic()
+            attempts = run_bidders(args, bidders, item_ids)
+            seconds = time.monotonic() - started
+            retries_after = lock_retries(args.base_url)
+            retries = retries_after - retries_before if None not in (retries_before, retries_after) else None
+            scenario_problems = [line for itemID in item_ids for line in check_item(cursor, itemID, attempts)]
+            results["scenarios"][name] = {"items": n_items, **summarize(attempts, seconds, retries),
+                                          "violations": len(scenario_problems)}
+            problems += scenario_problems
+    finally:
+        conn.close()
+
+    print(json.dumps(results, indent=2))
+    for line in problems:
+        print(f"VIOLATION {line}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures POST /bid latency with many concurrent bidders spread over the items of one live auction.
+
+Run it once against the old build and once against the new one, with the same arguments,
+and compare the two JSON outputs (e.g. --label before / --label after):
+    python benchmarks/bid_latency.py --bidders 500 --items 50 --seconds 30 --label after
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fixtures import SAMPLE_CUSTOMERS, create_live_auction, login_sessions, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--bidders", type=int, default=500)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--label", default="run")
+    args = parser.parse_args()
+
+    _, item_ids = create_live_auction(args.base_url, args.items)
+    headers = login_sessions(args.base_url)
+    amounts = itertools.count(1000)  # shared and rising, so most bids are valid when they arrive
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    deadline = time.monotonic() + args.seconds
+
+    def bidder(n):
+        session = requests.Session()
+        session.headers.update(headers[SAMPLE_CUSTOMERS[n % len(SAMPLE_CUSTOMERS)]])
+        local = []
+        local_status = {}
+        i = 0
+        while time.monotonic() < deadline:
+            bid = {
+                "custID": SAMPLE_CUSTOMERS[n % len(SAMPLE_CUSTOMERS)],
+                "itemID": item_ids[(n + i) % len(item_ids)],
+                "amount": next(amounts),
+            }
+            started = time.perf_counter()
+            try:
+                code = session.post(f"{args.base_url}/bid", json=bid, timeout=30).status_code
+            except requests.RequestException:
+                code = "connection_error"
+            local.append(time.perf_counter() - started)
+            local_status[code] = local_status.get(code, 0) + 1
+            i += 1
+        with lock:
+            latencies.extend(local)
+            for code, count in local_status.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    with ThreadPoolExecutor(max_workers=args.bidders) as pool:
+        list(pool.map(bidder, range(args.bidders)))
+
+    print(json.dumps({
+        "label": args.label,
+        "bidders": args.bidders,
+        "items": args.items,
+        **summarize(latencies, statuses, args.seconds),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares bid ingestion throughput of POST /bid (one request per bid) against POST /bids/batch.
+
+Usage:
+    python benchmarks/bid_throughput.py --bids 2000 --items 20 --batch-size 500
+"""
+import argparse
+import json
+import time
+
+from fixtures import SAMPLE_CUSTOMERS, create_live_auction, login_session
+
+
+def make_bids(item_ids, n_bids, start_price):
+    """Rising bids spread round-robin over the items, so every bid should be accepted. All are placed by one customer."""
+    bids = []
+    for n in range(n_bids):
+        item_id = item_ids[n % len(item_ids)]
+        round_no = n // len(item_ids)
+        bids.append({
+            "custID": SAMPLE_CUSTOMERS[0],
+            "itemID": item_id,
+            "amount": start_price + 10 * (round_no + 1),
+        })
+    return bids
+
+
+def run_single(base_url, bids):
+    session = login_session(base_url, SAMPLE_CUSTOMERS[0])
+    accepted = 0
+    started = time.perf_counter()
+    for bid in bids:
+        if session.post(f"{base_url}/bid", json=bid).status_code == 201:
+            accepted += 1
+    return accepted, time.perf_counter() - started
+
+
+def run_batch(base_url, bids, batch_size):
+    session = login_session(base_url, SAMPLE_CUSTOMERS[0])
+    accepted = 0
+    started = time.perf_counter()
+    for i in range(0, len(bids), batch_size):
+        response = session.post(f"{base_url}/bids/batch", json={"bids": bids[i:i + batch_size]})
+        response.raise_for_status()
+        accepted += response.json()["summary"].get("accepted", 0)
+    return accepted, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--bids", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--start-price", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("single", "batch"):
+        _, item_ids = create_live_auction(args.base_url, args.items, start_price=args.start_price)
+        bids = make_bids(item_ids, args.bids, args.start_price)
+        if mode == "single":
+            accepted, elapsed = run_single(args.base_url, bids)
+        else:
+            accepted, elapsed = run_batch(args.base_url, bids, args.batch_size)
+        results[mode] = {
+            "bids": len(bids),
+            "accepted": accepted,
+            "seconds": round(elapsed, 3),
+            "bids_per_second": round(len(bids) / elapsed, 1),
+        }
+    results["speedup"] = round(results["batch"]["bids_per_second"] / results["single"]["bids_per_second"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures how long a freshly started backend takes to serve traffic.
+
+Starts the backend command, polls GET /ready until it answers 200, then stops the
+process. Repeats --runs times. For every run it reports:
+    listening_ms  first HTTP response of any kind (the port is open)
+    ready_ms      first 200 from GET /ready (pools and caches warmed)
+    startup       the worker's own timings from /ready (import, app creation, warm-up)
+
+    python benchmarks/cold_start.py --runs 5 --label flask
+    python benchmarks/cold_start.py --runs 5 --label gunicorn --command "gunicorn -c gunicorn.conf.py wsgi:app"
+"""
+import argparse
+import json
+import os
+import shlex
+import signal
+import statistics
+import subprocess
+import time
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+
+def one_run(args):
+    started = time.monotonic()
+    process = subprocess.Popen(shlex.split(args.command), cwd=BACKEND_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    listening_ms = None
+    try:
+        while time.monotonic() - started < args.timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"backend exited with code {process.returncode}")
+            try:
+                response = requests.get(f"{args.base_url}/ready", timeout=args.timeout)
+            except requests.RequestException:
+                time.sleep(args.poll)
+                continue
+            elapsed = round(1000 * (time.monotonic() - started), 1)
+            if listening_ms is None:
+                listening_ms = elapsed
+            if response.status_code == 200:
+                return {"listening_ms": listening_ms, "ready_ms": elapsed, "startup": response.json().get("startup")}
+            time.sleep(args.poll)
+        raise RuntimeError(f"backend not ready after {args.timeout}s")
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--command", default="python server.py", help="run from the backend folder")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--poll", type=float, default=0.02)
+    parser.add_argument("--label", default="run")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        runs.append(one_run(args))
+        time.sleep(0.5)  # let the port close before the next start
+
+    print(json.dumps({
+        "label": args.label,
+        "command": args.command,
+        "listening_ms_median": statistics.median(r["listening_ms"] for r in runs),
+        "ready_ms_median": statistics.median(r["ready_ms"] for r in runs),
+        "runs": runs,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Helpers that set up a live auction through the public API for the benchmark scripts.
+Expects the backend to be running against a database loaded from Online_Auction.sql.
+"""
+import itertools
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+SAMPLE_CUSTOMERS = ['C001', 'C002', 'C003', 'C004', 'C005']
+SAMPLE_PASSWORDS = {'C001': 'pass123', 'C002': 'pass234', 'C003': 'pass345', 'C004': 'pass456', 'C005': 'pass567'}
+
+
+def login_session(base_url, custID, password=None):
+    """Returns a requests.Session that sends custID's session token with every request."""
+    session = requests.Session()
+    response = session.post(f"{base_url}/login", json={"userID": custID, "password": password or SAMPLE_PASSWORDS[custID]})
+    response.raise_for_status()
+    session.headers["Authorization"] = f"Bearer {response.json()['token']}"
+    return session
+
+
+def login_sessions(base_url, customers=SAMPLE_CUSTOMERS):
+    """Logs every customer in once. Returns {custID: token header}, for sharing between many client threads."""
+    return {custID: dict(login_session(base_url, custID).headers) for custID in customers}
+
+
+def create_bidders(base_url, n, password='bench-pass'):
+    """Signs up `n` new customers and logs them in. Returns {custID: token header}."""
+    tag = uuid.uuid4().hex[:5].upper()
+
+    def sign_up(i):
+        custID = f"L{tag}{i:03d}"
+        response = requests.post(f"{base_url}/customers", json={
+            "userID": custID, "name": f"Bench bidder {i}", "phone": "9000000000",
+            "email": f"{custID.lower()}@bench.example", "address": "Bench", "password": password,
+        })
+        response.raise_for_status()
+        return custID, dict(login_session(base_url, custID, password).headers)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return dict(pool.map(sign_up, range(n)))
+
+
+def create_live_auction(base_url, n_items, start_price=100, duration_minutes=60, auctioneer='C001'):
+    """Creates an auction that is open right now with `n_items` items. Returns (auctionID, [itemIDs])."""
+    tag = uuid.uuid4().hex[:5].upper()
+    auction_id = f"B{tag}"
+    now = datetime.now()
+    response = requests.post(f"{base_url}/auctions", json={
+        "auctionID": auction_id,
+        "auction_name": f"Bench {tag}",
+        "start_time": (now - timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S'),
+        "end_time": (now + timedelta(minutes=duration_minutes)).strftime('%Y-%m-%d %H:%M:%S'),
+        "userID": auctioneer,
+    })
+    response.raise_for_status()
+
+    item_ids = []
+    for i in range(n_items):
+        item_id = f"{tag}{i:04d}"
+        response = requests.post(f"{base_url}/items", json={
+            "itemID": item_id, "title": f"Bench item {i}", "description": "benchmark",
+            "start_price": start_price, "reserve_price": start_price,
+            "categoryID": "CAT01", "auctionID": auction_id,
+        })
+        response.raise_for_status()
+        item_ids.append(item_id)
+
+    requests.post(f"{base_url}/auctions/start-scheduled").raise_for_status()
+    return auction_id, item_ids
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies, statuses, seconds):
+    """Request count, throughput, status codes and p50/p95/p99 in ms for one set of timed requests."""
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "status_codes": {str(k): v for k, v in statuses.items()},
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+def run_mixed_load(base_url, item_ids, headers, clients, seconds, bid_ratio):
+    """
+    Runs `clients` threads for `seconds`, each sending GET /items/<id> or, `bid_ratio` of the time,
+    POST /bid on random items as one of the logged-in customers in `headers` ({custID: token header}).
+    Returns {"GET /items/<id>": (latencies, statuses), "POST /bid": (latencies, statuses)}.
+    """
+    customers = list(headers)
+    amounts = itertools.count(1000)  # shared and rising, so most bids are valid when they arrive
+    lock = threading.Lock()
+    results = {"GET /items/<id>": ([], {}), "POST /bid": ([], {})}
+    deadline = time.monotonic() + seconds
+
+    def client(n):
+        session = requests.Session()
+        session.headers.update(headers[customers[n % len(customers)]])
+        rng = random.Random(n)
+        local = {key: ([], {}) for key in results}
+        while time.monotonic() < deadline:
+            itemID = rng.choice(item_ids)
+            started = time.perf_counter()
+            try:
+                if rng.random() < bid_ratio:
+                    key = "POST /bid"
+                    code = session.post(f"{base_url}/bid", json={"itemID": itemID, "amount": next(amounts)},
+                                        timeout=30).status_code
+                else:
+                    key = "GET /items/<id>"
+                    code = session.get(f"{base_url}/items/{itemID}", timeout=30).status_code
+            except requests.RequestException:
+                code = "connection_error"
+            latencies, statuses = local[key]
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+        with lock:
+            for key, (latencies, statuses) in local.items():
+                results[key][0].extend(latencies)
+                for code, count in statuses.items():
+                    results[key][1][code] = results[key][1].get(code, 0) + count
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return results
@@ -0,0 +1,320 @@
+"""
+End-to-end load test of the auction API with realistic request mixes. Prints JSON results.
+
+Scenarios (--scenario, or `all` to run them one after the other):
+  browse     pollers list items and auctions, open items and revalidate with If-None-Match
+             like the CLI does, while a few clients bid so the listings keep changing
+  bid_war    many bidders on one hot item, each reading the price and bidding just above it
+  sniping    a short auction: bidders wait for its last --snipe-window seconds, then all bid
+             at once until just after it closes (late bids are rejected)
+  checkout   rounds of: auction closes, admin finalizes it, winners list their winnings and pay
+
+Start the backend against a database loaded from Online_Auction.sql, then e.g.:
+    cd backend && python server.py
+    python benchmarks/load_test.py --scenario all --seconds 30 --out bench/$(git rev-parse --short HEAD).json
+    python benchmarks/load_test.py --scenario all --seconds 30 --compare bench/main.json
+
+For every scenario and endpoint the results hold requests, throughput, p50/p95/p99
+latency, the error rate (5xx, connection errors, unexpected 4xx) and the rejection rate
+(400/409: the API refused on business grounds, e.g. bid too low or auction closed).
+With --compare, the run is checked against an earlier results file. It exits with 1 if
+an endpoint's p99 grew, or its throughput fell, by more than --max-regression (default
+0.2 = 20%), or its error rate rose by more than one percentage point.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from fixtures import create_bidders, create_live_auction, percentile
+
+REJECTED = {400, 409}
+
+
+class Recorder:
+    """Latencies and status codes per endpoint, shared by all client threads of a scenario."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}  # name -> ([seconds], {status: count})
+        self.started = time.monotonic()
+
+    def call(self, name, session, method, url, **kwargs):
+        """Sends one request and records it under `name`. Returns the response, or None on a connection error."""
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=30, **kwargs)
+            code = response.status_code
+        except requests.RequestException:
+            response, code = None, "connection_error"
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            latencies, statuses = self.endpoints.setdefault(name, ([], {}))
+            latencies.append(elapsed)
+            statuses[code] = statuses.get(code, 0) + 1
+        return response
+
+    def results(self):
+        seconds = time.monotonic() - self.started
+        endpoints = {name: summarize(latencies, statuses, seconds)
+                     for name, (latencies, statuses) in sorted(self.endpoints.items())}
+        all_latencies = [v for latencies, _ in self.endpoints.values() for v in latencies]
+        all_statuses = {}
+        for _, statuses in self.endpoints.values():
+            for code, count in statuses.items():
+                all_statuses[code] = all_statuses.get(code, 0) + count
+        return {"seconds": round(seconds, 2), "total": summarize(all_latencies, all_statuses, seconds),
+                "endpoints": endpoints}
+
+
+def summarize(latencies, statuses, seconds):
+    latencies = sorted(latencies)
+    total = len(latencies)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    rejected = sum(count for code, count in statuses.items() if code in REJECTED)
+    ok = sum(count for code, count in statuses.items() if isinstance(code, int) and (200 <= code < 300 or code == 304))
+    return {
+        "requests": total,
+        "requests_per_second": round(total / seconds, 1) if seconds else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "error_rate": round((total - ok - rejected) / total, 4) if total else 0.0,
+        "rejection_rate": round(rejected / total, 4) if total else 0.0,
+        "status_codes": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def run_clients(n, client):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        list(pool.map(client, range(n)))
+
+
+def client_session(headers):
+    session = requests.Session()
+    session.headers.update(headers)
+    return session
+
+
+def current_price(response):
+    try:
+        return response.json()['current_price']
+    except (AttributeError, ValueError, KeyError, TypeError):
+        return None
+
+
+# --- scenarios ---
+
+def browse(args, bidders):
+    auction_id, item_ids = create_live_auction(args.base_url, args.items)
+    recorder = Recorder()
+    deadline = time.monotonic() + args.seconds
+    bidder_headers = list(bidders.values())
+    amounts = itertools.count(1000)
+    base = args.base_url
+    polls = [
+        ("GET /items", lambda rng: f"{base}/items?limit=20"),
+        ("GET /items?auctionID", lambda rng: f"{base}/items?auctionID={auction_id}&limit=50"),
+        ("GET /auctions?status", lambda rng: f"{base}/auctions?status=Active&limit=20"),
+        ("GET /auctions/<id>/items", lambda rng: f"{base}/auctions/{auction_id}/items"),
+        ("GET /items/<id>", lambda rng: f"{base}/items/{rng.choice(item_ids)}"),
+    ]
+
+    def client(n):
+        rng = random.Random(n)
+        session = client_session(bidder_headers[n % len(bidder_headers)])
+        etags = {}
+        bidding = n < max(1, args.clients // 20)  # about 5% of the clients bid
+        while time.monotonic() < deadline:
+            if bidding and rng.random() < 0.5:
+                recorder.call("POST /bid", session, "POST", f"{base}/bid",
+                              json={"itemID": rng.choice(item_ids), "amount": next(amounts)})
+            else:
+                name, url = rng.choice(polls)
+                url = url(rng)
+                headers = {"If-None-Match": etags[url]} if url in etags else {}
+                response = recorder.call(name, session, "GET", url, headers=headers)
+                if response is not None and response.headers.get("ETag"):
+                    etags[url] = response.headers["ETag"]
+            if args.think:
+                time.sleep(rng.uniform(0, 2 * args.think))
+
+    run_clients(args.clients, client)
+    return recorder.results()
+
+
+def bid_war(args, bidders):
+    _, (item_id,) = create_live_auction(args.base_url, 1)
+    recorder = Recorder()
+    deadline = time.monotonic() + args.seconds
+    bidder_headers = list(bidders.values())
+
+    def client(n):
+        rng = random.Random(n)
+        session = client_session(bidder_headers[n % len(bidder_headers)])
+        while time.monotonic() < deadline:
+            price = current_price(recorder.call("GET /items/<id>", session, "GET", f"{args.base_url}/items/{item_id}"))
+            if price is None:
+                continue
+            recorder.call("POST /bid", session, "POST", f"{args.base_url}/bid",
+                          json={"itemID": item_id, "amount": price + rng.randint(1, 10)})
+
+    run_clients(args.clients, client)
+    return recorder.results()
+
+
+def sniping(args, bidders):
+    lead = args.snipe_window + 5
+    _, item_ids = create_live_auction(args.base_url, args.snipe_items, duration_minutes=lead / 60)
+    closes_at = time.monotonic() + lead
+    bidder_headers = list(bidders.values())
+    amounts = {item_id: itertools.count(1000) for item_id in item_ids}
+    time.sleep(max(0.0, closes_at - args.snipe_window - time.monotonic()))
+    recorder = Recorder()
+
+    def client(n):
+        rng = random.Random(n)
+        session = client_session(bidder_headers[n % len(bidder_headers)])
+        # Keep bidding a little past the close, like clients whose clocks run late.
+        while time.monotonic() < closes_at + 2:
+            item_id = rng.choice(item_ids)
+            recorder.call("POST /bid", session, "POST", f"{args.base_url}/bid",
+                          json={"itemID": item_id, "amount": next(amounts[item_id])})
+
+    run_clients(args.clients, client)
+    return recorder.results()
+
+
+def checkout(args, bidders):
+    recorder = Recorder()
+    deadline = time.monotonic() + args.seconds
+    sessions = {custID: client_session(headers) for custID, headers in bidders.items()}
+    customers = list(sessions)
+    admin = requests.Session()
+    rounds = 0
+    while time.monotonic() < deadline:
+        auction_id, item_ids = create_live_auction(args.base_url, args.items, duration_minutes=args.round_seconds / 60)
+        closes_at = time.monotonic() + args.round_seconds
+        rng = random.Random(rounds)
+
+        def bid(item_id):
+            session = sessions[rng.choice(customers)]
+            recorder.call("POST /bid", session, "POST", f"{args.base_url}/bid",
+                          json={"itemID": item_id, "amount": 500 + rng.randint(1, 500)})
+
+        with ThreadPoolExecutor(max_workers=min(args.clients, len(item_ids))) as pool:
+            list(pool.map(bid, item_ids))
+        time.sleep(max(0.0, closes_at - time.monotonic() + 1))
+
+        recorder.call("POST /auctions/<id>/finalize", admin, "POST", f"{args.base_url}/auctions/{auction_id}/finalize")
+
+        def pay(custID):
+            session = sessions[custID]
+            response = recorder.call("GET /customers/<id>/winnings", session, "GET",
+                                     f"{args.base_url}/customers/{custID}/winnings")
+            try:
+                won = [row['itemID'] for row in response.json() if row['itemID'] in item_ids]
+            except (AttributeError, ValueError, KeyError, TypeError):
+                return
+            for item_id in won:
+                recorder.call("POST /payments", session, "POST", f"{args.base_url}/payments",
+                              json={"itemID": item_id, "paymentMethod": "UPI"})
+
+        run_clients(min(args.clients, len(customers)), lambda n: [pay(c) for c in customers[n::args.clients]])
+        rounds += 1
+    results = recorder.results()
+    results["rounds"] = rounds
+    return results
+
+
+SCENARIOS = {"browse": browse, "bid_war": bid_war, "sniping": sniping, "checkout": checkout}
+
+
+# --- comparison ---
+
+def compare(results, baseline, max_regression):
+    """Returns the regressions of `results` against `baseline`, as readable lines."""
+    problems = []
+    for scenario, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        for endpoint, now in current["endpoints"].items():
+            then = before["endpoints"].get(endpoint)
+            if not then or not then["requests"]:
+                continue
+            where = f"{scenario} {endpoint}"
+            if then["p99_ms"] and now["p99_ms"] and now["p99_ms"] > then["p99_ms"] * (1 + max_regression):
+                problems.append(f"{where}: p99 {then['p99_ms']} ms -> {now['p99_ms']} ms")
+            if then["requests_per_second"] and now["requests_per_second"] is not None \
+                    and now["requests_per_second"] < then["requests_per_second"] * (1 - max_regression):
+                problems.append(f"{where}: {then['requests_per_second']} -> {now['requests_per_second']} requests/s")
+            if now["error_rate"] > then["error_rate"] + 0.01:
+                problems.append(f"{where}: error rate {then['error_rate']} -> {now['error_rate']}")
+    return problems
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients per scenario")
+    parser.add_argument("--bidders", type=int, default=50, help="customer accounts created for the run")
+    parser.add_argument("--seconds", type=float, default=30, help="duration of browse, bid_war and checkout")
+    parser.add_argument("--items", type=int, default=20, help="items per auction (browse, checkout)")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a browse client's requests")
+    parser.add_argument("--snipe-items", type=int, default=3)
+    parser.add_argument("--snipe-window", type=float, default=5.0, help="seconds before the close when bidding starts")
+    parser.add_argument("--round-seconds", type=float, default=5.0, help="bidding time of each checkout auction")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--out", help="also write the results to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file of an earlier run to check against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    bidders = create_bidders(args.base_url, args.bidders)
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    output = {
+        "label": args.label,
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        output["scenarios"][name] = SCENARIOS[name](args, bidders)
+
+    text = json.dumps(output, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(output, json.load(f), args.max_regression)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures GET /items/<id> and POST /bid under concurrent load, together with MySQL's
+statement counters, to compare prepared hot queries against plain text queries.
+
+Start the backend once with PREPARED_STATEMENTS=1 (default) and once with PREPARED_STATEMENTS=0,
+run the same command against each and compare the two JSON outputs:
+    python benchmarks/prepared_statements.py --clients 64 --seconds 30 --label prepared
+    python benchmarks/prepared_statements.py --clients 64 --seconds 30 --label text
+
+`mysql` in the output is the change in server counters during the run:
+Com_select counts text SELECTs MySQL had to parse, and Com_stmt_execute counts
+executions of already prepared statements. Pass --no-mysql-counters to skip them.
+"""
+import argparse
+import json
+
+from fixtures import create_live_auction, login_sessions, run_mixed_load, summarize
+
+COUNTERS = ('Com_select', 'Com_stmt_prepare', 'Com_stmt_execute', 'Com_call_procedure', 'Questions')
+
+
+def read_counters(args):
+    import mysql.connector
+    conn = mysql.connector.connect(host=args.mysql_host, user=args.mysql_user, password=args.mysql_password)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS WHERE Variable_name IN (%s)" % ', '.join(['%s'] * len(COUNTERS)), COUNTERS)
+        return {name: int(value) for name, value in cursor.fetchall()}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--bid-ratio", type=float, default=0.3, help="share of requests that are POST /bid")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--mysql-host", default="localhost")
+    parser.add_argument("--mysql-user", default="auction_admin")
+    parser.add_argument("--mysql-password", default="123")
+    parser.add_argument("--no-mysql-counters", action="store_true")
+    args = parser.parse_args()
+
+    _, item_ids = create_live_auction(args.base_url, args.items)
+    headers = login_sessions(args.base_url)
+
+    before = None if args.no_mysql_counters else read_counters(args)
+    results = run_mixed_load(args.base_url, item_ids, headers, args.clients, args.seconds, args.bid_ratio)
+
+    output = {
+        "label": args.label,
+        "clients": args.clients,
+        "items": args.items,
+        "endpoints": {key: summarize(latencies, statuses, args.seconds) for key, (latencies, statuses) in results.items()},
+    }
+    if before is not None:
+        after = read_counters(args)
+        output["mysql"] = {name: after.get(name, 0) - before.get(name, 0) for name in COUNTERS}
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Micro-benchmark of the list endpoints' Python work after the query: turning cursor rows
+into row objects, formatting auction times and encoding the JSON response. Runs in
+process, without a database or a server. Prints JSON results.
+
+    python benchmarks/serialization.py --rows 100000
+
+Two pipelines on the same synthetic rows (tuples, as a plain cursor returns them):
+  dict     one dict per row (what cursor(dictionary=True) builds), strftime per value,
+           Flask's default JSON provider
+  compact  rows.RowType slotted rows, rows.format_datetime_columns, fast_json's orjson
+           provider (if orjson is installed)
+For each dataset and pipeline: CPU seconds per stage (best of --repeat) and the memory
+held by the row objects (tracemalloc).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from fast_json import FastJSONProvider, orjson  # noqa: E402
+from rows import RowType, format_datetime_columns  # noqa: E402
+
+TIME_FORMAT = "%a, %d %b %Y %H:%M:%S IST"
+
+
+def auction_rows(n):
+    columns = ('auctionID', 'auction_name', 'start_time', 'end_time', 'status', 'userID')
+    base = datetime(2025, 1, 1, 9, 0)
+    rows = []
+    for i in range(n):
+        start = base + timedelta(minutes=37 * i)
+        rows.append((f"A{i:07d}", f"Auction {i}", start, start + timedelta(days=3), 'Active', f"C{i % 5000:07d}"))
+    return columns, rows
+
+
+def item_rows(n):
+    columns = ('itemID', 'title', 'description', 'start_price', 'reserve_price', 'categoryID', 'auctionID')
+    return columns, [(f"I{i:08d}", f"Item {i}", f"Generated item {i}", 100 + i % 900, 200 + i % 900,
+                      f"CAT{i % 20:04d}", f"A{i // 25:07d}") for i in range(n)]
+
+
+def dict_rows(columns, rows, extra):
+    built = [dict(zip(columns, row)) for row in rows]
+    for row in built:
+        for name in extra:
+            row[name] = None
+    return built
+
+
+def strftime_times(rows):
+    for row in rows:
+        row['start_time'] = row['start_time'].strftime(TIME_FORMAT)
+        row['end_time'] = row['end_time'].strftime(TIME_FORMAT)
+
+
+def run(app, provider_class, build, format_times, columns, rows, has_times, repeat):
+    """Best-of-`repeat` CPU seconds per stage, plus the bytes held by the built rows."""
+    app.json = provider_class(app)
+    best = {}
+    for _ in range(repeat):
+        timings = {}
+        started = time.process_time()
+        built = build(columns, rows)
+        timings['build_rows_s'] = time.process_time() - started
+        if has_times:
+            started = time.process_time()
+            format_times(built)
+            timings['format_times_s'] = time.process_time() - started
+        started = time.process_time()
+        with app.app_context():
+            body = app.json.response({"data": built, "next_cursor": None}).get_data()
+        timings['encode_json_s'] = time.process_time() - started
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    best['total_s'] = sum(best.values())
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(columns, rows)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return {**{stage: round(seconds, 4) for stage, seconds in best.items()},
+            "row_memory_bytes": held, "body_bytes": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    results = {"rows": args.rows, "orjson": orjson is not None, "datasets": {}}
+    datasets = {
+        "auctions": (auction_rows(args.rows), True, RowType('AuctionRow'), ()),
+        "items": (item_rows(args.rows), False, RowType('ItemRow', extra=('current_price',)), ('current_price',)),
+    }
+    for name, ((columns, rows), has_times, row_type, extra) in datasets.items():
+        baseline = run(app, DefaultJSONProvider, lambda c, r: dict_rows(c, r, extra), strftime_times,
+                       columns, rows, has_times, args.repeat)
+        compact = run(app, FastJSONProvider if orjson else DefaultJSONProvider, row_type.build,
+                      lambda built: format_datetime_columns(built, ('start_time', 'end_time'), TIME_FORMAT),
+                      columns, rows, has_times, args.repeat)
+        results["datasets"][name] = {
+            "dict": baseline,
+            "compact": compact,
+            "cpu_speedup": round(baseline['total_s'] / compact['total_s'], 2),
+            "row_memory_ratio": round(compact['row_memory_bytes'] / baseline['row_memory_bytes'], 2),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
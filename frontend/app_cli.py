@@ -6,6 +6,12 @@ import uuid
 BASE_URL = "http://127.0.0.1:5000"
 g_logged_in_user = None
 
+# Every API call goes through this session, so the login token is sent automatically.
+api = requests.Session()
+
+# Earlier responses of list endpoints by URL, with their ETag, for conditional GETs.
+response_cache = {}
+
 # --- Helper Functions ---
 
 def print_response(response):
@@ -18,6 +24,45 @@ def print_response(response):
         print(f"Body: {response.text}")
     print("----------------\n")
 
+def get_cached(path, params=None):
+    """
+    GET that sends the ETag of the last response for the same URL. When the server
+    answers 304 Not Modified, the cached response is returned instead.
+    """
+    url = requests.Request('GET', f"{BASE_URL}{path}", params=params).prepare().url
+    cached = response_cache.get(url)
+    response = api.get(url, headers={"If-None-Match": cached.headers['ETag']} if cached else None)
+    if response.status_code == 304 and cached:
+        print("(Not modified since the last request: showing the saved copy.)")
+        return cached
+    if response.status_code == 200 and response.headers.get('ETag'):
+        response_cache[url] = response
+    return response
+
+def fetch_pages(path, params=None, conditional=False):
+    """
+    Walks a paginated list endpoint, printing each page and asking before fetching the next.
+    With `conditional`, pages that have not changed since they were last fetched are not re-downloaded.
+    Returns all rows that were fetched, or None if a request failed.
+    """
+    params = dict(params or {})
+    rows = []
+    while True:
+        if conditional:
+            response = get_cached(path, params)
+        else:
+            response = api.get(f"{BASE_URL}{path}", params=params)
+        print_response(response)
+        if response.status_code != 200:
+            return None
+        page = response.json()
+        rows.extend(page.get("data", []))
+        if not page.get("next_cursor"):
+            return rows
+        if input("Show next page? (y/N): ").strip().lower() != 'y':
+            return rows
+        params["after"] = page["next_cursor"]
+
 def get_int_input(prompt):
     """Helper to safely get an integer from the user."""
     while True:
@@ -47,6 +92,9 @@ def show_help():
         print("  5: Place a bid on an item")
         print("  6: View my unpaid winnings") 
         print("  7: Pay for a won item")     
+        print("  20: Watch an item or auction live")
+        print("  21: Set a maximum bid (the server bids for you up to it)")
+        print("  22: View my maximum bids")
 
         print("\nAuctioneer Tasks ---")
         print("  8: Create a new auction")   
@@ -61,6 +109,7 @@ def show_help():
         print("  16: Finalize bidding for an item") 
         print("  17: Delete a customer")
         print("  18: Cancel an auction")
+        print("  19: Finalize a whole auction")
         
         print("\n  help: Show this menu")
         print("  quit: Exit the application")
@@ -75,11 +124,12 @@ def login():
     password = input("  Enter your password: ")
     
     try:
-        response = requests.post(f"{BASE_URL}/login", json={"userID": user_id, "password": password})
+        response = api.post(f"{BASE_URL}/login", json={"userID": user_id, "password": password})
         print_response(response)
         
         if response.status_code == 200:
             g_logged_in_user = response.json().get("customer")
+            api.headers["Authorization"] = f"Bearer {response.json()['token']}"
             print(f"--- Welcome, {g_logged_in_user['name']}! ---")
         else:
             print("Login failed. Please check your credentials.")
@@ -99,6 +149,7 @@ def logout():
     global g_logged_in_user
     print(f"--- Logging out {g_logged_in_user['name']}... ---")
     g_logged_in_user = None
+    api.headers.pop("Authorization", None)
     print("Logout successful.")
 
 def register_customer():
@@ -119,7 +170,7 @@ def register_customer():
     
     print(f"\nSending registration...\n{json.dumps(payload, indent=2)}")
     try:
-        response = requests.post(f"{BASE_URL}/customers", json=payload)
+        response = api.post(f"{BASE_URL}/customers", json=payload)
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server. Is app.py running?")
@@ -144,16 +195,22 @@ def update_profile():
 
     print(f"\nUpdating profile...\n{json.dumps(payload, indent=2)}")
     try:
-        response = requests.put(f"{BASE_URL}/customers/{cust_id}", json=payload)
+        response = api.put(f"{BASE_URL}/customers/{cust_id}", json=payload)
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
 def browse_items():
     print(" Browsing all items for sale ---")
+    print("Optional filters (press Enter to skip):")
+    params = {
+        "category": input("  CategoryID (e.g., CAT01): ").strip(),
+        "min_price": input("  Minimum price: ").strip(),
+        "max_price": input("  Maximum price: ").strip(),
+    }
+    params = {k: v for k, v in params.items() if v}
     try:
-        response = requests.get(f"{BASE_URL}/items")
-        print_response(response)
+        fetch_pages("/items", params, conditional=True)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server. Is app.py running?")
 
@@ -165,11 +222,65 @@ def view_item_details():
         return
         
     try:
-        response = requests.get(f"{BASE_URL}/items/{item_id}")
+        response = api.get(f"{BASE_URL}/items/{item_id}")
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
+def read_sse(response):
+    """Yields (event, data) pairs from a text/event-stream response."""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == '':
+            if data:
+                yield event or 'message', json.loads('\n'.join(data))
+            event, data = None, []
+        elif line.startswith('event:'):
+            event = line[len('event:'):].strip()
+        elif line.startswith('data:'):
+            data.append(line[len('data:'):].strip())
+
+def watch_live():
+    print(" Watch an item or auction live ---")
+    print("Prices update as bids come in. Press Ctrl+C to stop watching.")
+    target_id = input("  Enter an itemID (e.g., I001) or auctionID (e.g., A001): ").strip()
+    if not target_id:
+        print("[Error] An itemID or auctionID is required.")
+        return
+    path = f"/auctions/{target_id}/stream" if target_id.upper().startswith('A') else f"/items/{target_id}/stream"
+    my_id = g_logged_in_user['userID'] if g_logged_in_user else None
+
+    try:
+        with api.get(f"{BASE_URL}{path}", stream=True, timeout=(5, 60)) as response:
+            if response.status_code != 200:
+                print_response(response)
+                return
+            for event, data in read_sse(response):
+                if event == 'snapshot':
+                    auction = data['auction']
+                    print(f"\n[{auction['auctionID']}] {auction.get('auction_name')} - {auction['status']}, ends {auction['end_time']}")
+                    for item in data.get('items') or [data['item']]:
+                        print(f"  {item['itemID']} {item['title']}: {item['current_price']} ({item['bid_count']} bids)")
+                elif event == 'new_high_bid':
+                    print(f"  New high bid on {data['itemID']}: {data['amount']} by {data['custID']}")
+                elif event == 'outbid' and data['custID'] == my_id:
+                    print(f"  !! You have been outbid on {data['itemID']}: new price {data['amount']}")
+                elif event == 'resync':
+                    print("  (missed some updates; the next bid shows the latest price)")
+                elif event == 'auction_ended':
+                    print(f"\n[{data['auctionID']}] Auction closed ({data['status']}).")
+                    for item in data.get('items', []):
+                        print(f"  {item['itemID']}: {item['outcome']} {item.get('winnerID') or ''}")
+                    break
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    except requests.exceptions.ConnectionError:
+        print("\n[Error] Could not connect to server.")
+    except requests.exceptions.ReadTimeout:
+        print("\n[Error] The live stream stopped responding.")
+
 def view_unpaid_winnings():
     print(" View my unpaid winnings ---")
     cust_id = get_current_user_id(prompt_if_missing=True)
@@ -180,7 +291,7 @@ def view_unpaid_winnings():
         print(f"(Using logged-in CustomerID: {cust_id})")
         
     try:
-        response = requests.get(f"{BASE_URL}/customers/{cust_id}/winnings")
+        response = api.get(f"{BASE_URL}/customers/{cust_id}/winnings")
         print_response(response)
         items = response.json()
         if response.status_code == 200 and not items:
@@ -215,11 +326,51 @@ def place_bid():
     
     print(f"\nPlacing bid...\n{json.dumps(payload, indent=2)}")
     try:
-        response = requests.post(f"{BASE_URL}/bid", json=payload)
+        response = api.post(f"{BASE_URL}/bid", json=payload)
+        print_response(response)
+    except requests.exceptions.ConnectionError:
+        print("\n[Error] Could not connect to server.")
+
+def set_max_bid():
+    if not g_logged_in_user:
+        print("[Error] You must be logged in to set a maximum bid.")
+        return
+
+    print(" Set a maximum bid on an item ---")
+    print("Whenever someone outbids you, the server bids again for you, just enough to lead, up to your maximum.")
+    item_id = input("  Enter the ItemID (e.g., I001): ")
+    if not item_id:
+        print("[Error] ItemID is required.")
+        return
+    max_amount = get_int_input("  Enter your maximum bid (e.g., 50000): ")
+
+    try:
+        response = api.post(f"{BASE_URL}/proxy_bids", json={"itemID": item_id, "max_amount": max_amount})
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
+def view_max_bids():
+    cust_id = get_current_user_id(prompt_if_missing=False)
+    if not cust_id:
+        print("[Error] You must be logged in to see your maximum bids.")
+        return
+    print(" View my maximum bids ---")
+
+    try:
+        response = api.get(f"{BASE_URL}/customers/{cust_id}/proxy_bids")
+        if response.status_code != 200:
+            print_response(response)
+            return
+        rows = response.json()
+        if not rows:
+            print("You have no maximum bids on open items.")
+        for row in rows:
+            state = "leading" if row['leading'] else "outbid"
+            print(f"  {row['itemID']} {row['title']}: max {row['max_amount']}, price {row['current_price']} ({state})")
+    except requests.exceptions.ConnectionError:
+        print("\n[Error] Could not connect to server.")
+
 def pay_for_item():
     print(" Pay for a won item ---")
     print("NOTE: This will only work if the item is 'Sold'.")
@@ -245,7 +396,7 @@ def pay_for_item():
     
     print(f"\nSubmitting payment (amount will be calculated by server)...")
     try:
-        response = requests.post(f"{BASE_URL}/payments", json=payload)
+        response = api.post(f"{BASE_URL}/payments", json=payload)
         print_response(response)
         if response.status_code == 201:
              print("\nSUCCESS! Check your database. The auction status might now be 'Completed'.")
@@ -273,7 +424,7 @@ def create_auction():
     }
     print(f"\nCreating auction...\n{json.dumps(payload, indent=2)}")
     try:
-        response = requests.post(f"{BASE_URL}/auctions", json=payload)
+        response = api.post(f"{BASE_URL}/auctions", json=payload)
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -299,7 +450,7 @@ def create_item():
     }
     print(f"\nCreating item...\n{json.dumps(payload, indent=2)}")
     try:
-        response = requests.post(f"{BASE_URL}/items", json=payload)
+        response = api.post(f"{BASE_URL}/items", json=payload)
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -309,7 +460,7 @@ def start_auctions():
     print("This will call 'sp_start_auction' to find and activate any due auctions.")
     input("Press Enter to continue...")
     try:
-        response = requests.post(f"{BASE_URL}/auctions/start-scheduled")
+        response = api.post(f"{BASE_URL}/auctions/start-scheduled")
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -325,12 +476,28 @@ def finalize_item():
     
     print(f"Finalizing {item_id}...")
     try:
-        response = requests.post(f"{BASE_URL}/items/{item_id}/finalize")
+        response = api.post(f"{BASE_URL}/items/{item_id}/finalize")
         print_response(response)
         print("\nIf successful, the item's status is now 'Sold'.")
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
+def finalize_auction():
+    print(" Finalize a whole auction ---")
+    print("NOTE: The auction must be 'Ended'. Every item is settled in one go.")
+
+    auction_id = input("  Enter auctionID to finalize (e.g., A001): ")
+    if not auction_id:
+        print("[Error] auctionID cannot be empty.")
+        return
+
+    print(f"Finalizing {auction_id}...")
+    try:
+        response = api.post(f"{BASE_URL}/auctions/{auction_id}/finalize")
+        print_response(response)
+    except requests.exceptions.ConnectionError:
+        print("\n[Error] Could not connect to server.")
+
 def cancel_auction():
     print("1: Cancel an auction ---")
     auction_id = input("  Enter auctionID to cancel (e.g., A003): ")
@@ -340,7 +507,7 @@ def cancel_auction():
         
     print(f"Cancelling {auction_id}...")
     try:
-        response = requests.put(f"{BASE_URL}/auctions/{auction_id}/cancel")
+        response = api.put(f"{BASE_URL}/auctions/{auction_id}/cancel")
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -357,7 +524,7 @@ def delete_customer():
     input("Press Enter to confirm...")
     
     try:
-        response = requests.delete(f"{BASE_URL}/customers/{cust_id}")
+        response = api.delete(f"{BASE_URL}/customers/{cust_id}")
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -367,19 +534,16 @@ def delete_customer():
 def list_all_customers():
     print("3: List all registered customers ---")
     try:
-        response = requests.get(f"{BASE_URL}/customers")
-        print_response(response)
+        fetch_pages("/customers")
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
 def list_all_auctions():
     print(" See all auctions (list details) ---")
     try:
-        response = requests.get(f"{BASE_URL}/auctions")
-        print_response(response)
-        if response.status_code == 200:
+        auctions = fetch_pages("/auctions", conditional=True)
+        if auctions:
             try:
-                auctions = response.json()
                 if isinstance(auctions, list) and auctions:
                     print("\n--- Auction Details ---")
                     for a in auctions:
@@ -404,8 +568,7 @@ def list_bids_by_customer():
             return
         
     try:
-        response = requests.get(f"{BASE_URL}/customers/{cust_id}/bids")
-        print_response(response)
+        fetch_pages(f"/customers/{cust_id}/bids")
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
 
@@ -417,7 +580,7 @@ def list_items_in_auction():
         return
         
     try:
-        response = requests.get(f"{BASE_URL}/auctions/{auction_id}/items")
+        response = api.get(f"{BASE_URL}/auctions/{auction_id}/items")
         print_response(response)
     except requests.exceptions.ConnectionError:
         print("\n[Error] Could not connect to server.")
@@ -426,7 +589,7 @@ def list_items_in_auction():
 def list_user_counts():
     print(" Count admins & customers ---")
     try:
-        response = requests.get(f"{BASE_URL}/stats/user_counts")
+        response = api.get(f"{BASE_URL}/stats/user_counts")
         print_response(response)
         if response.status_code == 200:
             counts = response.json()
@@ -466,6 +629,10 @@ def main():
         '16': finalize_item,
         '17': delete_customer,
         '18': cancel_auction,
+        '19': finalize_auction,
+        '20': watch_live,
+        '21': set_max_bid,
+        '22': view_max_bids,
 
         'help': show_help
     }
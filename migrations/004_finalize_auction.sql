@@ -0,0 +1,48 @@
+-- Migration 004: set-based whole-auction finalization (sp_finalize_auction)
+use auction;
+
+DROP PROCEDURE IF EXISTS sp_finalize_auction;
+-- PROCEDURE: sp_finalize_auction
+-- Purpose: Finalizes every item of an auction at once. Items whose leading bid meets the reserve
+-- price are marked 'Sold' to the leading bidder in one set-based UPDATE, then one row per item is
+-- returned as a summary. Runs in the caller's transaction.
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction(
+    IN p_auctionID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    CALL sp_update_auction_status(p_auctionID);
+
+    SELECT status INTO v_auction_status
+    FROM auction
+    WHERE auctionID = p_auctionID;
+
+    IF v_auction_status = 'Ended' THEN
+        UPDATE auction_item
+        SET status = 'Sold',
+            winnerID = leading_custID
+        WHERE auctionID = p_auctionID
+          AND status = 'Listed'
+          AND leading_custID IS NOT NULL
+          AND current_price >= reserve_price;
+
+        SELECT CONCAT('Auction ', p_auctionID, ' finalized.') AS Result;
+
+        SELECT itemID, title, status, winnerID, current_price AS winning_bid,
+               reserve_price, bid_count,
+               CASE
+                   WHEN status = 'Sold' THEN 'sold'
+                   WHEN current_price IS NULL THEN 'no_bids'
+                   WHEN current_price < reserve_price THEN 'reserve_not_met'
+                   ELSE 'not_sold'
+               END AS outcome
+        FROM auction_item
+        WHERE auctionID = p_auctionID
+        ORDER BY itemID;
+    ELSE
+        SELECT CONCAT('Cannot finalize auction. Auction status is: ', IFNULL(v_auction_status, 'not found')) AS Result;
+    END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,40 @@
+-- Migration 005: sp_place_bid reports the previous leading bidder
+-- The result row gains a `previous_leader` column, which the backend uses to
+-- publish `outbid` events on its live event streams.
+use auction;
+
+DROP PROCEDURE IF EXISTS sp_place_bid;
+-- PROCEDURE: sp_place_bid
+-- Purpose: Simplifies the process of placing a bid. Uses UUID() for a unique bidID.
+-- Also keeps current_price / bid_count / leading_custID on auction_item in the same transaction.
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    DECLARE v_previous_leader VARCHAR(10);
+
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), p_custID, p_itemID, p_amount, NOW());
+
+    -- Who is being outbid, for the backend's live event stream. The UPDATE below locks this row anyway.
+    SELECT leading_custID INTO v_previous_leader
+    FROM auction_item
+    WHERE itemID = p_itemID
+    FOR UPDATE;
+
+    -- leading_custID is assigned before current_price, so both compare against the old price
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = IF(current_price IS NULL OR p_amount > current_price, p_custID, leading_custID),
+        current_price = IF(current_price IS NULL OR p_amount > current_price, p_amount, current_price)
+    WHERE itemID = p_itemID;
+    
+    SELECT 'Bid placed successfully.' AS message, v_previous_leader AS previous_leader;
+END$$
+DELIMITER ;
+
+-- Dropping a routine drops its grants, so restore them
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid TO 'auction_user_role';
@@ -0,0 +1,6 @@
+-- Migration 006: room for salted password hashes
+-- customer.password now holds 'pbkdf2_sha256$iterations$salt$hash' strings written by the backend.
+-- Existing plain-text passwords keep working: the backend re-hashes each one at its owner's next login.
+use auction;
+
+ALTER TABLE customer MODIFY password VARCHAR(255) NOT NULL;
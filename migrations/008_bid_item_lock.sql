@@ -0,0 +1,57 @@
+-- Migration 008: sp_place_bid locks the item row before it validates the bid
+-- before_bid_insert reads the current price without a lock, so two concurrent bids
+-- could both pass it against the same old price, and the lower one was still stored.
+-- The procedure now takes the item row's lock first and checks the amount against the
+-- locked price. Bids on one item queue on that row; bids on other items, and on other
+-- items of the same auction, do not wait for each other. The auction row is never locked.
+use auction;
+
+DROP PROCEDURE IF EXISTS sp_place_bid;
+-- PROCEDURE: sp_place_bid
+-- Purpose: Simplifies the process of placing a bid. Uses UUID() for a unique bidID.
+-- Also keeps current_price / bid_count / leading_custID on auction_item in the same transaction.
+-- Locks only the item row, first, so concurrent bids on an item are serialized and checked in turn.
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    DECLARE v_price INT;
+    DECLARE v_previous_leader VARCHAR(10);
+
+    -- Lock the item row before anything else. Whoever holds it has seen the latest price.
+    SELECT IFNULL(current_price, start_price), leading_custID
+    INTO v_price, v_previous_leader
+    FROM auction_item
+    WHERE itemID = p_itemID
+    FOR UPDATE;
+
+    -- start_price is NOT NULL, so no price means no such item
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item not found';
+    END IF;
+
+    IF p_amount <= v_price THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+
+    -- before_bid_insert still checks the auction window
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), p_custID, p_itemID, p_amount, NOW());
+
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = p_custID,
+        current_price = p_amount
+    WHERE itemID = p_itemID;
+
+    SELECT 'Bid placed successfully.' AS message, v_previous_leader AS previous_leader;
+END$$
+DELIMITER ;
+
+-- Dropping a routine drops its grants, so restore them
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid TO 'auction_user_role';
@@ -0,0 +1,332 @@
+-- Migration 009: proxy (automatic maximum) bidding
+-- A customer registers a hidden maximum for an item (sp_set_proxy_bid). Whenever the item's
+-- price changes, sp_resolve_proxy_bids settles the competing maxima under the item row's lock
+-- and places at most one bid: the winner's, at one above the runner-up's maximum. Bidders no
+-- longer have to re-bid in a loop to stay on top. sp_place_bid resolves after every bid, and
+-- finalization drops the maxima of the items it closes.
+use auction;
+
+-- One maximum per customer and item. idx_proxy_bid_priority is the per-item priority order:
+-- highest maximum first, ties to the earliest one, so the top two are read from the index.
+CREATE TABLE proxy_bid (
+custID varchar(10) not null,
+itemID varchar(10) not null,
+max_amount int not null,
+created_at timestamp(6) not null default current_timestamp(6),
+primary key (itemID, custID),
+index idx_proxy_bid_priority (itemID, max_amount DESC, created_at),
+index idx_proxy_bid_cust (custID, created_at),
+constraint fk_proxy_cust foreign key (custID) references customer(userID) on delete cascade on update cascade,
+constraint fk_proxy_item foreign key (itemID) references auction_item(itemID) on delete cascade on update cascade
+);
+
+DROP PROCEDURE IF EXISTS sp_resolve_proxy_bids;
+-- PROCEDURE: sp_resolve_proxy_bids
+-- Purpose: Settles the item's proxy bids against its current leader, and bids once for the winner.
+-- The caller holds the item row's lock (sp_place_bid, sp_set_proxy_bid).
+--   * The leader's ceiling is their own maximum, or the price they bid if it is higher or they have none.
+--   * A challenger is anyone else whose maximum beats the price. The best one wins if it beats the
+--     leader's ceiling, at one above the best other ceiling (capped at its own maximum).
+--   * Otherwise the leader keeps the lead, at one above the best challenger (capped at their ceiling).
+--   * A winning maximum that covers the reserve price bids at least the reserve price.
+-- Afterwards no one but the leader has a maximum above the price, so each call places at most one bid.
+DELIMITER $$
+CREATE PROCEDURE sp_resolve_proxy_bids(
+    IN p_itemID VARCHAR(10)
+)
+resolve: BEGIN
+    DECLARE v_current_price INT;
+    DECLARE v_floor INT;
+    DECLARE v_reserve_price INT;
+    DECLARE v_leader VARCHAR(10);
+    DECLARE v_leader_max INT;
+    DECLARE v_top_custID VARCHAR(10);
+    DECLARE v_top_max INT;
+    DECLARE v_second_max INT;
+    DECLARE v_winner VARCHAR(10);
+    DECLARE v_winner_max INT;
+    DECLARE v_price INT;
+
+    SELECT current_price, IFNULL(current_price, start_price), reserve_price, leading_custID
+    INTO v_current_price, v_floor, v_reserve_price, v_leader
+    FROM auction_item
+    WHERE itemID = p_itemID;
+
+    -- The best challenger: highest maximum above the price, earliest first on a tie
+    SET v_top_custID = (
+        SELECT custID FROM proxy_bid
+        WHERE itemID = p_itemID AND max_amount > v_floor AND custID <> IFNULL(v_leader, '')
+        ORDER BY max_amount DESC, created_at, custID
+        LIMIT 1);
+    SET v_leader_max = (
+        SELECT max_amount FROM proxy_bid
+        WHERE itemID = p_itemID AND custID = v_leader);
+
+    IF v_top_custID IS NULL THEN
+        IF v_leader IS NULL OR v_leader_max IS NULL THEN
+            LEAVE resolve;
+        END IF;
+        SET v_winner = v_leader,
+            v_winner_max = GREATEST(v_current_price, v_leader_max),
+            v_price = v_current_price;
+    ELSE
+        SET v_top_max = (
+            SELECT max_amount FROM proxy_bid
+            WHERE itemID = p_itemID AND custID = v_top_custID);
+        -- Without a leader the start price is the ceiling to beat
+        SET v_leader_max = IF(v_leader IS NULL, v_floor, GREATEST(v_current_price, IFNULL(v_leader_max, v_current_price)));
+
+        IF v_top_max > v_leader_max THEN
+            SET v_second_max = (
+                SELECT MAX(max_amount) FROM proxy_bid
+                WHERE itemID = p_itemID AND max_amount > v_floor AND custID NOT IN (v_top_custID, IFNULL(v_leader, '')));
+            SET v_winner = v_top_custID,
+                v_winner_max = v_top_max,
+                v_price = LEAST(v_top_max, GREATEST(v_leader_max, IFNULL(v_second_max, v_leader_max)) + 1);
+        ELSE
+            SET v_winner = v_leader,
+                v_winner_max = v_leader_max,
+                v_price = LEAST(v_leader_max, v_top_max + 1);
+        END IF;
+    END IF;
+
+    SET v_price = GREATEST(v_price, LEAST(v_winner_max, v_reserve_price));
+    IF v_winner <=> v_leader AND v_price = v_current_price THEN
+        LEAVE resolve;
+    END IF;
+
+    -- before_bid_insert checks the auction window for this bid too
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), v_winner, p_itemID, v_price, NOW());
+
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = v_winner,
+        current_price = v_price
+    WHERE itemID = p_itemID;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_place_bid;
+-- PROCEDURE: sp_place_bid
+-- Purpose: Simplifies the process of placing a bid. Uses UUID() for a unique bidID.
+-- Also keeps current_price / bid_count / leading_custID on auction_item in the same transaction.
+-- Locks only the item row, first, so concurrent bids on an item are serialized and checked in turn.
+-- Proxy bids answer the bid in the same transaction, so the result reports the item's final
+-- price and leader, which may be another customer's.
+DELIMITER $$
+CREATE PROCEDURE sp_place_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_amount INT
+)
+BEGIN
+    DECLARE v_price INT;
+    DECLARE v_previous_leader VARCHAR(10);
+
+    -- Lock the item row before anything else. Whoever holds it has seen the latest price.
+    SELECT IFNULL(current_price, start_price), leading_custID
+    INTO v_price, v_previous_leader
+    FROM auction_item
+    WHERE itemID = p_itemID
+    FOR UPDATE;
+
+    -- start_price is NOT NULL, so no price means no such item
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item not found';
+    END IF;
+
+    IF p_amount <= v_price THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+
+    -- before_bid_insert still checks the auction window
+    INSERT INTO bid (bidID, custID, itemID, amount, bid_time)
+    VALUES (UUID(), p_custID, p_itemID, p_amount, NOW());
+
+    UPDATE auction_item
+    SET bid_count = bid_count + 1,
+        leading_custID = p_custID,
+        current_price = p_amount
+    WHERE itemID = p_itemID;
+
+    CALL sp_resolve_proxy_bids(p_itemID);
+
+    SELECT IF(leading_custID = p_custID, 'Bid placed successfully.',
+              'Bid placed, but another bidder''s maximum bid is higher.') AS message,
+           v_previous_leader AS previous_leader, current_price, leading_custID
+    FROM auction_item
+    WHERE itemID = p_itemID;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_set_proxy_bid;
+-- PROCEDURE: sp_set_proxy_bid
+-- Purpose: Sets a customer's maximum bid on an item and resolves the proxy bids at once, in its own
+-- transaction. Sending a new maximum replaces the old one. The maximum must beat the current price.
+DELIMITER $$
+CREATE PROCEDURE sp_set_proxy_bid(
+    IN p_custID VARCHAR(10),
+    IN p_itemID VARCHAR(10),
+    IN p_max_amount INT
+)
+BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+    DECLARE v_start_time DATETIME;
+    DECLARE v_end_time DATETIME;
+    DECLARE v_price INT;
+    DECLARE v_previous_leader VARCHAR(10);
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    -- Same lock as sp_place_bid: the item row only, not the auction's
+    SELECT a.status, a.start_time, a.end_time, IFNULL(ai.current_price, ai.start_price), ai.leading_custID
+    INTO v_auction_status, v_start_time, v_end_time, v_price, v_previous_leader
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = p_itemID
+    FOR UPDATE OF ai;
+
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Item or auction not found';
+    END IF;
+    -- The leader may only raise a maximum without a bid being placed, so check the window here
+    IF NOT ((v_auction_status = 'Active' OR (v_auction_status = 'Scheduled' AND NOW() >= v_start_time))
+            AND NOW() < v_end_time) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Bidding is not allowed. The auction is not active.';
+    END IF;
+    IF p_max_amount <= v_price THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Your maximum bid is too low. It must be higher than the current highest bid or the start price.';
+    END IF;
+
+    INSERT INTO proxy_bid (custID, itemID, max_amount)
+    VALUES (p_custID, p_itemID, p_max_amount)
+    ON DUPLICATE KEY UPDATE max_amount = p_max_amount, created_at = CURRENT_TIMESTAMP(6);
+
+    CALL sp_resolve_proxy_bids(p_itemID);
+
+    SELECT IF(leading_custID = p_custID, 'Maximum bid set. You are the highest bidder.',
+              'Maximum bid set, but another bidder''s maximum bid is higher.') AS message,
+           v_previous_leader AS previous_leader, v_price AS previous_price,
+           current_price, leading_custID, p_max_amount AS max_amount
+    FROM auction_item
+    WHERE itemID = p_itemID;
+    COMMIT;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_finalize_auction_item;
+-- PROCEDURE: sp_finalize_auction_item
+-- Purpose: Checks winning bid, updates item status, and STORES THE WINNER.
+-- Proxy bids were already placed as real bids, so the leading bid is the winner; the item's
+-- maxima are no longer needed and are dropped.
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction_item(
+    IN p_itemID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_winning_bid INT;
+    DECLARE v_winning_custID VARCHAR(10);
+    DECLARE v_reserve_price INT;
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    -- Bids no longer persist auction status changes, so bring this auction's status up to date first
+    CALL sp_update_auction_status((SELECT auctionID FROM auction_item WHERE itemID = p_itemID));
+
+    -- Get the auction status to make sure it's actually over, plus the leading bid kept by sp_place_bid
+    SELECT a.status, ai.reserve_price, ai.current_price, ai.leading_custID
+    INTO v_auction_status, v_reserve_price, v_winning_bid, v_winning_custID
+    FROM auction_item ai
+    JOIN auction a ON ai.auctionID = a.auctionID
+    WHERE ai.itemID = p_itemID;
+
+    -- Only proceed if the auction has 'Ended'
+    IF v_auction_status = 'Ended' THEN
+        DELETE FROM proxy_bid WHERE itemID = p_itemID;
+        -- Check if any bids were placed
+        IF v_winning_bid IS NOT NULL THEN
+            -- Check if the highest bid met the reserve price
+            IF v_winning_bid >= v_reserve_price THEN
+                -- ** THIS IS THE NEW PART **
+                UPDATE auction_item
+                SET status = 'Sold',
+                    winnerID = v_winning_custID -- Store the winner!
+                WHERE itemID = p_itemID;
+
+                SELECT CONCAT('Item ', p_itemID, ' sold to ', v_winning_custID, ' for ', v_winning_bid) AS Result;
+            ELSE
+                SELECT CONCAT('Item ', p_itemID, ' not sold. Reserve price of ', v_reserve_price, ' not met.') AS Result;
+            END IF;
+        ELSE
+            SELECT CONCAT('Item ', p_itemID, ' not sold. No bids received.') AS Result;
+        END IF;
+    ELSE
+        SELECT CONCAT('Cannot finalize item. Auction status is: ', v_auction_status) AS Result;
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_finalize_auction;
+-- PROCEDURE: sp_finalize_auction
+-- Purpose: Finalizes every item of an auction at once. Items whose leading bid meets the reserve
+-- price are marked 'Sold' to the leading bidder in one set-based UPDATE, then one row per item is
+-- returned as a summary. Runs in the caller's transaction. Drops the items' proxy bids.
+DELIMITER $$
+CREATE PROCEDURE sp_finalize_auction(
+    IN p_auctionID VARCHAR(10)
+)
+BEGIN
+    DECLARE v_auction_status ENUM('Scheduled','Active','Ended','Completed','Cancelled');
+
+    CALL sp_update_auction_status(p_auctionID);
+
+    SELECT status INTO v_auction_status
+    FROM auction
+    WHERE auctionID = p_auctionID;
+
+    IF v_auction_status = 'Ended' THEN
+        UPDATE auction_item
+        SET status = 'Sold',
+            winnerID = leading_custID
+        WHERE auctionID = p_auctionID
+          AND status = 'Listed'
+          AND leading_custID IS NOT NULL
+          AND current_price >= reserve_price;
+
+        DELETE pb FROM proxy_bid pb
+        JOIN auction_item ai ON pb.itemID = ai.itemID
+        WHERE ai.auctionID = p_auctionID;
+
+        SELECT CONCAT('Auction ', p_auctionID, ' finalized.') AS Result;
+
+        SELECT itemID, title, status, winnerID, current_price AS winning_bid,
+               reserve_price, bid_count,
+               CASE
+                   WHEN status = 'Sold' THEN 'sold'
+                   WHEN current_price IS NULL THEN 'no_bids'
+                   WHEN current_price < reserve_price THEN 'reserve_not_met'
+                   ELSE 'not_sold'
+               END AS outcome
+        FROM auction_item
+        WHERE auctionID = p_auctionID
+        ORDER BY itemID;
+    ELSE
+        SELECT CONCAT('Cannot finalize auction. Auction status is: ', IFNULL(v_auction_status, 'not found')) AS Result;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Dropping a routine drops its grants, so restore them. Customers read their own maxima through
+-- the backend; sp_resolve_proxy_bids is only called by the procedures above.
+GRANT SELECT ON auction.proxy_bid TO 'auction_user_role';
+GRANT EXECUTE ON PROCEDURE auction.sp_place_bid TO 'auction_user_role';
+GRANT EXECUTE ON PROCEDURE auction.sp_set_proxy_bid TO 'auction_user_role';
@@ -0,0 +1,28 @@
+-- Migration 010: sp_update_auction_status catches up auctions that were never started
+-- Since migration 003, before_bid_insert no longer persists Scheduled -> Active on the first bid.
+-- sp_update_auction_status only started an auction while NOW() was inside its window, so an
+-- auction nobody started before its end_time stayed 'Scheduled' for good: finalizing refused it
+-- and GET /auctions showed it as not yet started. A Scheduled auction now becomes 'Active' once
+-- start_time has passed, and the second step ends it in the same call if end_time has passed too.
+use auction;
+
+DROP PROCEDURE IF EXISTS sp_update_auction_status;
+DELIMITER $$
+CREATE PROCEDURE sp_update_auction_status(IN p_auctionID VARCHAR(10))
+BEGIN
+    -- 1. Check if a 'Scheduled' auction should become 'Active'. One whose end_time has
+    --    passed too is started here and ended by step 2, so it never stays 'Scheduled'.
+    UPDATE auction
+    SET status = 'Active'
+    WHERE auctionID = p_auctionID
+      AND status = 'Scheduled'
+      AND NOW() >= start_time;
+
+    -- 2. Check if an 'Active' auction should 'End'
+    UPDATE auction
+    SET status = 'Ended'
+    WHERE auctionID = p_auctionID
+      AND status = 'Active'
+      AND NOW() >= end_time;
+END$$
+DELIMITER ;
@@ -0,0 +1,354 @@
+"""
+Query-plan regression check: fails when a hot query does a full table scan or a filesort.
+
+    python tools/explain_check.py                      seed, check, drop the scratch database
+    python tools/explain_check.py --keep               keep it, then rerun quickly with --reuse
+    python tools/explain_check.py --bids 5000000 -v    larger dataset, print every plan
+
+Copies the table definitions (with their indexes) of the `auction` database into a scratch
+database, seeds it with a large synthetic dataset and runs ANALYZE TABLE. Then it collects
+the SQL to check:
+  * every statement backend/server.py sends for the read endpoints, captured while the
+    Flask app serves them from the scratch database (plain text queries, no replicas);
+  * the prepared hot queries in backend/statements.py;
+  * the SELECT/UPDATE/DELETE statements inside the stored procedures, functions and
+    triggers of `auction`, with their parameters and variables replaced by sample values.
+Each one is run through EXPLAIN. A hot statement fails when any table in its plan is read
+with type ALL (except `category` and derived tables) or when the plan says Using filesort.
+It also fails when EXPLAIN rejects it, so a hot query cannot be skipped unnoticed.
+Statements that only admin tools, exports or start-up run are reported but never fail.
+
+Exit code 1 if a hot statement failed. Connects as root (DB_PASSWORD from backend/.env).
+Run tools/migrate.py first so that `auction` has the current indexes and routines.
+"""
+import argparse
+import os
+import re
+import secrets
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+# Before the backend modules are imported: they read these at import time.
+os.environ['PREPARED_STATEMENTS'] = '0'
+os.environ['DB_REPLICA_HOSTS'] = ''
+os.environ['BID_ENGINE'] = '0'
+os.environ['AUCTION_SCHEDULER'] = '0'
+os.environ.setdefault('SESSION_SECRET', secrets.token_hex(32))
+
+import mysql.connector  # noqa: E402
+from mysql.connector.cursor import MySQLCursor  # noqa: E402
+
+try:
+    from mysql.connector.cursor_cext import CMySQLCursor
+except ImportError:  # C extension not available
+    CMySQLCursor = None
+
+import db_connector  # noqa: E402
+from migrate import split_statements  # noqa: E402
+
+TABLES = ('customer', 'category', 'auction', 'auction_item', 'bid', 'payment', 'proxy_bid')
+# Tiny lookup tables that may be scanned.
+SCAN_ALLOWED = {'category'}
+
+SEED = [
+    ("customer", """
+        INSERT INTO customer (userID, name, phone, email, address, password)
+        WITH RECURSIVE seq (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(customers)s)
+        SELECT CONCAT('C', n), CONCAT('Customer ', n), '9000000000', CONCAT('c', n, '@example.com'), 'Delhi', 'x'
+        FROM seq
+    """),
+    ("category", """
+        INSERT INTO category VALUES
+        ('CAT01','Electronic devices','Electronics'), ('CAT02','Home furniture items','Furniture'),
+        ('CAT03','Artwork and paintings','Art'), ('CAT04','Books and novels','Books'),
+        ('CAT05','Sports equipment','Sports')
+    """),
+    ("auction", """
+        INSERT INTO auction (auctionID, auction_name, start_time, end_time, status, userID)
+        WITH RECURSIVE seq (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(auctions)s)
+        SELECT CONCAT('A', n), CONCAT('Auction ', n),
+               NOW() - INTERVAL (n % 90) DAY + INTERVAL 30 DAY,
+               NOW() - INTERVAL (n % 90) DAY + INTERVAL 33 DAY,
+               ELT(1 + n % 5, 'Scheduled', 'Active', 'Ended', 'Completed', 'Cancelled'),
+               CONCAT('C', 1 + n % %(customers)s)
+        FROM seq
+    """),
+    ("auction_item", """
+        INSERT INTO auction_item (itemID, description, title, start_price, status, reserve_price,
+                                  categoryID, auctionID, winnerID, transactionID,
+                                  current_price, bid_count, leading_custID)
+        WITH RECURSIVE seq (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(items)s)
+        SELECT CONCAT('I', n), CONCAT('Item ', n), CONCAT('Item ', n), 100 + n % 1000,
+               IF(n % 4 = 0, 'Sold', 'Listed'), 200 + n % 1000,
+               CONCAT('CAT0', 1 + n % 5), CONCAT('A', 1 + n % %(auctions)s),
+               IF(n % 4 = 0, CONCAT('C', 1 + n % %(customers)s), NULL),
+               IF(n % 8 = 0, CONCAT('T', n), NULL),
+               150 + n % 1000, 10, CONCAT('C', 1 + n % %(customers)s)
+        FROM seq
+    """),
+    ("payment", """
+        INSERT INTO payment (transactionID, amount, paymentMethod, PaymentDate, CustomerId, itemID)
+        SELECT transactionID, current_price, 'UPI', CURDATE(), winnerID, itemID
+        FROM auction_item WHERE transactionID IS NOT NULL
+    """),
+    ("bid", """
+        INSERT INTO bid (bidID, amount, bid_time, custID, itemID)
+        WITH RECURSIVE seq (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(bids)s)
+        SELECT CONCAT('B', n), 100 + n % 5000, NOW() - INTERVAL n SECOND,
+               CONCAT('C', 1 + (n * 7919) % %(customers)s), CONCAT('I', 1 + n % %(items)s)
+        FROM seq
+    """),
+    ("proxy_bid", """
+        INSERT INTO proxy_bid (custID, itemID, max_amount, created_at)
+        WITH RECURSIVE seq (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(items)s)
+        SELECT CONCAT('C', 1 + (n * 7919) % %(customers)s), CONCAT('I', n), 1200 + n % 1000, NOW() - INTERVAL n SECOND
+        FROM seq
+    """),
+]
+
+# (path, hot). Each list page is also requested once more with its next_cursor.
+ENDPOINTS = [
+    ("/items", True),
+    ("/items?category=CAT01", True),
+    ("/items?auctionID=A1", True),
+    ("/items?auction_status=Active", True),
+    ("/items?min_price=500&max_price=900", True),
+    ("/items/I1", True),
+    ("/items/I1/stream", True),
+    ("/auctions", True),
+    ("/auctions?status=Active", True),
+    ("/auctions?status=Scheduled", True),
+    ("/auctions/A1/items", True),
+    ("/auctions/A1/stream", True),
+    ("/customers/C1/bids", True),
+    ("/customers/C1/winnings", True),
+    ("/customers/C1/proxy_bids", True),
+    # One customer's bids on one item: a handful of rows, sorted in memory.
+    ("/customers/C1/bids?itemID=I1", False),
+    # Admin listings and reports.
+    ("/customers", False),
+    ("/stats/user_counts", False),
+]
+# Exports read everything by design.
+NDJSON_ENDPOINTS = ["/items", "/auctions", "/customers/C1/bids", "/auctions/A1/items", "/customers/C1/winnings"]
+
+
+def seed(cursor, source, scratch, sizes):
+    cursor.execute(f"DROP DATABASE IF EXISTS {scratch}")
+    cursor.execute(f"CREATE DATABASE {scratch}")
+    cursor.execute(f"USE {scratch}")
+    for table in TABLES:
+        cursor.execute(f"CREATE TABLE {table} LIKE {source}.{table}")
+    cursor.execute("SET SESSION cte_max_recursion_depth = %s", (max(sizes.values()) + 1,))
+    for table, statement in SEED:
+        started = time.monotonic()
+        cursor.execute(statement, sizes)
+        print(f"  {table}: {cursor.rowcount} rows in {time.monotonic() - started:.1f}s")
+    cursor.execute(f"ANALYZE TABLE {', '.join(TABLES)}")
+    cursor.fetchall()
+    # Functions called from plain queries (get_current_price) must exist for EXPLAIN.
+    cursor.execute("SELECT ROUTINE_NAME FROM information_schema.ROUTINES "
+                   "WHERE ROUTINE_SCHEMA = %s AND ROUTINE_TYPE = 'FUNCTION'", (source,))
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"SHOW CREATE FUNCTION {source}.{name}")
+        cursor.execute(cursor.fetchone()[2])
+
+
+def capture_server_statements(scratch, password):
+    """[(label, hot, statement)] for everything the read endpoints send to MySQL."""
+    for connect_args in (db_connector.USER_CONNECT_ARGS, db_connector.ADMIN_CONNECT_ARGS):
+        connect_args.update(database=scratch, user='root', password=password or '')
+
+    import server
+    from auth import issue_token
+
+    captured = []
+    cursor_classes = [cls for cls in (MySQLCursor, CMySQLCursor) if cls is not None]
+    originals = {cls: cls.execute for cls in cursor_classes}
+
+    def recording(original_execute):
+        def execute(self, operation, params=None, *args, **kwargs):
+            result = original_execute(self, operation, params, *args, **kwargs)
+            captured.append(self.statement)
+            return result
+        return execute
+
+    for cls in cursor_classes:
+        cls.execute = recording(originals[cls])
+    try:
+        client = server.create_app().test_client()
+        auth = {"Authorization": f"Bearer {issue_token('C1', 'Customer 1')}"}
+        collected = []
+
+        def drive(path, hot, headers):
+            captured.clear()
+            response = client.get(path, headers=headers, buffered=False)
+            label = f"GET {path}" + (" (ndjson)" if 'Accept' in headers else "")
+            if response.status_code != 200:
+                print(f"  {label} answered {response.status_code}")
+            next_cursor = None
+            if response.is_json and isinstance(response.get_json(), dict):
+                next_cursor = response.get_json().get('next_cursor')
+            response.close()
+            collected.extend((label, hot, statement) for statement in captured)
+            return next_cursor
+
+        for path, hot in ENDPOINTS:
+            next_cursor = drive(path, hot, auth)
+            if next_cursor:
+                separator = '&' if '?' in path else '?'
+                drive(f"{path}{separator}after={next_cursor}", hot, auth)
+        for path in NDJSON_ENDPOINTS:
+            drive(path, False, {**auth, "Accept": "application/x-ndjson"})
+        drive("/ready", False, {})
+        return collected
+    finally:
+        for cls, original_execute in originals.items():
+            cls.execute = original_execute
+
+
+def hot_query_statements():
+    import statements
+    samples = {'login': ('C1',), 'auction_window': ('I1',), 'item_by_id': ('I1',), 'payment_winner': ('I1',)}
+    return [(f"statements.{name}", True, query.replace('%s', repr(samples[name][0])))
+            for name, query in statements.HOT_QUERIES.items()]
+
+
+def sample_value(name):
+    name = name.lower()
+    if 'item' in name:
+        return "'I1'"
+    if 'auction' in name:
+        return "'A1'"
+    if 'transaction' in name:
+        return "'T1'"
+    if any(part in name for part in ('cust', 'user', 'winner', 'leader')):
+        return "'C1'"
+    if 'time' in name or 'date' in name:
+        return "NOW()"
+    if 'status' in name:
+        return "'Active'"
+    if 'method' in name:
+        return "'UPI'"
+    return "100"
+
+
+ROUTINE_STATEMENT = re.compile(r'(?:^|\n)[ \t]*((?:SELECT|UPDATE|DELETE)\b[\s\S]*)$', re.IGNORECASE)
+INTO_VARIABLES = re.compile(r'\bINTO\s+@?\w+(?:\s*,\s*@?\w+)*\s+(?=FROM\b)', re.IGNORECASE)
+VARIABLE = re.compile(r'\b(?:NEW|OLD)\.(\w+)|\b([pv]_\w+)\b|@(\w+)')
+
+
+def routine_statements(cursor, source):
+    """[(label, hot, statement)] for the queries inside the stored routines and triggers of `source`."""
+    cursor.execute("SELECT ROUTINE_NAME, ROUTINE_DEFINITION FROM information_schema.ROUTINES WHERE ROUTINE_SCHEMA = %s",
+                   (source,))
+    bodies = cursor.fetchall()
+    cursor.execute("SELECT TRIGGER_NAME, ACTION_STATEMENT FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = %s",
+                   (source,))
+    bodies += cursor.fetchall()
+
+    found = []
+    for name, body in bodies:
+        for piece in split_statements(body or ''):
+            match = ROUTINE_STATEMENT.search(piece)
+            if not match:
+                continue
+            statement = match.group(1)
+            if statement.count(')') > statement.count('('):
+                statement = statement[:statement.rindex(')')]  # a subquery argument, e.g. CALL p((SELECT ...))
+            statement = INTO_VARIABLES.sub('', statement)
+            statement = VARIABLE.sub(lambda m: sample_value(next(g for g in m.groups() if g)), statement)
+            found.append((f"routine {name}", True, statement))
+    return found
+
+
+def explain(cursor, statement):
+    """Returns (plan rows, problems) for one statement."""
+    cursor.execute(f"EXPLAIN {statement}")
+    plan = cursor.fetchall()
+    problems = []
+    for row in plan:
+        table = row.get('table') or ''
+        if row.get('type') == 'ALL' and table not in SCAN_ALLOWED and not table.startswith('<'):
+            problems.append(f"full scan of {table}")
+        if 'Using filesort' in (row.get('Extra') or ''):
+            problems.append(f"filesort on {table}")
+    return plan, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=db_connector.DB_HOST)
+    parser.add_argument("--password", default=db_connector.DB_PASSWORD_ROOT)
+    parser.add_argument("--source", default=db_connector.DB_NAME, help="database whose schema and routines are checked")
+    parser.add_argument("--scratch", default="auction_explain", help="database created for the seeded copy")
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--auctions", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--bids", type=int, default=1000000)
+    parser.add_argument("--reuse", action="store_true", help="use the scratch database left by --keep")
+    parser.add_argument("--keep", action="store_true", help="do not drop the scratch database afterwards")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    db_connector.USER_CONNECT_ARGS['host'] = db_connector.ADMIN_CONNECT_ARGS['host'] = args.host
+    conn = mysql.connector.connect(host=args.host, user='root', password=args.password or '', autocommit=True)
+    try:
+        cursor = conn.cursor()
+        if not args.reuse:
+            print(f"Seeding {args.scratch}:")
+            seed(cursor, args.source, args.scratch,
+                 dict(customers=args.customers, auctions=args.auctions, items=args.items, bids=args.bids))
+        cursor.execute(f"USE {args.scratch}")
+
+        collected = capture_server_statements(args.scratch, args.password)
+        collected += hot_query_statements()
+        collected += routine_statements(cursor, args.source)
+
+        # The same statement may come from several endpoints: check it once, hot if any caller is hot.
+        unique = {}
+        for label, hot, statement in collected:
+            key = ' '.join(statement.split())
+            if not re.match(r'(SELECT|WITH|UPDATE|DELETE)\b', key, re.IGNORECASE):
+                continue
+            labels, was_hot = unique.get(key, ([], False))
+            if label not in labels:
+                labels.append(label)
+            unique[key] = (labels, was_hot or hot)
+
+        explain_cursor = conn.cursor(dictionary=True)
+        failed = skipped = 0
+        for statement, (labels, hot) in unique.items():
+            try:
+                plan, problems = explain(explain_cursor, statement)
+            except mysql.connector.Error as e:
+                # A hot statement we cannot explain is as bad as a bad plan: it must not pass silently.
+                if hot:
+                    failed += 1
+                else:
+                    skipped += 1
+                print(f"[{'FAIL' if hot else 'skip'}] {', '.join(labels)}: {e.msg}\n       {statement}")
+                continue
+            if problems and hot:
+                failed += 1
+                status = "FAIL"
+            else:
+                status = "warn" if problems else "ok"
+            if status != "ok" or args.verbose:
+                print(f"[{status}] {', '.join(labels)}: {'; '.join(problems) or 'index access only'}\n       {statement}")
+                for row in plan:
+                    print(f"       {row['table']}: type={row['type']} key={row['key']} rows={row['rows']} "
+                          f"extra={row['Extra']}")
+        print(f"\n{len(unique)} statements checked: {failed} hot statements failed, {skipped} other statements could not be explained.")
+    finally:
+        if not args.keep:
+            conn.cursor().execute(f"DROP DATABASE IF EXISTS {args.scratch}")
+        conn.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
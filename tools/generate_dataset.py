@@ -0,0 +1,320 @@
+"""
+Generates a large synthetic dataset that is consistent with the schema, and bulk-loads it.
+
+    python tools/generate_dataset.py                          10M bids into `auction`, next to the existing rows
+    python tools/generate_dataset.py --reset --bids 1000000   empty the tables first, smaller dataset
+    python tools/generate_dataset.py --files data/ --generate-only    write the TSV files, load nothing
+    python tools/generate_dataset.py --files data/ --load-only        load files written earlier
+
+The data follows the same rules the triggers and procedures enforce, so it looks like
+the result of real traffic:
+  * auctions are Ended or Completed (window in the past), Active (window around now),
+    Scheduled (window in the future) or Cancelled;
+  * bids fall inside their auction's window and before now, and rise strictly over
+    time per item, so current_price, bid_count and leading_custID are the last bid's;
+  * items of ended auctions are Sold to the leading bidder when the last bid meets the
+    reserve price; some of them are paid (payment row plus auction_item.transactionID),
+    and an auction whose items are all paid is Completed;
+  * Scheduled auctions have no bids.
+Bids are skewed: item popularity and bidder activity follow a Zipf law (--skew), so a
+few items get a large share of the bids and most get a handful. The hottest items
+in Active auctions are printed at the end, for benchmarks to aim at.
+
+Every customer's password is --password (one PBKDF2 hash shared by all rows).
+IDs are zero-padded (C0000001, I00000001, ...) and never clash with the sample data.
+
+Loading uses LOAD DATA LOCAL INFILE (the server needs local_infile=ON; otherwise pass
+--insert for batched multi-row INSERTs, several times slower). It connects as
+auction_admin and sets @trusted_bid_writer, so before_bid_insert skips its checks as it
+does for the bid engine's flusher: the bids are historical and already consistent.
+Foreign key and unique checks are off during the load for the same reason. Restart the
+backend afterwards: its price and window caches do not see rows loaded behind its back.
+"""
+import argparse
+import itertools
+import os
+import random
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+os.environ.setdefault('SESSION_SECRET', secrets.token_hex(32))
+
+import mysql.connector  # noqa: E402
+
+from auth import hash_password  # noqa: E402
+from db_connector import ADMIN_CONNECT_ARGS  # noqa: E402
+
+# Columns of each generated file, in load order. Times are written as Unix seconds and
+# converted by the server: TIME_COLUMNS with FROM_UNIXTIME, DATE_COLUMNS to the day.
+COLUMNS = {
+    'category': ('categoryID', 'description', 'name'),
+    'customer': ('userID', 'name', 'phone', 'email', 'address', 'password'),
+    'auction': ('auctionID', 'auction_name', 'start_time', 'end_time', 'status', 'userID'),
+    'auction_item': ('itemID', 'description', 'title', 'start_price', 'status', 'reserve_price', 'categoryID',
+                     'auctionID', 'winnerID', 'transactionID', 'current_price', 'bid_count', 'leading_custID'),
+    'payment': ('transactionID', 'amount', 'paymentMethod', 'PaymentDate', 'CustomerId', 'itemID'),
+    'bid': ('bidID', 'amount', 'bid_time', 'custID', 'itemID'),
+}
+TIME_COLUMNS = {'start_time', 'end_time', 'bid_time'}
+DATE_COLUMNS = {'PaymentDate'}
+NULL = '\\N'
+
+CITIES = ('Delhi', 'Mumbai', 'Bangalore', 'Kolkata', 'Chennai', 'Hyderabad', 'Pune', 'Jaipur')
+PAYMENT_METHODS = ('UPI', 'Credit/Debit Card', 'Net Banking')
+# Share of auctions per kind.
+AUCTION_KINDS = {'past': 0.55, 'active': 0.25, 'scheduled': 0.1, 'cancelled': 0.1}
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def zipf_cum_weights(n, skew):
+    """Cumulative weights 1/rank**skew for ranks 1..n, for random.choices."""
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+def spread(total, cum_weights, rng):
+    """Splits `total` into len(cum_weights) counts in proportion to the weights."""
+    weight_sum = cum_weights[-1]
+    counts = []
+    previous = 0.0
+    for cum in cum_weights:
+        counts.append(int(total * (cum - previous) / weight_sum))
+        previous = cum
+    for index in rng.choices(range(len(counts)), cum_weights=cum_weights, k=total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+class Writer:
+    """One tab-separated file per table."""
+
+    def __init__(self, directory):
+        self.files = {table: open(os.path.join(directory, f"{table}.tsv"), 'w', encoding='utf-8', newline='\n')
+                      for table in COLUMNS}
+        self.rows = dict.fromkeys(COLUMNS, 0)
+
+    def row(self, table, *values):
+        self.files[table].write('\t'.join(NULL if v is None else str(v) for v in values) + '\n')
+        self.rows[table] += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def generate(args, directory):
+    """Writes the dataset to `directory`. Returns the hottest items of Active auctions as (bids, itemID)."""
+    rng = random.Random(args.seed)
+    now = int(time.time())
+    out = Writer(directory)
+
+    for n in range(1, args.categories + 1):
+        out.row('category', f"CAT{n:04d}", f"Generated category {n}", f"Category {n}")
+
+    password = hash_password(args.password)
+    customers = [f"C{n:07d}" for n in range(1, args.customers + 1)]
+    for n, custID in enumerate(customers, 1):
+        out.row('customer', custID, f"Customer {n}", f"9{n:09d}"[-10:], f"{custID.lower()}@example.com",
+                rng.choice(CITIES), password)
+
+    # Auction windows first: they decide which items can have bids.
+    kinds = rng.choices(list(AUCTION_KINDS), weights=list(AUCTION_KINDS.values()), k=args.auctions)
+    windows = []
+    for kind in kinds:
+        duration = rng.randint(1, 7) * DAY + rng.randint(0, 23) * HOUR
+        if kind in ('past', 'cancelled'):
+            end = now - rng.randint(HOUR, 365 * DAY)
+            start = end - duration
+        elif kind == 'active':
+            start = now - rng.randint(0, duration - HOUR)
+            end = start + duration
+        else:
+            start = now + rng.randint(HOUR, 30 * DAY)
+            end = start + duration
+        windows.append((start, end))
+
+    items_of = [[] for _ in range(args.auctions)]
+    for n in range(1, args.items + 1):
+        items_of[rng.randrange(args.auctions)].append(n)
+
+    # Item popularity: Zipf over a random order of the items that can have bids.
+    open_items = [n for a, kind in enumerate(kinds) if kind != 'scheduled' for n in items_of[a]]
+    rng.shuffle(open_items)
+    bid_counts = dict(zip(open_items, spread(args.bids, zipf_cum_weights(len(open_items), args.skew), rng)))
+    # Bidder activity: Zipf over a random order of the customers.
+    bidders = customers[:]
+    rng.shuffle(bidders)
+    bidder_weights = zipf_cum_weights(len(bidders), args.skew)
+
+    bid_seq = itertools.count(1)
+    payment_seq = itertools.count(1)
+    hot = []
+    write_bid = out.files['bid'].write
+    randint = rng.randint
+    for a, kind in enumerate(kinds):
+        auctionID = f"A{a + 1:07d}"
+        start, end = windows[a]
+        last_bid_time = max(start, min(end, now) - 1)
+        all_paid = bool(items_of[a])
+        for n in items_of[a]:
+            itemID = f"I{n:08d}"
+            start_price = randint(10, 500) * 10
+            reserve_price = start_price + randint(0, 10) * start_price // 10
+            step = max(1, start_price // 20)
+            count = bid_counts.get(n, 0)
+
+            price = start_price
+            leader = None
+            if count:
+                times = sorted(randint(start, last_bid_time) for _ in range(count))
+                for bid_time, custID in zip(times, rng.choices(bidders, cum_weights=bidder_weights, k=count)):
+                    price += randint(1, step)
+                    write_bid(f"B{next(bid_seq):010d}\t{price}\t{bid_time}\t{custID}\t{itemID}\n")
+                leader = custID
+                out.rows['bid'] += count
+            current_price = price if count else None
+
+            status = winnerID = transactionID = None
+            if kind == 'past' and count and current_price >= reserve_price:
+                status, winnerID = 'Sold', leader
+                if rng.random() < args.paid:
+                    transactionID = f"T{next(payment_seq):08d}"
+                    out.row('payment', transactionID, current_price, rng.choice(PAYMENT_METHODS),
+                            min(now, end + randint(0, 3 * DAY)), winnerID, itemID)
+            all_paid = all_paid and transactionID is not None
+            if kind == 'active' and count:
+                hot.append((count, itemID))
+
+            out.row('auction_item', itemID, f"Generated item {n}", f"Item {n}", start_price, status or 'Listed',
+                    reserve_price, f"CAT{randint(1, args.categories):04d}", auctionID, winnerID, transactionID,
+                    current_price, count, leader)
+
+        status = {'active': 'Active', 'scheduled': 'Scheduled', 'cancelled': 'Cancelled'}.get(kind)
+        if status is None:
+            status = 'Completed' if all_paid else 'Ended'
+        out.row('auction', auctionID, f"Auction {a + 1}", start, end, status, rng.choice(customers))
+
+    out.close()
+    for table, rows in out.rows.items():
+        print(f"  {table}: {rows} rows")
+    return sorted(hot, reverse=True)[:5]
+
+
+def load_statement(table, path):
+    columns, assignments = [], []
+    for column in COLUMNS[table]:
+        if column in TIME_COLUMNS:
+            columns.append(f"@{column}")
+            assignments.append(f"{column} = FROM_UNIXTIME(@{column})")
+        elif column in DATE_COLUMNS:
+            columns.append(f"@{column}")
+            assignments.append(f"{column} = DATE(FROM_UNIXTIME(@{column}))")
+        else:
+            columns.append(column)
+    statement = (f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} "
+                 f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})")
+    if assignments:
+        statement += " SET " + ", ".join(assignments)
+    return statement
+
+
+def insert_statement(table):
+    values = []
+    for column in COLUMNS[table]:
+        if column in TIME_COLUMNS:
+            values.append("FROM_UNIXTIME(%s)")
+        elif column in DATE_COLUMNS:
+            values.append("DATE(FROM_UNIXTIME(%s))")
+        else:
+            values.append("%s")
+    return f"INSERT INTO {table} ({', '.join(COLUMNS[table])}) VALUES ({', '.join(values)})"
+
+
+def insert_file(cursor, table, path, batch=5000):
+    """Multi-row INSERTs of `batch` rows (mysql-connector turns executemany into one INSERT per batch)."""
+    statement = insert_statement(table)
+    rows = 0
+    with open(path, encoding='utf-8') as f:
+        while True:
+            lines = list(itertools.islice(f, batch))
+            if not lines:
+                return rows
+            cursor.executemany(statement, [tuple(None if v == NULL else v for v in line.rstrip('\n').split('\t'))
+                                           for line in lines])
+            rows += len(lines)
+
+
+def load(args, directory):
+    conn = mysql.connector.connect(**dict(ADMIN_CONNECT_ARGS, host=args.host), allow_local_infile=not args.insert)
+    try:
+        cursor = conn.cursor()
+        # The generated rows are consistent already: skip the per-row checks while loading.
+        cursor.execute("SET foreign_key_checks = 0, unique_checks = 0, @trusted_bid_writer = 1")
+        if args.reset:
+            for table in ('proxy_bid', *reversed(COLUMNS)):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+        for table in COLUMNS:
+            path = os.path.abspath(os.path.join(directory, f"{table}.tsv"))
+            started = time.monotonic()
+            if args.insert:
+                rows = insert_file(cursor, table, path)
+            else:
+                cursor.execute(load_statement(table, path))
+                rows = cursor.rowcount
+            conn.commit()
+            seconds = time.monotonic() - started
+            print(f"  {table}: {rows} rows in {seconds:.1f}s ({rows / max(seconds, 1e-6):.0f} rows/s)")
+        cursor.execute("SET foreign_key_checks = 1, unique_checks = 1, @trusted_bid_writer = NULL")
+        cursor.execute(f"ANALYZE TABLE {', '.join(COLUMNS)}")
+        cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=ADMIN_CONNECT_ARGS['host'])
+    parser.add_argument("--customers", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--auctions", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=500000)
+    parser.add_argument("--bids", type=int, default=10000000)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of item popularity and bidder activity")
+    parser.add_argument("--paid", type=float, default=0.8, help="share of sold items that are paid")
+    parser.add_argument("--password", default="bench-pass", help="password of every generated customer")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--files", help="directory for the TSV files (default: a temporary one, removed afterwards)")
+    parser.add_argument("--generate-only", action="store_true", help="write the files, do not load them")
+    parser.add_argument("--load-only", action="store_true", help="load files written earlier to --files")
+    parser.add_argument("--reset", action="store_true", help="empty every table before loading (sample data too)")
+    parser.add_argument("--insert", action="store_true", help="batched INSERTs instead of LOAD DATA LOCAL INFILE")
+    args = parser.parse_args()
+    if (args.generate_only or args.load_only) and not args.files:
+        parser.error("--generate-only and --load-only need --files")
+
+    directory = args.files or tempfile.mkdtemp(prefix='auction-dataset-')
+    os.makedirs(directory, exist_ok=True)
+    try:
+        if not args.load_only:
+            print(f"Generating into {directory}:")
+            started = time.monotonic()
+            hot = generate(args, directory)
+            print(f"  done in {time.monotonic() - started:.1f}s")
+            if hot:
+                print("Hottest items in Active auctions: " + ", ".join(f"{itemID} ({bids} bids)" for bids, itemID in hot))
+        if not args.generate_only:
+            print(f"Loading into {ADMIN_CONNECT_ARGS['database']} on {args.host}:")
+            load(args, directory)
+    finally:
+        if not args.files:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+# Starts a second local mysqld as a read replica of the local primary, for trying
+# DB_REPLICA_HOSTS on one machine.
+#
+#   tools/local_replica.sh start     initialize, load a snapshot of the primary, start replicating
+#   tools/local_replica.sh status    show SHOW REPLICA STATUS on the replica
+#   tools/local_replica.sh stop      shut the replica down (its data directory is kept)
+#
+# Then run the backend with:  DB_REPLICA_HOSTS=127.0.0.1:3307 python server.py
+#
+# The primary needs binary logging and a server_id other than 2 (the MySQL 8 defaults are
+# log_bin=ON, server_id=1). Root credentials for the primary: PRIMARY_USER / PRIMARY_PASSWORD
+# (default root and $DB_PASSWORD). The snapshot includes the mysql schema, so the replica
+# has the same accounts as the primary.
+set -euo pipefail
+
+PORT=${REPLICA_PORT:-3307}
+DATADIR=${REPLICA_DATADIR:-/tmp/auction-replica}
+SOCKET="$DATADIR/mysqld.sock"
+PRIMARY_USER=${PRIMARY_USER:-root}
+PRIMARY_PASSWORD=${PRIMARY_PASSWORD:-${DB_PASSWORD:-}}
+REPL_PASSWORD=${REPL_PASSWORD:-repl-local}
+
+primary() { mysql -h 127.0.0.1 -P 3306 -u "$PRIMARY_USER" ${PRIMARY_PASSWORD:+-p"$PRIMARY_PASSWORD"} "$@"; }
+replica() { mysql -S "$SOCKET" -u root ${REPLICA_ROOT_PASSWORD:+-p"$REPLICA_ROOT_PASSWORD"} "$@"; }
+
+start() {
+    if [ ! -d "$DATADIR/mysql" ]; then
+        mkdir -p "$DATADIR"
+        mysqld --initialize-insecure --datadir="$DATADIR" --user="$(whoami)"
+        fresh=1
+    fi
+    mysqld --datadir="$DATADIR" --port="$PORT" --socket="$SOCKET" --mysqlx=OFF \
+           --server-id=2 --read-only=ON --super-read-only=OFF --skip-replica-start \
+           --relay-log="$DATADIR/relay-bin" --pid-file="$DATADIR/mysqld.pid" \
+           --log-error="$DATADIR/error.log" --user="$(whoami)" --daemonize
+    until replica -e "SELECT 1" >/dev/null 2>&1; do sleep 0.5; done
+
+    if [ "${fresh:-0}" = 1 ]; then
+        primary -e "CREATE USER IF NOT EXISTS 'repl'@'%' IDENTIFIED BY '$REPL_PASSWORD';
+                    GRANT REPLICATION SLAVE ON *.* TO 'repl'@'%';
+                    GRANT REPLICATION CLIENT ON *.* TO 'auction_admin'@'localhost';"
+        # --source-data writes the matching CHANGE REPLICATION SOURCE TO SOURCE_LOG_FILE/POS into the dump.
+        mysqldump -h 127.0.0.1 -P 3306 -u "$PRIMARY_USER" ${PRIMARY_PASSWORD:+-p"$PRIMARY_PASSWORD"} \
+                  --all-databases --single-transaction --source-data=1 --routines --triggers --events \
+            | replica
+        REPLICA_ROOT_PASSWORD=$PRIMARY_PASSWORD
+        replica -e "CHANGE REPLICATION SOURCE TO SOURCE_HOST='127.0.0.1', SOURCE_PORT=3306,
+                    SOURCE_USER='repl', SOURCE_PASSWORD='$REPL_PASSWORD', GET_SOURCE_PUBLIC_KEY=1;
+                    FLUSH PRIVILEGES;"
+    else
+        REPLICA_ROOT_PASSWORD=$PRIMARY_PASSWORD
+    fi
+    replica -e "START REPLICA;"
+    echo "Replica running on 127.0.0.1:$PORT. Use DB_REPLICA_HOSTS=127.0.0.1:$PORT"
+}
+
+case "${1:-}" in
+    start) start ;;
+    status) REPLICA_ROOT_PASSWORD=$PRIMARY_PASSWORD; replica -e "SHOW REPLICA STATUS\G" ;;
+    stop) REPLICA_ROOT_PASSWORD=$PRIMARY_PASSWORD; replica -e "SHUTDOWN" ;;
+    *) echo "usage: $0 start|status|stop" >&2; exit 2 ;;
+esac
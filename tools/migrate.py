@@ -0,0 +1,180 @@
+"""
+Applies the scripts in migrations/ that the database has not seen yet, in numeric order,
+and records each one in the schema_migrations table.
+
+    python tools/migrate.py                   apply pending migrations
+    python tools/migrate.py --status          list applied and pending migrations
+    python tools/migrate.py --dry-run         print the statements of pending migrations
+    python tools/migrate.py --baseline 006    mark 001..006 as applied without running them
+
+A database installed from Online_Auction.sql is already up to date. One that was set up
+before this runner existed has no schema_migrations table: pass --baseline with the last
+migration that was applied by hand, once.
+
+Connects as root (password: DB_PASSWORD from backend/.env) because migrations create
+routines and indexes. MySQL commits DDL immediately, so a migration that fails halfway
+is not rolled back: fix the cause, undo the partial change by hand, and run again.
+"""
+import argparse
+import os
+import re
+import sys
+
+import mysql.connector
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, 'migrations')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+from db_connector import DB_HOST, DB_NAME, DB_PASSWORD_ROOT  # noqa: E402
+
+DELIMITER_LINE = re.compile(r'[ \t]*DELIMITER[ \t]+(\S+)[ \t]*(?:\r?\n|$)', re.IGNORECASE)
+
+
+def split_statements(sql):
+    """
+    Splits a script written for the mysql client into single statements. Understands
+    DELIMITER lines, quoted strings and comments, so routine bodies stay in one piece.
+    """
+    statements = []
+    delimiter = ';'
+    current = []
+    i = 0
+    at_line_start = True
+    while i < len(sql):
+        if at_line_start and not ''.join(current).strip():
+            match = DELIMITER_LINE.match(sql, i)
+            if match:
+                delimiter = match.group(1)
+                current = []
+                i = match.end()
+                continue
+        ch = sql[i]
+        at_line_start = ch == '\n'
+        if sql.startswith(delimiter, i):
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += len(delimiter)
+            continue
+        if ch in ("'", '"', '`'):
+            end = i + 1
+            while end < len(sql) and sql[end] != ch:
+                end += 2 if sql[end] == '\\' and ch != '`' else 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        if sql.startswith('--', i) and (i + 2 == len(sql) or sql[i + 2].isspace()) or ch == '#':
+            end = sql.find('\n', i)
+            i = len(sql) if end == -1 else end
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = len(sql) if end == -1 else end + 2
+            continue
+        current.append(ch)
+        i += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def migration_files():
+    """[(version, path)] of the scripts in migrations/, ordered by version ('001', '002', ...)."""
+    found = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith('.sql') and '_' in name:
+            found.append((name.split('_', 1)[0], os.path.join(MIGRATIONS_DIR, name)))
+    return found
+
+
+def applied_versions(cursor):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = %s AND table_name = 'schema_migrations'",
+        (DB_NAME,)
+    )
+    if cursor.fetchone()[0] == 0:
+        return None
+    cursor.execute(f"SELECT version FROM {DB_NAME}.schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DB_NAME}.schema_migrations (
+            version varchar(10) primary key,
+            applied_at timestamp not null default current_timestamp
+        )
+    """)
+
+
+def record(cursor, version):
+    cursor.execute(f"INSERT IGNORE INTO {DB_NAME}.schema_migrations (version) VALUES (%s)", (version,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DB_HOST)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default=DB_PASSWORD_ROOT)
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="print pending statements without running them")
+    parser.add_argument("--baseline", metavar="VERSION", help="record migrations up to VERSION as applied")
+    args = parser.parse_args()
+
+    migrations = migration_files()
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password or '', autocommit=True)
+    try:
+        cursor = conn.cursor()
+        applied = applied_versions(cursor)
+
+        if args.baseline:
+            if args.baseline not in {version for version, _ in migrations}:
+                sys.exit(f"Unknown migration version {args.baseline!r}")
+            ensure_table(cursor)
+            for version, _ in migrations:
+                if version <= args.baseline:
+                    record(cursor, version)
+            print(f"Recorded migrations up to {args.baseline} as applied.")
+            return
+
+        if applied is None:
+            sys.exit("schema_migrations does not exist. If migrations were applied by hand, "
+                     "run with --baseline <last applied version> first.")
+        pending = [(version, path) for version, path in migrations if version not in applied]
+
+        if args.status:
+            for version, path in migrations:
+                state = "applied" if version in applied else "pending"
+                print(f"{version}  {state:8} {os.path.basename(path)}")
+            return
+        if not pending:
+            print("Database is up to date.")
+            return
+
+        for version, path in pending:
+            with open(path, encoding='utf-8') as f:
+                statements = split_statements(f.read())
+            print(f"Applying {os.path.basename(path)} ({len(statements)} statements)")
+            for statement in statements:
+                if args.dry_run:
+                    print(statement, end=';\n\n')
+                    continue
+                try:
+                    cursor.execute(statement)
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                except mysql.connector.Error as e:
+                    print(f"Migration {version} failed: {e}\nStatement:\n{statement}", file=sys.stderr)
+                    sys.exit(1)
+            if not args.dry_run:
+                ensure_table(cursor)
+                record(cursor, version)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()